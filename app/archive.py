@@ -0,0 +1,46 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+import traceback
+from datetime import datetime, timezone
+from typing import Any, Dict
+from app.config import ARCHIVE_DIR
+
+class HtmlArchive:
+    """Fetched HTML appended to daily gzipped JSONL files, one {"url", "html", "source",
+    "fetchedAt"} record per line: the input format of `python -m app.reextract`."""
+
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.records = 0
+        self.bytes = 0
+
+    def _append(self, day: str, line: bytes):
+        # Each append is its own gzip member; readers see one continuous stream
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with gzip.open(os.path.join(self.directory, f"html-{day}.jsonl.gz"), "ab", compresslevel=6) as f:
+                f.write(line)
+
+    async def add(self, url: str, html: str, source: str):
+        # source: "static" (parsed with lxml) or "dynamic" (page.content(), parsed with html.parser)
+        if not html:
+            return
+        now = datetime.now(timezone.utc)
+        line = json.dumps({"url": url, "html": html, "source": source, "fetchedAt": now.isoformat()}).encode() + b"\n"
+        # Best effort: a full disk must not fail scrapes
+        try:
+            await asyncio.to_thread(self._append, now.strftime("%Y-%m-%d"), line)
+        except OSError:
+            traceback.print_exc()
+            return
+        self.records += 1
+        self.bytes += len(line)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"directory": self.directory, "records": self.records, "bytes": self.bytes}
+
+html_archive = HtmlArchive()
@@ -0,0 +1,251 @@
+// In-page counterpart of ScraperUtils.extract_meta + _DocumentIndex in app/extraction.py, whose
+// _BrowserIndex reads the payload returned here.
+// Walks the live DOM once, skipping noise subtrees, and returns flat arrays plus
+// per-candidate [start, end) ranges so nested sections share strings, links, etc.
+// Text semantics follow BeautifulSoup: get_text(" ", strip=True) / get_text() and
+// Python's str.strip()/\s whitespace; rawHtml follows bs4's minimal formatter.
+(config) => {
+  const WS = "[\\t\\n\\v\\f\\r\\x1c-\\x1f \\x85\\xa0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000]";
+  const TRIM = new RegExp("^" + WS + "+|" + WS + "+$", "g");
+  const RUNS = new RegExp(WS + "+", "g");
+  const TOKENS = new RegExp(WS + "+");
+  const strip = (s) => s.replace(TRIM, "");
+  const clean = (s) => strip(s.replace(RUNS, " "));
+  const tokens = (s) => (s ? s.split(TOKENS).filter((t) => t) : []);
+
+  const ELEMENT = 1, TEXT = 3, CDATA = 4, COMMENT = 8;
+  const noiseSelector = config.noiseSelectors.join(", ");
+  const sectionTags = new Set(config.sectionTags);
+  const headingTags = new Set(config.headingTags);
+  const contentDiv = new RegExp(config.contentDivPattern, "i");
+  // Strings under these tags are not NavigableStrings in bs4 and never reach get_text()
+  const stringContainers = new Set(["rt", "rp", "script", "style", "template"]);
+  const voidTags = new Set(config.voidTags);
+  const multiValued = config.multiValuedAttributes;
+
+  const childrenOf = (node) =>
+    node.nodeType === ELEMENT && node.localName === "template" && node.content
+      ? node.content.childNodes
+      : node.childNodes;
+
+  // --- Meta (taken before noise filtering, like extract_meta) ---
+  const first = (name, test) => {
+    for (const el of document.getElementsByTagName(name)) {
+      if (!test || test(el)) return el;
+    }
+    return null;
+  };
+  const stringOf = (el) => {
+    // Tag.string: the only child's string, recursing through single-child tags
+    const kids = childrenOf(el);
+    if (kids.length !== 1) return null;
+    const child = kids[0];
+    return child.nodeType === ELEMENT ? stringOf(child) : child.nodeValue;
+  };
+  const titleEl = first("title");
+  let title = titleEl ? stringOf(titleEl) : null;
+  if (!title) {
+    const og = first("meta", (el) => el.getAttribute("property") === "og:title");
+    if (og) title = og.getAttribute("content");
+  }
+  const desc = first("meta", (el) => el.getAttribute("name") === "description");
+  const htmlEl = first("html");
+  const canonical = first("link", (el) => {
+    const rel = el.getAttribute("rel");
+    return rel === "canonical" || tokens(rel).includes("canonical");
+  });
+  const isNext = (el) => tokens(el.getAttribute("rel")).includes("next") && el.getAttribute("href") !== null;
+  const next = first("link", isNext) || first("a", isNext);
+  const meta = {
+    title: title,
+    description: desc ? desc.getAttribute("content") : null,
+    language: htmlEl ? htmlEl.getAttribute("lang") : null,
+    canonical: canonical ? [canonical.getAttribute("href")] : null,
+    next: next ? next.getAttribute("href") : null,
+  };
+
+  // --- Single walk ---
+  const raw = [], texts = [];
+  const headings = [], links = [], images = [], items = [], lists = [], tables = [], rows = [], cells = [];
+  const candidates = [], divCandidates = [];
+  let body = null, html = null;
+  // Non-noise elements entered so far: an element's position is its start count - 1
+  let elements = 0;
+  // Budgets hit during the walk; elements past them are left out of the index
+  const limits = new Set();
+  const noise = new WeakSet();
+  const counters = () => [
+    raw.length, texts.length, headings.length, links.length, images.length,
+    lists.length, items.length, tables.length, rows.length, cells.length, elements,
+  ];
+  const rawText = (start, end) => raw.slice(start[0], end[0]).join("");
+  const joinedText = (start, end) => clean(texts.slice(start[1], end[1]).join(" "));
+
+  const root = document;
+  const stack = [{ node: root, kids: childrenOf(root), i: 0, contained: false, start: counters(), exit: null }];
+  while (stack.length) {
+    const frame = stack[stack.length - 1];
+    if (frame.i >= frame.kids.length) {
+      stack.pop();
+      if (frame.exit) frame.exit(frame.start, counters());
+      continue;
+    }
+    const child = frame.kids[frame.i++];
+    if (child.nodeType === TEXT || child.nodeType === CDATA) {
+      if (!frame.contained) {
+        raw.push(child.nodeValue);
+        const s = strip(child.nodeValue);
+        if (s) texts.push(s);
+      }
+      continue;
+    }
+    if (child.nodeType !== ELEMENT) continue;
+    if (child.matches(noiseSelector)) {
+      noise.add(child);
+      continue;
+    }
+    if (stack.length > config.maxDepth) {
+      limits.add("depth");
+      continue;
+    }
+    if (elements >= config.maxNodes) {
+      limits.add("nodes");
+      continue;
+    }
+    const name = child.localName;
+    elements++;
+    let exit = null;
+    if (name === "body" && !body) {
+      const c = (body = { el: child, tag: name });
+      exit = (s, e) => { c.ranges = [s, e]; };
+    } else if (name === "html" && !html) {
+      const c = (html = { el: child, tag: name });
+      exit = (s, e) => { c.ranges = [s, e]; };
+    }
+    if (sectionTags.has(name)) {
+      const c = { el: child, tag: name };
+      candidates.push(c);
+      exit = (s, e) => { c.ranges = [s, e]; };
+    } else if (name === "div" && tokens(child.getAttribute("class")).some((t) => contentDiv.test(t))) {
+      const c = { el: child, tag: name };
+      divCandidates.push(c);
+      exit = (s, e) => { c.ranges = [s, e]; };
+    }
+    const own = exit;
+    let record = null;
+    if (headingTags.has(name)) {
+      const i = headings.push(null) - 1;
+      record = (s, e) => { headings[i] = joinedText(s, e); };
+    } else if (name === "a") {
+      if (child.hasAttribute("href")) {
+        const i = links.push(null) - 1;
+        const href = child.getAttribute("href");
+        record = (s, e) => { links[i] = [clean(rawText(s, e)), href]; };
+      }
+    } else if (name === "img") {
+      if (child.hasAttribute("src")) {
+        images.push([child.getAttribute("src"), child.hasAttribute("alt") ? child.getAttribute("alt") : ""]);
+      }
+    } else if (name === "ul" || name === "ol") {
+      const i = lists.push(null) - 1;
+      record = (s, e) => { lists[i] = [s[6], e[6]]; };
+    } else if (name === "li") {
+      const i = items.push(null) - 1;
+      record = (s, e) => { items[i] = joinedText(s, e); };
+    } else if (name === "table") {
+      const i = tables.push(null) - 1;
+      record = (s, e) => { tables[i] = [s[8], e[8]]; };
+    } else if (name === "tr") {
+      const i = rows.push(null) - 1;
+      record = (s, e) => { rows[i] = cells.slice(s[9], e[9]); };
+    } else if (name === "td" || name === "th") {
+      const i = cells.push(null) - 1;
+      record = (s, e) => { cells[i] = clean(rawText(s, e)); };
+    }
+    if (own && record) {
+      exit = (s, e) => { record(s, e); own(s, e); };
+    } else if (record) {
+      exit = record;
+    }
+    stack.push({
+      node: child,
+      kids: childrenOf(child),
+      i: 0,
+      contained: frame.contained || stringContainers.has(name),
+      start: counters(),
+      exit: exit,
+    });
+  }
+
+  let sections = candidates.concat(divCandidates);
+  if (!sections.length) {
+    // Same fallback as parse_sections: the whole body (or html element)
+    sections = body ? [body] : html ? [html] : [];
+  }
+
+  // --- rawHtml: bs4-compatible serializer that stops once past the truncation limit ---
+  const escapeText = (s) => s.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;");
+  const attrValue = (name, tag, value) => {
+    const multi = (multiValued["*"] || []).includes(name) || (multiValued[tag] || []).includes(name);
+    if (multi) value = tokens(value).join(" ");
+    value = escapeText(value);
+    if (value.includes('"')) {
+      if (value.includes("'")) return '"' + value.replace(/"/g, "&quot;") + '"';
+      return "'" + value + "'";
+    }
+    return '"' + value + '"';
+  };
+  const serialize = (el, limit) => {
+    const out = [];
+    let length = 0;
+    const emit = (s) => { out.push(s); length += s.length; };
+    const walk = (node) => {
+      if (length > limit) return;
+      if (node.nodeType === TEXT) emit(escapeText(node.nodeValue));
+      else if (node.nodeType === CDATA) emit("<![CDATA[" + node.nodeValue + "]]>");
+      else if (node.nodeType === COMMENT) emit("<!--" + node.nodeValue + "-->");
+      else if (node.nodeType === ELEMENT && !noise.has(node)) {
+        const name = node.localName;
+        const attrs = Array.from(node.attributes, (a) => [a.name, a.value]);
+        attrs.sort((a, b) => (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0));
+        let open = "<" + name;
+        for (const [k, v] of attrs) open += " " + k + "=" + attrValue(k, name, v);
+        const kids = childrenOf(node);
+        if (voidTags.has(name) && !kids.length) {
+          emit(open + "/>");
+          return;
+        }
+        emit(open + ">");
+        for (const kid of kids) walk(kid);
+        emit("</" + name + ">");
+      }
+    };
+    walk(el);
+    return out.join("").slice(0, limit + 1);
+  };
+
+  return {
+    meta: meta,
+    limits: Array.from(limits),
+    texts: texts,
+    headings: headings,
+    links: links,
+    images: images,
+    items: items,
+    lists: lists,
+    tables: tables,
+    rows: rows,
+    sections: sections.map((c) => {
+      const [s, e] = c.ranges;
+      const hasText = e[1] > s[1];
+      return {
+        tag: c.tag,
+        id: c.el.getAttribute("id"),
+        classes: tokens(c.el.getAttribute("class")),
+        ariaLabel: c.el.getAttribute("aria-label"),
+        ranges: [s.slice(1), e.slice(1)],
+        rawHtml: hasText && config.rawHtml ? serialize(c.el, config.maxRawHtmlLength) : "",
+      };
+    }),
+  };
+}
@@ -0,0 +1,272 @@
+import asyncio
+import time
+import traceback
+from contextlib import asynccontextmanager
+from contextvars import Context
+from typing import AsyncIterator, Dict, List, Optional, Any
+from playwright.async_api import async_playwright, Playwright, Browser, BrowserContext
+from app.config import (
+    BROWSER_POOL_SIZE, BROWSER_MAX_CONTEXTS,
+    BROWSER_MAX_PAGES_PER_BROWSER, BROWSER_HEALTHCHECK_INTERVAL
+)
+from app.metrics import record, timed
+
+# Add args to reduce detection
+LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-accelerated-2d-canvas",
+    "--no-first-run",
+    "--no-zygote",
+    "--disable-gpu",
+]
+
+class _BrowserSlot:
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.pages_served = 0
+        self.active = 0
+        self.launched_at = time.monotonic()
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser.is_connected()
+
+class BrowserPool:
+    """Long-lived Chromium browsers handing out one fresh BrowserContext per scrape."""
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        max_contexts: int = BROWSER_MAX_CONTEXTS,
+        max_pages_per_browser: int = BROWSER_MAX_PAGES_PER_BROWSER,
+        healthcheck_interval: float = BROWSER_HEALTHCHECK_INTERVAL,
+    ):
+        self.size = max(1, size)
+        self.max_contexts = max(1, max_contexts)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.healthcheck_interval = healthcheck_interval
+
+        self._playwright: Optional[Playwright] = None
+        self._slots: List[Optional[_BrowserSlot]] = []
+        self._retiring: List[_BrowserSlot] = []
+        # Slot index -> launch in flight; the browser is swapped in when it is up
+        self._launches: Dict[int, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._healthcheck_task: Optional[asyncio.Task] = None
+
+        # Stats
+        self._in_use = 0
+        self._waiting = 0
+        self._leases = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._restarts = 0
+        self._retired = 0
+
+    def _bind_loop(self):
+        # A pool is tied to the event loop it was started on (uvicorn runs one loop;
+        # scripts calling asyncio.run() repeatedly get a fresh pool state each time).
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._playwright = None
+            self._slots = [None] * self.size
+            self._retiring = []
+            self._launches = {}
+            self._semaphore = asyncio.Semaphore(self.max_contexts)
+            self._lock = asyncio.Lock()
+            self._healthcheck_task = None
+            self._in_use = 0
+            self._waiting = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        self._bind_loop()
+        try:
+            await self._ensure_playwright()
+            await asyncio.gather(*(self._relaunch(i) for i in range(self.size) if self._slots[i] is None))
+        except Exception:
+            # Keep the app up without browsers; slots are launched lazily on first use.
+            traceback.print_exc()
+        if self.healthcheck_interval > 0 and self._healthcheck_task is None:
+            self._healthcheck_task = asyncio.create_task(self._healthcheck_loop())
+
+    async def stop(self):
+        if self._loop is not asyncio.get_running_loop():
+            return
+        if self._healthcheck_task:
+            self._healthcheck_task.cancel()
+            try:
+                await self._healthcheck_task
+            except asyncio.CancelledError:
+                pass
+            self._healthcheck_task = None
+        launches = list(self._launches.values())
+        for task in launches:
+            task.cancel()
+        await asyncio.gather(*launches, return_exceptions=True)
+        self._launches = {}
+        for slot in self._slots + self._retiring:
+            if slot:
+                await self._close_browser(slot)
+        self._slots = [None] * self.size
+        self._retiring = []
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _ensure_playwright(self):
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+    async def _launch(self) -> _BrowserSlot:
+        # Only charged to a scrape when its checkout (re)launches a browser
+        with timed("browser_launch"):
+            browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        return _BrowserSlot(browser)
+
+    async def _close_browser(self, slot: _BrowserSlot):
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+
+    def _relaunch(self, i: int, context: Optional[Context] = None) -> asyncio.Task:
+        # One launch per slot at a time, outside the lock: leases keep going to the
+        # other browsers meanwhile, and callers with nothing to lease wait on the task
+        task = self._launches.get(i)
+        if task is None:
+            task = asyncio.create_task(self._replace(i), context=context)
+            task.add_done_callback(self._launch_done)
+            self._launches[i] = task
+        return task
+
+    def _launch_done(self, task: asyncio.Task):
+        # Logged here as well, since a launch nobody waits on (a retirement) fails silently otherwise
+        if not task.cancelled() and task.exception() is not None:
+            traceback.print_exception(task.exception())
+
+    async def _replace(self, i: int):
+        try:
+            slot = await self._launch()
+        finally:
+            self._launches.pop(i, None)
+        old, self._slots[i] = self._slots[i], slot
+        if old is None:
+            return
+        if old.healthy:
+            self._retired += 1
+        else:
+            self._restarts += 1
+        if old.active:
+            # Closed by the last lease still using it
+            self._retiring.append(old)
+        else:
+            await self._close_browser(old)
+
+    async def _healthcheck_loop(self):
+        while True:
+            await asyncio.sleep(self.healthcheck_interval)
+            try:
+                await self.healthcheck()
+            except Exception:
+                traceback.print_exc()
+
+    async def healthcheck(self):
+        # Restart crashed browsers
+        if not self.started:
+            return
+        launches = [self._relaunch(i) for i, slot in enumerate(self._slots) if slot is not None and not slot.healthy]
+        await asyncio.gather(*launches)
+
+    async def _checkout(self) -> _BrowserSlot:
+        await self._ensure_playwright()
+        while True:
+            for i, slot in enumerate(self._slots):
+                if slot is None or not slot.healthy:
+                    self._relaunch(i)
+            ready = [s for s in self._slots if s is not None and s.healthy]
+            if ready:
+                slot = min(ready, key=lambda s: s.active)
+                slot.active += 1
+                slot.pages_served += 1
+                if slot.pages_served >= self.max_pages_per_browser:
+                    # Retire to cap memory growth: it keeps serving until the fresh browser is
+                    # up, then finishes its leases. The launch is not charged to this scrape.
+                    self._relaunch(self._slots.index(slot), Context())
+                return slot
+            # Nothing up yet: wait for the first launch (its error is this checkout's error)
+            pending = list(self._launches.values())
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+
+    async def _checkin(self, slot: _BrowserSlot):
+        slot.active -= 1
+        if slot in self._retiring and slot.active == 0:
+            self._retiring.remove(slot)
+            await self._close_browser(slot)
+
+    @asynccontextmanager
+    async def context(self, **context_options: Any) -> AsyncIterator[BrowserContext]:
+        self._bind_loop()
+        started_waiting = time.monotonic()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - started_waiting
+        record("browser_pool_wait", waited)
+        self._leases += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._in_use += 1
+
+        slot = None
+        context = None
+        try:
+            with timed("browser_context"):
+                slot = await self._checkout()
+                context = await slot.browser.new_context(**context_options)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            if slot is not None:
+                await self._checkin(slot)
+            self._in_use -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        browsers = [s for s in self._slots if s is not None]
+        return {
+            "browsers": len(browsers),
+            "healthyBrowsers": sum(1 for s in browsers if s.healthy),
+            "retiringBrowsers": len(self._retiring),
+            "launching": len(self._launches),
+            "maxContexts": self.max_contexts,
+            "inUse": self._in_use,
+            "waiting": self._waiting,
+            "occupancy": round(self._in_use / self.max_contexts, 3),
+            "leases": self._leases,
+            "avgWaitMs": round(1000 * self._wait_total / self._leases, 2) if self._leases else 0.0,
+            "maxWaitMs": round(1000 * self._wait_max, 2),
+            "restarts": self._restarts,
+            "retired": self._retired,
+            "pagesPerBrowser": [s.pages_served for s in browsers],
+        }
+
+browser_pool = BrowserPool()
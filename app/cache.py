@@ -0,0 +1,236 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Any
+from urllib.parse import urlsplit, urlunsplit
+from app.models import ScrapeResult
+from app.config import (
+    CACHE_ENABLED, CACHE_MEMORY_TTL, CACHE_MEMORY_MAX_BYTES,
+    CACHE_DISK_TTL, CACHE_DISK_MAX_ENTRIES, CACHE_DB_PATH
+)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def normalize_url(url: str) -> str:
+    # Lowercase scheme/host, drop default ports and fragments, "/" for an empty path
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        host = f"{userinfo}@{host}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+class CacheEntry:
+    def __init__(self, body: bytes, stored_at: float, etag: Optional[str] = None,
+                 last_modified: Optional[str] = None, source: str = "static"):
+        self.body = body
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self.source = source
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def revalidatable(self) -> bool:
+        # Only static results can be revalidated: for JS-rendered pages an unchanged
+        # HTML shell says nothing about the rendered content.
+        return self.source == "static" and bool(self.etag or self.last_modified)
+
+    def result(self) -> ScrapeResult:
+        return ScrapeResult.model_validate_json(self.body)
+
+class _MemoryLRU:
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.age >= self.ttl:
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        self.pop(key)
+        if len(entry.body) > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.bytes += len(entry.body)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted.body)
+
+    def pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry.body)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class _DiskStore:
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, stored_at REAL, accessed_at REAL, "
+                "etag TEXT, last_modified TEXT, source TEXT, body BLOB)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed_at)")
+        return self._conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT body, stored_at, etag, last_modified, source FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            return CacheEntry(row[0], row[1], row[2], row[3], row[4])
+
+    def put(self, key: str, entry: CacheEntry):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.stored_at, time.time(), entry.etag, entry.last_modified, entry.source, entry.body)
+            )
+            # Evict least recently accessed rows beyond the size cap
+            conn.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    def touch(self, key: str, stored_at: float):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE results SET stored_at = ?, accessed_at = ? WHERE key = ?", (stored_at, time.time(), key))
+            conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class ResultCache:
+    """Scrape results keyed by normalized URL: memory LRU (size-bounded) over SQLite, each with a TTL."""
+
+    def __init__(
+        self,
+        enabled: bool = CACHE_ENABLED,
+        memory_ttl: float = CACHE_MEMORY_TTL,
+        memory_max_bytes: int = CACHE_MEMORY_MAX_BYTES,
+        disk_ttl: float = CACHE_DISK_TTL,
+        disk_max_entries: int = CACHE_DISK_MAX_ENTRIES,
+        db_path: str = CACHE_DB_PATH,
+    ):
+        self.enabled = enabled
+        self.disk_ttl = disk_ttl
+        self._memory = _MemoryLRU(memory_max_bytes, memory_ttl)
+        self._disk = _DiskStore(db_path, disk_max_entries)
+        self.counters: Dict[str, int] = {
+            "memoryHits": 0, "diskHits": 0, "misses": 0, "stores": 0,
+            "revalidations": 0, "revalidatedNotModified": 0, "bypassed": 0,
+        }
+
+    async def lookup(self, url: str) -> Tuple[Optional[CacheEntry], bool]:
+        # Returns (entry, fresh). A stale entry is still returned so the caller can revalidate it.
+        if not self.enabled:
+            return None, False
+        key = normalize_url(url)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self.counters["memoryHits"] += 1
+            return entry, True
+        entry = await self._disk_call(self._disk.get, key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None, False
+        if entry.age < self.disk_ttl:
+            self.counters["diskHits"] += 1
+            self._memory.put(key, entry)
+            return entry, True
+        if not entry.revalidatable:
+            self.counters["misses"] += 1
+            return None, False
+        self.counters["revalidations"] += 1
+        return entry, False
+
+    def bypass(self):
+        self.counters["bypassed"] += 1
+
+    async def store(self, url: str, result: ScrapeResult, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None, source: str = "static"):
+        if not self.enabled:
+            return
+        key = normalize_url(url)
+        entry = CacheEntry(result.model_dump_json().encode(), time.time(), etag, last_modified, source)
+        self._memory.put(key, entry)
+        await self._disk_call(self._disk.put, key, entry)
+        self.counters["stores"] += 1
+
+    async def mark_revalidated(self, url: str, entry: CacheEntry):
+        # 304 Not Modified: the cached result is fresh again
+        key = normalize_url(url)
+        entry.stored_at = time.time()
+        self._memory.put(key, entry)
+        await self._disk_call(self._disk.touch, key, entry.stored_at)
+        self.counters["revalidatedNotModified"] += 1
+
+    async def _disk_call(self, fn, *args):
+        # The disk tier is best effort: a broken cache file must not fail scrapes
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except sqlite3.Error:
+            traceback.print_exc()
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["memoryHits"] + self.counters["diskHits"] + self.counters["misses"] + self.counters["revalidations"]
+        hits = self.counters["memoryHits"] + self.counters["diskHits"] + self.counters["revalidatedNotModified"]
+        return {
+            "enabled": self.enabled,
+            **self.counters,
+            "hitRate": round(hits / lookups, 3) if lookups else 0.0,
+            "memoryEntries": len(self._memory),
+            "memoryBytes": self._memory.bytes,
+        }
+
+    def close(self):
+        self._disk.close()
+
+result_cache = ResultCache()
@@ -0,0 +1,134 @@
+import os
+
+# Browser pool (Playwright fallback)
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_CONTEXTS = int(os.getenv("BROWSER_MAX_CONTEXTS", "8"))
+BROWSER_MAX_PAGES_PER_BROWSER = int(os.getenv("BROWSER_MAX_PAGES_PER_BROWSER", "200"))
+BROWSER_HEALTHCHECK_INTERVAL = float(os.getenv("BROWSER_HEALTHCHECK_INTERVAL", "30"))
+
+# Shared HTTP client (static path)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", "300"))
+
+# HTML parsing / section extraction executor: "process" or "thread"
+EXTRACT_EXECUTOR = os.getenv("EXTRACT_EXECUTOR", "process")
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "0")) or (os.cpu_count() or 1)
+# Extraction backend: "bs4" (BeautifulSoup tree) or "lxml" (lxml tree, same output)
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "bs4")
+# Dynamic scrapes: "python" reparses page.content(), "browser" extracts inside the page
+EXTRACT_MODE = os.getenv("EXTRACT_MODE", "python")
+
+# Resource limits; each one that is hit is reported as an Error with phase "resource_limit"
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+PARSE_MAX_NODES = int(os.getenv("PARSE_MAX_NODES", "200000"))
+PARSE_MAX_DEPTH = int(os.getenv("PARSE_MAX_DEPTH", "512"))
+MAX_SECTIONS = int(os.getenv("MAX_SECTIONS", "1000"))
+MAX_LINKS_PER_SECTION = int(os.getenv("MAX_LINKS_PER_SECTION", "5000"))
+MAX_IMAGES_PER_SECTION = int(os.getenv("MAX_IMAGES_PER_SECTION", "1000"))
+
+# API responses: compressed (brotli when installed, else gzip) from this size up, if the client accepts it
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+# Concurrency limits (apply to every scrape, single or batch)
+STATIC_CONCURRENCY = int(os.getenv("STATIC_CONCURRENCY", "32"))
+STATIC_PER_HOST_CONCURRENCY = int(os.getenv("STATIC_PER_HOST_CONCURRENCY", "4"))
+DYNAMIC_CONCURRENCY = int(os.getenv("DYNAMIC_CONCURRENCY", str(BROWSER_MAX_CONTEXTS)))
+DYNAMIC_PER_HOST_CONCURRENCY = int(os.getenv("DYNAMIC_PER_HOST_CONCURRENCY", "2"))
+# Per-host adaptive limiting, shared by static and browser fetches: a token bucket
+# (requests/second, also the burst) and a concurrency limit, both cut in half when the
+# host throttles or fails (a slow response cuts them by 10%) and grown back additively
+HOST_LIMITER_ENABLED = os.getenv("HOST_LIMITER_ENABLED", "1") == "1"
+HOST_RATE_LIMIT = float(os.getenv("HOST_RATE_LIMIT", "10"))
+HOST_RATE_MIN = float(os.getenv("HOST_RATE_MIN", "0.2"))
+HOST_CONCURRENCY_MAX = int(os.getenv("HOST_CONCURRENCY_MAX", str(STATIC_PER_HOST_CONCURRENCY + DYNAMIC_PER_HOST_CONCURRENCY)))
+# A static response this many times slower than the host's average counts as congestion
+HOST_LATENCY_FACTOR = float(os.getenv("HOST_LATENCY_FACTOR", "3"))
+# Static fetch retries on 429/502/503/504 and connection errors: jittered exponential
+# backoff from RETRY_BASE_DELAY; a longer Retry-After than RETRY_MAX_DELAY is not waited for
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+# URLs of one batch request scraped at the same time
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+
+# Crawl mode (POST /crawl): defaults for requests that don't set them, frontier and seen-set sizes
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "2"))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "100"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+# Seconds between requests to one host (a longer robots.txt Crawl-delay wins)
+CRAWL_POLITENESS_DELAY = float(os.getenv("CRAWL_POLITENESS_DELAY", "1"))
+CRAWL_FRONTIER_MAX = int(os.getenv("CRAWL_FRONTIER_MAX", "100000"))
+CRAWL_SEEN_CAPACITY = int(os.getenv("CRAWL_SEEN_CAPACITY", "1000000"))
+CRAWL_SEEN_ERROR_RATE = float(os.getenv("CRAWL_SEEN_ERROR_RATE", "0.001"))
+# robots.txt: cached per origin; rules for this user-agent token (else "*") apply
+CRAWL_ROBOTS_TTL = float(os.getenv("CRAWL_ROBOTS_TTL", "3600"))
+CRAWL_USER_AGENT = os.getenv("CRAWL_USER_AGENT", "UniversalScraper")
+
+# Local state (caches, stores) lives under this directory
+DATA_DIR = os.getenv("SCRAPER_DATA_DIR", ".scraper_data")
+
+# Job queue (POST /jobs): workers, waiting-job cap, SQLite store, finished-job retention
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "1000"))
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(24 * 3600)))
+# Finished job results kept parsed in memory (LRU) for GET /results/{id}; older ones are
+# reloaded from the job store. Sections per page and per streamed download chunk
+RESULTS_MAX_ENTRIES = int(os.getenv("RESULTS_MAX_ENTRIES", "64"))
+RESULTS_PAGE_MAX = int(os.getenv("RESULTS_PAGE_MAX", "200"))
+RESULTS_STREAM_BATCH = int(os.getenv("RESULTS_STREAM_BATCH", "100"))
+# Seconds between SSE keep-alive comments on idle job event streams
+JOB_EVENTS_KEEPALIVE = float(os.getenv("JOB_EVENTS_KEEPALIVE", "15"))
+
+# Raw HTML archive (input for `python -m app.reextract`): default of options.archiveHtml,
+# directory of daily gzipped JSONL files
+HTML_ARCHIVE = os.getenv("HTML_ARCHIVE", "0") == "1"
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(DATA_DIR, "archive"))
+
+# Section snapshots for diff mode: SQLite store, one row per URL and projection, LRU-capped
+SNAPSHOTS_DB_PATH = os.getenv("SNAPSHOTS_DB_PATH", os.path.join(DATA_DIR, "snapshots.sqlite3"))
+SNAPSHOT_MAX_ENTRIES = int(os.getenv("SNAPSHOT_MAX_ENTRIES", "10000"))
+
+# Browser sessions: Playwright storage state (cookies, localStorage) per host, restored
+# into new contexts (default of options.reuseSession); SQLite store, TTL, LRU-capped
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "1") == "1"
+SESSIONS_DB_PATH = os.getenv("SESSIONS_DB_PATH", os.path.join(DATA_DIR, "sessions.sqlite3"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(24 * 3600)))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "1000"))
+# Larger states (pages stuffing localStorage) are not saved
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(1024 * 1024)))
+
+# Result cache: in-memory LRU in front of SQLite
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_MEMORY_TTL = float(os.getenv("CACHE_MEMORY_TTL", "300"))
+CACHE_MEMORY_MAX_BYTES = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_DISK_TTL = float(os.getenv("CACHE_DISK_TTL", "3600"))
+CACHE_DISK_MAX_ENTRIES = int(os.getenv("CACHE_DISK_MAX_ENTRIES", "10000"))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(DATA_DIR, "cache.sqlite3"))
+
+# Dynamic page waits: "adaptive" (DOM/network quiet detection) or "fixed" sleeps
+WAIT_MODE = os.getenv("WAIT_MODE", "adaptive")
+WAIT_QUIET_WINDOW_MS = int(os.getenv("WAIT_QUIET_WINDOW_MS", "500"))
+WAIT_POLL_INTERVAL_MS = int(os.getenv("WAIT_POLL_INTERVAL_MS", "100"))
+# Navigation, waits, clicks and scrolls of one page must fit in this budget
+PAGE_TIME_BUDGET_MS = int(os.getenv("PAGE_TIME_BUDGET_MS", "45000"))
+
+# Request interception for dynamic scrapes: off | trackers | default | aggressive
+INTERCEPTION_PROFILE = os.getenv("INTERCEPTION_PROFILE", "default")
+
+# Per-domain strategy memory (static first / straight to Playwright / race both)
+STRATEGY_ENABLED = os.getenv("STRATEGY_ENABLED", "1") == "1"
+STRATEGY_MIN_SAMPLES = float(os.getenv("STRATEGY_MIN_SAMPLES", "3"))
+STRATEGY_DYNAMIC_THRESHOLD = float(os.getenv("STRATEGY_DYNAMIC_THRESHOLD", "0.2"))
+STRATEGY_STATIC_THRESHOLD = float(os.getenv("STRATEGY_STATIC_THRESHOLD", "0.6"))
+STRATEGY_HALF_LIFE = float(os.getenv("STRATEGY_HALF_LIFE", str(7 * 24 * 3600)))
+STRATEGY_MAX_WEIGHT = float(os.getenv("STRATEGY_MAX_WEIGHT", "20"))
+STRATEGY_REPROBE_INTERVAL = float(os.getenv("STRATEGY_REPROBE_INTERVAL", "3600"))
+STRATEGY_PATH = os.getenv("STRATEGY_PATH", os.path.join(DATA_DIR, "strategies.json"))
+STRATEGY_MAX_DOMAINS = int(os.getenv("STRATEGY_MAX_DOMAINS", "10000"))
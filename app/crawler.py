@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import math
+import re
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+from app.cache import normalize_url
+from app.config import (
+    CRAWL_FRONTIER_MAX, CRAWL_SEEN_CAPACITY, CRAWL_SEEN_ERROR_RATE, CRAWL_ROBOTS_TTL, CRAWL_USER_AGENT
+)
+from app.extraction import ScraperUtils
+from app.http_client import http_client, read_body
+from app.limits import static_limiter, ConcurrencyLimiter
+from app.models import CrawlPage, CrawlRequest, CrawlSummary, Interactions, Link, ScrapeResult, SECTION_FIELDS
+from app.scraper import UniversalScraper
+from app.singleflight import SingleFlight
+
+# Query parameters that only track the visit; dropped so the same page is seen once
+TRACKING_PARAM = re.compile(r"^(utm_[a-z]+|fbclid|gclid|msclkid|mc_cid|mc_eid|_ga)(=|$)", re.I)
+# Links to files no crawl wants to spend a page on
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".zip", ".gz", ".tar",
+    ".mp3", ".mp4", ".webm", ".avi", ".mov", ".exe", ".dmg", ".css", ".js", ".woff", ".woff2",
+)
+# Pagination without rel="next": "Next"-style anchors, or the number of the following page
+NEXT_LABELS = frozenset((
+    "next", "next page", "next »", "next ›", "next →", "»", "›", "→", "older posts", "older entries",
+))
+PAGE_NUMBER = re.compile(r"(?:[?&](?:page|p|pg)=|/page/)(\d+)", re.I)
+# robots.txt: size read (RFC 9309 minimum), retry time after an unreachable one, Crawl-delay cap
+ROBOTS_MAX_BYTES = 500 * 1024
+ROBOTS_RETRY_TTL = 300.0
+ROBOTS_MAX_DELAY = 60.0
+
+def canonical_url(url: str) -> Optional[str]:
+    # normalize_url plus sorted query parameters without tracking ones; None for
+    # anything that is not an http(s) page
+    parts = urlsplit(url.strip())
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return None
+    if parts.path.lower().endswith(SKIPPED_EXTENSIONS):
+        return None
+    params = sorted(p for p in parts.query.split("&") if p and not TRACKING_PARAM.match(p))
+    return normalize_url(urlunsplit((parts.scheme, parts.netloc, parts.path, "&".join(params), "")))
+
+def pagination_links(result: ScrapeResult, url: str) -> List[str]:
+    # rel="next" first, then anchors that look like a "next page" control
+    found = [result.meta.next] if result.meta.next else []
+    match = PAGE_NUMBER.search(url)
+    next_number = str(int(match.group(1)) + 1 if match else 2)
+    for link in _links(result):
+        label = " ".join(link.text.split()).lower()
+        if label in NEXT_LABELS or (label == next_number and PAGE_NUMBER.search(link.href)):
+            found.append(link.href)
+    return found
+
+def _links(result: ScrapeResult) -> List[Link]:
+    # Flat sections repeat the links of nested ones; the seen-set drops the repeats
+    sections = result.sectionTree if result.sectionTree is not None else result.sections
+    return [link for section in sections for link in section.content.links]
+
+class BloomFilter:
+    """Fixed-size set of strings with no false negatives. Once `capacity` items are in,
+    about `error_rate` of unseen items test as present."""
+
+    def __init__(self, capacity: int = CRAWL_SEEN_CAPACITY, error_rate: float = CRAWL_SEEN_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing over one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        # True if the item was not in the set yet
+        added = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self._bits[p >> 3] & mask:
+                self._bits[p >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+class RobotsCache:
+    """robots.txt rules per origin, fetched once per TTL; concurrent lookups share one fetch."""
+
+    def __init__(self, ttl: float = CRAWL_ROBOTS_TTL, agent: str = CRAWL_USER_AGENT):
+        self.ttl = ttl
+        self.agent = agent
+        self._entries: Dict[str, Tuple[float, RobotFileParser]] = {}
+        self._inflight = SingleFlight()
+        self.fetches = 0
+        self.hits = 0
+
+    @staticmethod
+    def origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    async def rules(self, url: str) -> RobotFileParser:
+        origin = self.origin(url)
+        entry = self._entries.get(origin)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        return await self._inflight.do(origin, lambda: self._fetch(origin))
+
+    def allowed(self, rules: RobotFileParser, url: str) -> bool:
+        return rules.can_fetch(self.agent, url)
+
+    def delay(self, rules: RobotFileParser) -> float:
+        delay = rules.crawl_delay(self.agent)
+        return min(float(delay), ROBOTS_MAX_DELAY) if delay else 0.0
+
+    async def _fetch(self, origin: str) -> RobotFileParser:
+        # RFC 9309: a missing robots.txt (4xx) allows everything; an unreachable one
+        # (5xx, network error) disallows everything until it is retried
+        rules = RobotFileParser(origin + "/robots.txt")
+        ttl = self.ttl
+        self.fetches += 1
+        try:
+            client = await http_client.get_client()
+            async with static_limiter.slot(origin):
+                async with client.stream("GET", rules.url, headers={"User-Agent": self.agent}) as response:
+                    if response.status_code >= 500:
+                        rules.disallow_all = True
+                        ttl = ROBOTS_RETRY_TTL
+                    elif response.status_code >= 400:
+                        rules.allow_all = True
+                    else:
+                        content, _ = await read_body(response, ROBOTS_MAX_BYTES)
+                        rules.parse(content.decode("utf-8", errors="replace").splitlines())
+        except Exception:
+            rules.disallow_all = True
+            ttl = ROBOTS_RETRY_TTL
+        now = time.monotonic()
+        if len(self._entries) >= 10000:
+            self._entries = {o: e for o, e in self._entries.items() if e[0] > now}
+        self._entries[origin] = (now + ttl, rules)
+        return rules
+
+    def stats(self) -> Dict[str, int]:
+        return {"origins": len(self._entries), "fetches": self.fetches, "hits": self.hits}
+
+class HostPoliteness:
+    """Spaces out request starts per host, across all running crawls."""
+
+    def __init__(self):
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, url: str, delay: float):
+        if delay <= 0:
+            return
+        host = ConcurrencyLimiter.host_of(url)
+        now = asyncio.get_running_loop().time()
+        # Reserve the next start time before sleeping, so concurrent callers queue up
+        start = max(now, self._next.get(host, 0.0))
+        self._next[host] = start + delay
+        if len(self._next) >= 10000:
+            self._next = {h: t for h, t in self._next.items() if t > now}
+        if start > now:
+            await asyncio.sleep(start - now)
+
+robots_cache = RobotsCache()
+host_politeness = HostPoliteness()
+
+class Crawler:
+    """One crawl: a depth-ordered frontier, a Bloom filter of seen URLs and the request's
+    limits. run() yields pages as they finish and a CrawlSummary last."""
+
+    def __init__(self, request: CrawlRequest):
+        self.request = request
+        # Links are needed to find the next pages even when the response leaves them out
+        fields = ScraperUtils.section_fields(request.options)
+        self.options = request.options
+        if "links" not in fields:
+            include = [field for field in SECTION_FIELDS if field in fields or field == "links"]
+            self.options = request.options.model_copy(update={"include": include, "exclude": []})
+        self.hosts = {ConcurrencyLimiter.host_of(str(seed)) for seed in request.seeds}
+        self.domains = {host[4:] if host.startswith("www.") else host for host in self.hosts}
+        self.seen = BloomFilter()
+        # (depth, sequence, url, via, parent): breadth-first, discovery order within a depth
+        self._frontier: List[Tuple[int, int, str, str, Optional[str]]] = []
+        self._seq = itertools.count()
+        self.visited: List[str] = []
+        self.interactions = Interactions()
+        self.skipped: Dict[str, int] = {}
+
+    def _skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def in_scope(self, url: str) -> bool:
+        if self.request.scope == "any":
+            return True
+        host = ConcurrencyLimiter.host_of(url)
+        if self.request.scope == "host":
+            return host in self.hosts
+        return any(host == domain or host.endswith("." + domain) for domain in self.domains)
+
+    def _push(self, url: str, depth: int, via: str, parent: Optional[str]):
+        url = canonical_url(url)
+        if url is None or not self.seen.add(url):
+            return
+        if not self.in_scope(url):
+            self._skip("scope")
+        elif len(self._frontier) >= CRAWL_FRONTIER_MAX:
+            self._skip("frontierFull")
+        else:
+            heapq.heappush(self._frontier, (depth, next(self._seq), url, via, parent))
+
+    def _discover(self, page: CrawlPage, url: str):
+        result = page.result
+        if result.meta.canonical:
+            # Other URLs of the same page (tracking variants, aliases) are not visited again
+            canonical = canonical_url(result.meta.canonical)
+            if canonical is not None:
+                self.seen.add(canonical)
+        if self.request.followPagination:
+            for href in pagination_links(result, url):
+                self._push(href, page.depth, "pagination", url)
+        if self.request.followLinks and page.depth < self.request.maxDepth:
+            for link in _links(result):
+                self._push(link.href, page.depth + 1, "link", url)
+
+    async def _visit(self, url: str, depth: int, via: str, parent: Optional[str]) -> Optional[CrawlPage]:
+        delay = self.request.delay
+        if self.request.respectRobots:
+            rules = await robots_cache.rules(url)
+            if not robots_cache.allowed(rules, url):
+                self._skip("robots")
+                return None
+            delay = max(delay, robots_cache.delay(rules))
+        await host_politeness.wait(url, delay)
+        result = await UniversalScraper.scrape(url, self.options)
+        return CrawlPage.model_construct(depth=depth, via=via, parent=parent, result=result)
+
+    async def run(self) -> AsyncIterator[Union[CrawlPage, CrawlSummary]]:
+        for seed in self.request.seeds:
+            self._push(str(seed), 0, "seed", None)
+        pending: Dict[asyncio.Task, str] = {}
+        try:
+            while True:
+                # Robots-skipped pages give their slot back, so maxPages counts scraped pages
+                while (self._frontier and len(pending) < self.request.concurrency
+                       and len(self.visited) + len(pending) < self.request.maxPages):
+                    depth, _, url, via, parent = heapq.heappop(self._frontier)
+                    pending[asyncio.create_task(self._visit(url, depth, via, parent))] = url
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = pending.pop(task)
+                    page = task.result()
+                    if page is None:
+                        continue
+                    self.visited.append(url)
+                    self.interactions.pages.append(url)
+                    self.interactions.clicks.extend(page.result.interactions.clicks)
+                    self.interactions.scrolls += page.result.interactions.scrolls
+                    self._discover(page, url)
+                    yield page
+        finally:
+            # Client went away or the consumer stopped early
+            for task in pending:
+                task.cancel()
+        if self._frontier:
+            self.skipped["maxPages"] = len(self._frontier)
+        yield CrawlSummary(pagesVisited=len(self.visited), interactions=self.interactions, skipped=self.skipped)
@@ -0,0 +1,61 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from app.config import EXTRACT_EXECUTOR, EXTRACT_WORKERS
+
+class CPUExecutor:
+    """Runs CPU-bound work (HTML parsing, section extraction) off the event loop."""
+
+    def __init__(self, kind: str = EXTRACT_EXECUTOR, workers: int = EXTRACT_WORKERS):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown executor kind: {kind!r} (expected 'process' or 'thread')")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self._executor: Optional[Executor] = None
+        self._submitted = 0
+        self._running = 0
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            # spawn: workers must not inherit the event loop, browser or client state
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extract")
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # fn and args must be picklable for the process pool: pass plain strings/bytes
+        # in and out, never soup trees.
+        self.start()
+        loop = asyncio.get_running_loop()
+        self._submitted += 1
+        self._running += 1
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge page); replace the pool for later calls
+            self.stop()
+            raise
+        finally:
+            self._running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "running": self._running,
+            "submitted": self._submitted,
+        }
+
+cpu_executor = CPUExecutor()
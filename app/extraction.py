@@ -0,0 +1,1189 @@
+import hashlib
+import re
+import time
+from itertools import chain
+from pathlib import Path
+from typing import List, Dict, Any, FrozenSet, Optional, Set, Tuple
+from urllib.parse import urljoin
+from pydantic import TypeAdapter
+from bs4 import BeautifulSoup, Tag, NavigableString, CData
+from bs4.builder import HTMLParserTreeBuilder
+from bs4.formatter import HTMLFormatter
+from lxml import etree
+from playwright.async_api import Page
+from app.models import (
+    MetaData, Section, SectionContent, SectionNode, SectionRef, Link, Image, Error,
+    ScrapeOptions, SECTION_FIELDS, PROJECTION_PROFILES
+)
+from app.executor import cpu_executor
+from app.config import (
+    PARSER_BACKEND, PARSE_MAX_NODES, PARSE_MAX_DEPTH, MAX_SECTIONS, MAX_LINKS_PER_SECTION, MAX_IMAGES_PER_SECTION
+)
+from app.metrics import PhaseEntry, PhaseTimer, record, timed, timing
+
+try:
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+# Constants
+MAX_RAW_HTML_LENGTH = 1000
+MIN_TEXT_LENGTH_FOR_SECTION = 1
+NOISE_SELECTORS = [
+    "script", "style", "noscript", "iframe", "svg", 
+    ".cookie-banner", "#cookie-banner", ".popup", ".modal", 
+    "[aria-modal='true']", ".ad", ".advertisement", ".dialog",
+    "#onetrust-banner-sdk"
+]
+SECTION_TAGS = ["header", "nav", "main", "section", "footer", "article", "aside"]
+HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+# Index range fields (see _DocumentIndex._counters): SectionContent lists, and element
+# positions, which tell which candidate encloses which
+CONTENT_FIELDS = (("headings", 1), ("links", 2), ("images", 3), ("lists", 4), ("tables", 6))
+ELEMENT_FIELD = 9
+ALL_FIELDS = frozenset(SECTION_FIELDS)
+# Fields only extracted when requested; text and headings are always needed
+SKIPPABLE_FIELDS = frozenset(("rawHtml", "links", "images", "lists", "tables"))
+# (meta, sections, limit errors) as exchanged with the extraction executor, per section layout
+EXTRACTION_ADAPTERS = {
+    "flat": TypeAdapter(Tuple[MetaData, List[Section], List[Error]]),
+    "tree": TypeAdapter(Tuple[MetaData, List[SectionNode], List[Error]]),
+}
+# Budgets hit while indexing or building sections (index.limits) -> Error message
+LIMIT_MESSAGES = {
+    "nodes": f"DOM node budget reached: only the first {PARSE_MAX_NODES} elements were indexed.",
+    "depth": f"DOM depth budget reached: elements nested deeper than {PARSE_MAX_DEPTH} levels were skipped.",
+    "sections": f"Section limit reached: only the first {MAX_SECTIONS} sections were kept.",
+    "links": f"Link limit reached: sections keep at most {MAX_LINKS_PER_SECTION} links.",
+    "images": f"Image limit reached: sections keep at most {MAX_IMAGES_PER_SECTION} images.",
+}
+# In-page extraction (extractMode="browser"); mirrors bs4's html.parser serialization rules
+EXTRACT_SCRIPT = Path(__file__).with_name("browser_extract.js").read_text(encoding="utf-8")
+_HTML_BUILDER = HTMLParserTreeBuilder()
+
+class ScraperUtils:
+    @staticmethod
+    def section_fields(options: ScrapeOptions) -> FrozenSet[str]:
+        # Projection of a request: include (or the profile's fields) minus exclude
+        fields = options.include if options.include is not None else PROJECTION_PROFILES[options.profile]
+        return frozenset(fields).difference(options.exclude)
+
+    @staticmethod
+    def fingerprint(content: SectionContent) -> str:
+        # Stable across scrapes of unchanged content: ids, rawHtml and labels are left out
+        payload = SectionContent.__pydantic_serializer__.to_json(content)
+        return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+    @staticmethod
+    def clean_text(text: str) -> str:
+        # Replace newlines/tabs with spaces and collapse multiple spaces
+        text = re.sub(r'[\r\n\t]+', ' ', text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    @staticmethod
+    def truncate_html(html: str, max_length: int = MAX_RAW_HTML_LENGTH) -> Tuple[str, bool]:
+        if len(html) <= max_length:
+            return html, False
+        return html[:max_length] + "...", True
+
+    @staticmethod
+    def extract_meta(soup: BeautifulSoup, url: str) -> MetaData:
+        title = None
+        if soup.title:
+            title = soup.title.string 
+        
+        if not title:
+            og_title = soup.find("meta", property="og:title")
+            if og_title:
+                title = og_title.get("content")
+
+        description = None
+        meta_desc = soup.find("meta", attrs={"name": "description"})
+        if meta_desc:
+            description = meta_desc.get("content")
+        
+        language = soup.html.get("lang") if soup.html else None
+        
+        canonical = None
+        link_canonical = soup.find("link", rel="canonical")
+        if link_canonical:
+            canonical = link_canonical.get("href")
+            # Ensure absolute URL
+            canonical = urljoin(url, canonical)
+
+        next_page = None
+        link_next = soup.find("link", rel="next", href=True) or soup.find("a", rel="next", href=True)
+        if link_next:
+            next_page = urljoin(url, link_next.get("href"))
+            
+        return MetaData(
+            title=title,
+            description=description,
+            language=language,
+            canonical=canonical,
+            next=next_page
+        )
+
+    @staticmethod
+    def get_section_type(tag_name: str, class_names: List[str], text_sample: str) -> str:
+        class_str = " ".join(class_names).lower()
+        if tag_name == "nav" or "nav" in class_str:
+            return "nav"
+        if tag_name == "footer" or "footer" in class_str:
+            return "footer"
+        if "hero" in class_str:
+            return "hero"
+        if "faq" in class_str:
+            return "faq"
+        if "price" in class_str or "pricing" in class_str:
+            return "pricing"
+        if tag_name == "ul" or tag_name == "ol":
+            return "list"
+        # Heuristic for grid? maybe later
+        return "section"
+
+    @staticmethod
+    def get_section_label(elem: Tag, text: str, headings: Optional[List[str]] = None) -> str:
+        # 1. Try to find a heading inside (reuse already extracted headings when given)
+        if headings is None:
+            heading = elem.find(["h1", "h2", "h3", "h4", "h5", "h6"])
+            headings = [ScraperUtils.clean_text(heading.get_text(separator=" ", strip=True))] if heading else []
+        return ScraperUtils.label_for(elem.name, elem.get("aria-label"), text, headings)
+
+    @staticmethod
+    def label_for(tag_name: str, aria_label: Optional[str], text: str, headings: List[str]) -> str:
+        # 1. First heading inside the section
+        if headings:
+            return headings[0]
+        
+        # 2. Use aria-label if present
+        if aria_label:
+            return ScraperUtils.clean_text(aria_label)
+            
+        # 3. Heuristic for Nav/Footer based on tag name
+        if tag_name == 'nav':
+            return "Navigation"
+        if tag_name == 'footer':
+            return "Footer"
+
+        # 4. Fallback to first few words
+        # Take up to 10 words, but ensure we don't grab a giant mashed string
+        words = text.split()
+        if words:
+            # Join first 5 words
+            label = " ".join(words[:5])
+            # Cap at 50 chars
+            if len(label) > 50:
+                return label[:47] + "..."
+            return label
+        
+        return "Untitled Section"
+
+    @staticmethod
+    def extract_document(html: str, url: str, parser: str = "lxml", backend: str = PARSER_BACKEND,
+                         layout: str = "flat", fields: FrozenSet[str] = ALL_FIELDS) -> Tuple[bytes, List[PhaseEntry]]:
+        # Runs inside the CPU executor; returns compact JSON instead of a pickled tree,
+        # plus the worker's phase timings (the scrape's timer lives on the event loop)
+        timer = PhaseTimer()
+        with timing(timer):
+            extraction = EXTRACTION_BACKENDS[backend].extract(html, url, parser, layout, fields)
+            with timed("serialization", "encode"):
+                payload = EXTRACTION_ADAPTERS[layout].dump_json(extraction)
+        return payload, timer.phases
+
+    @staticmethod
+    async def extract(html: str, url: str, parser: str = "lxml", backend: str = PARSER_BACKEND,
+                      layout: str = "flat", fields: FrozenSet[str] = ALL_FIELDS) -> Tuple[MetaData, List[Section], List[Error]]:
+        # layout="tree" returns SectionNodes, fields limits what is extracted (see build_sections);
+        # the errors report resource limits that were hit
+        started = time.perf_counter()
+        payload, phases = await cpu_executor.run(ScraperUtils.extract_document, html, url, parser, backend, layout, fields)
+        # Queueing for a worker plus shipping the HTML and the result between processes
+        record("executor_overhead", time.perf_counter() - started - sum(seconds for _, seconds, _ in phases))
+        for phase in phases:
+            record(*phase)
+        with timed("serialization", "decode"):
+            return EXTRACTION_ADAPTERS[layout].validate_json(payload)
+
+    @staticmethod
+    async def extract_in_page(page: Page, url: str, layout: str = "flat",
+                              fields: FrozenSet[str] = ALL_FIELDS) -> Tuple[MetaData, List[Section], List[Error]]:
+        # Runs detection/noise filtering/collection against the live DOM instead of
+        # serializing it with page.content() and reparsing the string
+        with timed("section_extraction", "browser"):
+            payload = await page.evaluate(EXTRACT_SCRIPT, {
+                "noiseSelectors": NOISE_SELECTORS,
+                "sectionTags": SECTION_TAGS,
+                "headingTags": HEADING_TAGS,
+                "contentDivPattern": _DocumentIndex.CONTENT_DIV_CLASS.pattern,
+                "voidTags": sorted(_HTML_BUILDER.empty_element_tags),
+                "multiValuedAttributes": {tag: sorted(attrs) for tag, attrs in _HTML_BUILDER.cdata_list_attributes.items()},
+                "maxRawHtmlLength": MAX_RAW_HTML_LENGTH,
+                "rawHtml": "rawHtml" in fields,
+                "maxNodes": PARSE_MAX_NODES,
+                "maxDepth": PARSE_MAX_DEPTH,
+            })
+            index = _BrowserIndex(payload, url)
+            sections = ScraperUtils.build_sections(index, url, layout, fields)
+            return index.meta(), sections, ScraperUtils.limit_errors(index)
+
+    @staticmethod
+    def parse_sections(soup: BeautifulSoup, base_url: str) -> List[Section]:
+        # One walk over the tree removes noise, finds candidates and indexes
+        # strings/headings/links/images/lists/tables so nested candidates reuse them.
+        return ScraperUtils.build_sections(_DocumentIndex(soup, base_url), base_url)
+
+    @staticmethod
+    def build_sections(index: Any, base_url: str, layout: str = "flat", fields: FrozenSet[str] = ALL_FIELDS) -> List[Section]:
+        # index: _DocumentIndex (BeautifulSoup), _LxmlIndex (lxml tree) or _BrowserIndex (in-page payload).
+        # layout="tree" returns SectionNodes in the same order, holding only their own content.
+        # rawHtml and content lists not in fields stay empty; text and headings are always
+        # extracted (labels, empty-section skipping and the fallback check need them).
+        # Models are built with model_construct: every value already has its final type.
+        sections = []
+        nodes = []
+        
+        # Identify section candidates
+        # We start with semantic tags, then fall back to divs with substantial content if needed.
+        # Add common content wrappers; body/html when there are none
+        candidates = index.candidates()
+
+        seen_ids = set()
+        
+        for idx, elem in enumerate(candidates):
+            if elem is None: continue
+            if len(sections) >= MAX_SECTIONS:
+                index.limits.add("sections")
+                break
+            name = index.name(elem)
+            
+            # Use ID if present, else generate one
+            sec_id = index.attr(elem, "id")
+            if not sec_id:
+                sec_id = f"{name}-{idx}"
+            
+            # Ensure unique ID
+            counter = 1
+            original_sec_id = sec_id
+            while sec_id in seen_ids:
+                sec_id = f"{original_sec_id}-{counter}"
+                counter += 1
+            seen_ids.add(sec_id)
+
+            # Extract content
+            text_content = index.text(elem)
+            if len(text_content) < MIN_TEXT_LENGTH_FOR_SECTION and name != 'img':
+                continue # Skip empty sections
+
+            headings = index.headings(elem)
+
+            if "rawHtml" in fields:
+                raw_html, truncated = ScraperUtils.truncate_html(index.raw_html(elem))
+            else:
+                raw_html, truncated = "", False
+            
+            sec_type = ScraperUtils.get_section_type(name, index.classes(elem), text_content)
+            label = ScraperUtils.label_for(name, index.attr(elem, "aria-label"), text_content, headings)
+
+            if layout == "tree":
+                # Content and children are filled in once every node is known
+                nodes.append(elem)
+                sections.append(SectionNode.model_construct(
+                    id=sec_id,
+                    type=sec_type,
+                    label=label,
+                    sourceUrl=base_url,
+                    content=None,
+                    rawHtml=raw_html,
+                    truncated=truncated
+                ))
+                continue
+
+            content = SectionContent.model_construct(
+                headings=headings,
+                text=text_content,
+                links=ScraperUtils._capped(index, "links", *index._range(elem, 2)) if "links" in fields else [],
+                images=ScraperUtils._capped(index, "images", *index._range(elem, 3)) if "images" in fields else [],
+                lists=index.lists(elem) if "lists" in fields else [],
+                tables=index.tables(elem) if "tables" in fields else []
+            )
+            sections.append(Section.model_construct(
+                id=sec_id,
+                type=sec_type,
+                label=label,
+                sourceUrl=base_url,
+                content=content,
+                rawHtml=raw_html,
+                truncated=truncated,
+                fingerprint=ScraperUtils.fingerprint(content)
+            ))
+
+        if nodes:
+            ScraperUtils._nest(index, nodes, sections, fields)
+        return sections
+
+    @staticmethod
+    def _capped(index: Any, field: str, a: int, b: int) -> List[Any]:
+        # Links/images of one section, at most MAX_LINKS/IMAGES_PER_SECTION of them
+        cap = MAX_LINKS_PER_SECTION if field == "links" else MAX_IMAGES_PER_SECTION
+        if b - a > cap:
+            index.limits.add(field)
+            b = a + cap
+        return getattr(index, field + "_between")(a, b)
+
+    @staticmethod
+    def limit_errors(index: Any) -> List[Error]:
+        return [Error(message=LIMIT_MESSAGES[limit], phase="resource_limit")
+                for limit in LIMIT_MESSAGES if limit in index.limits]
+
+    @staticmethod
+    def _nest(index: Any, elems: List[Any], nodes: List[SectionNode], fields: FrozenSet[str] = ALL_FIELDS):
+        # Parent: the closest enclosing node. Each element's own position comes right
+        # before its descendant range, so walking nodes in document order with a stack
+        # of open ancestors finds it.
+        children: List[List[int]] = [[] for _ in elems]
+        stack: List[int] = []
+        for i in sorted(range(len(elems)), key=lambda i: index._range(elems[i], ELEMENT_FIELD)[0]):
+            position = index._range(elems[i], ELEMENT_FIELD)[0] - 1
+            while stack:
+                a, b = index._range(elems[stack[-1]], ELEMENT_FIELD)
+                if a <= position < b:
+                    break
+                stack.pop()
+            if stack:
+                nodes[i].parentId = nodes[stack[-1]].id
+                children[stack[-1]].append(i)
+            stack.append(i)
+
+        for i, elem in enumerate(elems):
+            kids = children[i]
+            refs = [SectionRef.model_construct(id=nodes[k].id) for k in kids]
+            content = {}
+            # Own text: strings outside the children, joined like the flat text; a
+            # child's text goes in at the length of the own text before it
+            a, b = index._range(elem, 0)
+            pieces = []
+            length = 0
+            for k, ref in enumerate(refs + [None]):
+                end = index._range(elems[kids[k]], 0)[0] if ref is not None else b
+                piece = ScraperUtils.clean_text(" ".join(index.strings_between(a, end)))
+                if piece:
+                    length += len(piece) + (1 if pieces else 0)
+                    pieces.append(piece)
+                if ref is not None:
+                    ref.textAt = length
+                    a = index._range(elems[kids[k]], 0)[1]
+            content["text"] = " ".join(pieces)
+            for field, number in CONTENT_FIELDS:
+                if field not in fields and field != "headings":
+                    content[field] = []
+                    continue
+                between = getattr(index, field + "_between")
+                a, b = index._range(elem, number)
+                values = []
+                for k, ref in enumerate(refs):
+                    ca, cb = index._range(elems[kids[k]], number)
+                    values.extend(between(a, ca))
+                    setattr(ref, field + "At", len(values))
+                    a = cb
+                values.extend(between(a, b))
+                if field in ("links", "images"):
+                    cap = MAX_LINKS_PER_SECTION if field == "links" else MAX_IMAGES_PER_SECTION
+                    if len(values) > cap:
+                        index.limits.add(field)
+                        del values[cap:]
+                content[field] = values
+            nodes[i].content = SectionContent.model_construct(**content)
+            nodes[i].fingerprint = ScraperUtils.fingerprint(nodes[i].content)
+            nodes[i].children = refs
+
+    @staticmethod
+    def flatten_sections(nodes: List[SectionNode]) -> List[Section]:
+        # Rebuilds the flat layout from sectionTree: every section with its children's
+        # content spliced back in at the recorded offsets, in the original order
+        by_id = {node.id: node for node in nodes}
+        flat: Dict[str, SectionContent] = {}
+        for node in nodes:
+            # Depth-first, children before parents, without recursion
+            stack = [(node, False)]
+            while stack:
+                current, expanded = stack.pop()
+                if current.id in flat:
+                    continue
+                if not expanded:
+                    stack.append((current, True))
+                    stack.extend((by_id[ref.id], False) for ref in current.children if ref.id not in flat)
+                    continue
+                own = current.content
+                if not current.children:
+                    flat[current.id] = own
+                    continue
+                texts = []
+                lists = {field: [] for field, _ in CONTENT_FIELDS}
+                text_at = 0
+                at = {field: 0 for field, _ in CONTENT_FIELDS}
+                for ref in current.children:
+                    child = flat[ref.id]
+                    texts.append(own.text[text_at:ref.textAt])
+                    texts.append(child.text)
+                    text_at = ref.textAt
+                    for field, _ in CONTENT_FIELDS:
+                        offset = getattr(ref, field + "At")
+                        lists[field].extend(getattr(own, field)[at[field]:offset])
+                        lists[field].extend(getattr(child, field))
+                        at[field] = offset
+                texts.append(own.text[text_at:])
+                for field, _ in CONTENT_FIELDS:
+                    lists[field].extend(getattr(own, field)[at[field]:])
+                flat[current.id] = SectionContent.model_construct(
+                    text=" ".join(part for part in (t.strip() for t in texts) if part),
+                    **lists
+                )
+        return [
+            Section.model_construct(
+                id=node.id,
+                type=node.type,
+                label=node.label,
+                sourceUrl=node.sourceUrl,
+                content=flat[node.id],
+                rawHtml=node.rawHtml,
+                truncated=node.truncated,
+                fingerprint=ScraperUtils.fingerprint(flat[node.id]) if node.children else node.fingerprint
+            )
+            for node in nodes
+        ]
+
+class _NoiseMatcher:
+    # Compiles the simple selector forms used in NOISE_SELECTORS (tag, .class, #id,
+    # [attr='value']) into set lookups; anything else is left to soup.select().
+    SIMPLE_TAG = re.compile(r"^[a-zA-Z][\w-]*$")
+    SIMPLE_CLASS = re.compile(r"^\.([\w-]+)$")
+    SIMPLE_ID = re.compile(r"^#([\w-]+)$")
+    SIMPLE_ATTR = re.compile(r"""^\[([\w-]+)=(['"])(.*)\2\]$""")
+
+    def __init__(self, selectors: List[str]):
+        self.tags = set()
+        self.classes = set()
+        self.ids = set()
+        self.attrs: List[Tuple[str, str]] = []
+        self.complex: List[str] = []
+        for selector in selectors:
+            selector = selector.strip()
+            m = self.SIMPLE_CLASS.match(selector)
+            if m:
+                self.classes.add(m.group(1))
+                continue
+            m = self.SIMPLE_ID.match(selector)
+            if m:
+                self.ids.add(m.group(1))
+                continue
+            m = self.SIMPLE_ATTR.match(selector)
+            if m:
+                self.attrs.append((m.group(1).lower(), m.group(3)))
+                continue
+            if self.SIMPLE_TAG.match(selector):
+                self.tags.add(selector.lower())
+                continue
+            self.complex.append(selector)
+
+    def matches(self, tag: Tag) -> bool:
+        return self.match(tag.name, tag.attrs)
+
+    def match(self, name: str, attrs: Any) -> bool:
+        if name.lower() in self.tags:
+            return True
+        if self.classes:
+            classes = attrs.get("class")
+            if classes:
+                if isinstance(classes, str):
+                    classes = classes.split()
+                for c in classes:
+                    if c in self.classes:
+                        return True
+        if self.ids and attrs.get("id") in self.ids:
+            return True
+        for name, value in self.attrs:
+            actual = attrs.get(name)
+            if isinstance(actual, list):
+                actual = " ".join(actual)
+            if actual == value:
+                return True
+        return False
+
+class _DocumentIndex:
+    # Single pre-order walk of the document. Every string and every heading, link,
+    # image, list, list item, table, row and cell is recorded once, in document
+    # order; each element keeps the [start, end) ranges of its descendants so any
+    # candidate (however deeply nested) slices its content instead of re-walking.
+    TEXT_TYPES = (NavigableString, CData)
+    CONTENT_DIV_CLASS = re.compile(r"content|main|article|body|entry", re.I)
+    SECTION_NAMES = frozenset(SECTION_TAGS)
+    HEADING_NAMES = frozenset(HEADING_TAGS)
+
+    def __init__(self, soup: BeautifulSoup, base_url: str):
+        self._soup = soup
+        self._setup(base_url)
+
+        matcher = _NoiseMatcher(NOISE_SELECTORS)
+        for selector in matcher.complex:
+            for noise in soup.select(selector):
+                noise.decompose()
+        self._walk(soup, matcher)
+
+    def _setup(self, base_url: str):
+        self.base_url = base_url
+        self.section_candidates: List[Tag] = []
+        self.div_candidates: List[Tag] = []
+
+        self._raw: List[str] = []
+        self._stripped: List[str] = []
+        self._headings: List[Tag] = []
+        self._links: List[Tag] = []
+        self._images: List[Tag] = []
+        self._lists: List[Tag] = []
+        self._items: List[Tag] = []
+        self._tables: List[Tag] = []
+        self._rows: List[Tag] = []
+        self._cells: List[Tag] = []
+        self._elements = 0
+        # Budgets that were hit (see LIMIT_MESSAGES)
+        self.limits: Set[str] = set()
+        self._ranges: Dict[Any, Tuple[int, ...]] = {}
+        self._memo: Dict[Tuple[str, Any], Any] = {}
+
+    @staticmethod
+    def _key(elem: Tag) -> Any:
+        # Tags compare structurally, so they are keyed by identity
+        return id(elem)
+
+    def candidates(self) -> List[Optional[Tag]]:
+        candidates = self.section_candidates + self.div_candidates
+        if not candidates:
+            if self._soup.body:
+                candidates = [self._soup.body]
+            elif self._soup.html:
+                candidates = [self._soup.html]
+        return candidates
+
+    def name(self, elem: Tag) -> str:
+        return elem.name
+
+    def attr(self, elem: Tag, key: str) -> Optional[str]:
+        return elem.get(key)
+
+    def classes(self, elem: Tag) -> List[str]:
+        return elem.get("class", [])
+
+    def raw_html(self, elem: Tag) -> str:
+        # str(elem), but stops once past MAX_RAW_HTML_LENGTH since truncate_html() keeps
+        # nothing after that (a body-level section would serialize the whole document)
+        formatter = elem.formatter_for_name("minimal")
+        pieces = []
+        length = 0
+        # End tags of the elements whose contents are still being written
+        open_tags: List[Tuple[Tag, str]] = []
+        for node in chain((elem,), elem.descendants):
+            while open_tags and open_tags[-1][0] is not node.parent:
+                pieces.append(open_tags.pop()[1])
+                length += len(pieces[-1])
+            if isinstance(node, Tag):
+                start, end = self._tag_markup(node, formatter)
+                pieces.append(start)
+                if end:
+                    open_tags.append((node, end))
+            else:
+                pieces.append(node.output_ready(formatter))
+            length += len(pieces[-1])
+            if length > MAX_RAW_HTML_LENGTH:
+                break
+        else:
+            pieces.extend(end for _, end in reversed(open_tags))
+        return "".join(pieces)[:MAX_RAW_HTML_LENGTH + 1]
+
+    @staticmethod
+    def _tag_markup(tag: Tag, formatter: HTMLFormatter) -> Tuple[str, str]:
+        # (start tag, end tag) as str(tag) writes them: bs4 serializes a childless copy
+        # (void elements have no end tag)
+        shell = Tag(name=tag.name, prefix=tag.prefix, attrs=tag.attrs, can_be_empty_element=tag.is_empty_element)
+        markup = shell.decode(formatter=formatter)
+        if tag.is_empty_element:
+            return markup, ""
+        end = f"</{tag.prefix}:{tag.name}>" if tag.prefix else f"</{tag.name}>"
+        return markup[:-len(end)], end
+
+    def _within_budget(self, depth: int) -> bool:
+        # Elements past the depth or node budget are left out of the index with their
+        # subtrees; the strings around them still count
+        if depth > PARSE_MAX_DEPTH:
+            self.limits.add("depth")
+            return False
+        if self._elements >= PARSE_MAX_NODES:
+            self.limits.add("nodes")
+            return False
+        return True
+
+    def _counters(self) -> Tuple[int, ...]:
+        return (
+            len(self._raw), len(self._headings), len(self._links), len(self._images),
+            len(self._lists), len(self._items), len(self._tables), len(self._rows), len(self._cells),
+            self._elements,
+        )
+
+    def _register(self, elem: Any, name: str):
+        # Records a (non-noise) element in every list it belongs to, in document order
+        self._elements += 1
+        if name in self.SECTION_NAMES:
+            self.section_candidates.append(elem)
+        elif name == "div":
+            if any(self.CONTENT_DIV_CLASS.search(c) for c in self.classes(elem)):
+                self.div_candidates.append(elem)
+        if name in self.HEADING_NAMES:
+            self._headings.append(elem)
+        elif name == "a":
+            if elem.get("href") is not None:
+                self._links.append(elem)
+        elif name == "img":
+            if elem.get("src") is not None:
+                self._images.append(elem)
+        elif name == "ul" or name == "ol":
+            self._lists.append(elem)
+        elif name == "li":
+            self._items.append(elem)
+        elif name == "table":
+            self._tables.append(elem)
+        elif name == "tr":
+            self._rows.append(elem)
+        elif name == "td" or name == "th":
+            self._cells.append(elem)
+
+    def _walk(self, root: Tag, matcher: _NoiseMatcher):
+        stack = [(root, iter(list(root.contents)))]
+        starts = {id(root): self._counters()}
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                self._ranges[id(node)] = starts.pop(id(node)) + self._counters()
+                continue
+            if isinstance(child, Tag):
+                if matcher.matches(child):
+                    child.decompose()
+                    continue
+                if not self._within_budget(len(stack)):
+                    continue
+                self._register(child, child.name)
+                # Ranges cover descendants only, matching find_all() semantics
+                starts[id(child)] = self._counters()
+                stack.append((child, iter(list(child.contents))))
+            elif type(child) in self.TEXT_TYPES:
+                self._raw.append(child)
+                self._stripped.append(child.strip())
+
+    def _range(self, elem: Tag, field: int) -> Tuple[int, int]:
+        r = self._ranges[self._key(elem)]
+        return r[field], r[field + 10]
+
+    def _get_text(self, elem: Tag) -> str:
+        # Equivalent of clean_text(elem.get_text())
+        a, b = self._range(elem, 0)
+        return ScraperUtils.clean_text("".join(self._raw[a:b]))
+
+    def strings_between(self, a: int, b: int) -> List[str]:
+        return [s for s in self._stripped[a:b] if s]
+
+    def text(self, elem: Tag) -> str:
+        # Equivalent of clean_text(elem.get_text(separator=" ", strip=True))
+        key = ("text", self._key(elem))
+        if key not in self._memo:
+            self._memo[key] = ScraperUtils.clean_text(" ".join(self.strings_between(*self._range(elem, 0))))
+        return self._memo[key]
+
+    def headings_between(self, a: int, b: int) -> List[str]:
+        return [self.text(h) for h in self._headings[a:b]]
+
+    def headings(self, elem: Tag) -> List[str]:
+        return self.headings_between(*self._range(elem, 1))
+
+    def _link(self, a: Tag) -> Link:
+        key = ("link", self._key(a))
+        if key not in self._memo:
+            href = urljoin(self.base_url, a.get("href"))
+            self._memo[key] = Link(text=self._get_text(a), href=href)
+        return self._memo[key]
+
+    def links_between(self, a: int, b: int) -> List[Link]:
+        return [self._link(link) for link in self._links[a:b]]
+
+    def links(self, elem: Tag) -> List[Link]:
+        return self.links_between(*self._range(elem, 2))
+
+    def _image(self, img: Tag) -> Image:
+        key = ("image", self._key(img))
+        if key not in self._memo:
+            src = urljoin(self.base_url, img.get("src"))
+            alt = img.get("alt", "")
+            self._memo[key] = Image(src=src, alt=alt)
+        return self._memo[key]
+
+    def images_between(self, a: int, b: int) -> List[Image]:
+        return [self._image(img) for img in self._images[a:b]]
+
+    def images(self, elem: Tag) -> List[Image]:
+        return self.images_between(*self._range(elem, 3))
+
+    def _list_items(self, ul: Tag) -> List[str]:
+        a, b = self._range(ul, 5)
+        return [self.text(li) for li in self._items[a:b]]
+
+    def lists_between(self, a: int, b: int) -> List[List[str]]:
+        lists = []
+        for ul in self._lists[a:b]:
+            items = self._list_items(ul)
+            if items:
+                lists.append(items)
+        return lists
+
+    def lists(self, elem: Tag) -> List[List[str]]:
+        return self.lists_between(*self._range(elem, 4))
+
+    def _row_cells(self, tr: Tag) -> List[str]:
+        key = ("row", self._key(tr))
+        if key not in self._memo:
+            a, b = self._range(tr, 8)
+            self._memo[key] = [self._get_text(td) for td in self._cells[a:b]]
+        return self._memo[key]
+
+    def tables_between(self, a: int, b: int) -> List[Any]:
+        tables = []
+        for table in self._tables[a:b]:
+            ra, rb = self._range(table, 7)
+            tables.append([list(self._row_cells(tr)) for tr in self._rows[ra:rb]])
+        return tables
+
+    def tables(self, elem: Tag) -> List[Any]:
+        return self.tables_between(*self._range(elem, 6))
+
+class _LxmlIndex(_DocumentIndex):
+    # The same index built straight from an lxml HTML tree (no BeautifulSoup objects).
+    # Strings are the ones bs4's lxml builder would create from element text and
+    # tails: ASCII-whitespace-only strings collapse to " " or "\n" outside <pre> and
+    # <textarea>, and strings under rt/rp/script/style/template are skipped. Noise is
+    # skipped rather than removed so neighbouring strings stay separate, as in bs4.
+    STRING_CONTAINERS = frozenset(_HTML_BUILDER.string_containers)
+    PRESERVE_WHITESPACE = frozenset(_HTML_BUILDER.preserve_whitespace_tags)
+    CDATA_CONTAINING = frozenset(HTMLFormatter.REGISTRY["minimal"].cdata_containing_tags)
+    ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+    TITLE = etree.XPath("(//title)[1]")
+    OG_TITLE = etree.XPath("(//meta[@property='og:title'])[1]")
+    DESCRIPTION = etree.XPath("(//meta[@name='description'])[1]")
+    HTML = etree.XPath("(//html)[1]")
+    LINKS_WITH_REL = etree.XPath("//link[@rel]")
+    ANCHORS_WITH_REL = etree.XPath("//a[@rel][@href]")
+
+    def __init__(self, root: Any, base_url: str, html: str = ""):
+        self._root = root
+        self._html_source = html
+        self._setup(base_url)
+        self._body = None
+        self._html = None
+        self._noise = set()
+        self._valueless: Optional[Set[str]] = None
+        self.max_depth = 1
+
+        matcher = _NoiseMatcher(NOISE_SELECTORS)
+        if matcher.complex:
+            if CSSSelector is None:
+                raise RuntimeError("The lxml extraction backend needs the cssselect package for: " + ", ".join(matcher.complex))
+            for selector in matcher.complex:
+                self._noise.update(CSSSelector(selector)(root))
+        self._walk(root, matcher)
+
+    @staticmethod
+    def _key(elem: Any) -> Any:
+        # lxml elements hash by identity; keeping them as keys also keeps their proxies alive
+        return elem
+
+    def candidates(self) -> List[Any]:
+        candidates = self.section_candidates + self.div_candidates
+        if not candidates:
+            if self._body is not None:
+                candidates = [self._body]
+            elif self._html is not None:
+                candidates = [self._html]
+        return candidates
+
+    def name(self, elem: Any) -> str:
+        return elem.tag
+
+    def classes(self, elem: Any) -> List[str]:
+        # bs4 splits multi-valued attributes on whitespace
+        return elem.get("class", "").split()
+
+    def _string(self, text: str, keep: bool) -> str:
+        if not keep and not text.strip(self.ASCII_SPACES):
+            return "\n" if "\n" in text else " "
+        return text
+
+    def _add(self, text: str, keep: bool):
+        text = self._string(text, keep)
+        self._raw.append(text)
+        self._stripped.append(text.strip())
+
+    def _walk(self, root: Any, matcher: _NoiseMatcher):
+        containers = self.STRING_CONTAINERS
+        preserve = self.PRESERVE_WHITESPACE
+        noise = self._noise
+        starts = {}
+
+        # Markup after </html> ends up in sibling trees; walk them all, in order
+        top = list(root.itersiblings(preceding=True))[::-1] + [root] + list(root.itersiblings())
+        stack = [(None, iter(top), False, False)]
+        while stack:
+            node, children, contained, keep = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if node is None:
+                    continue
+                self._ranges[node] = starts.pop(node) + self._counters()
+                if stack[-1][0] is not None and node.tail:
+                    _, _, parent_contained, parent_keep = stack[-1]
+                    if not parent_contained:
+                        self._add(node.tail, parent_keep)
+                continue
+            name = child.tag
+            if not isinstance(name, str) or child in noise or matcher.match(name, child.attrib):
+                # Comments, processing instructions and noise only contribute their tail
+                if isinstance(name, str):
+                    noise.add(child)
+                if child.tail and not contained and node is not None:
+                    self._add(child.tail, keep)
+                continue
+            if not self._within_budget(len(stack)):
+                if child.tail and not contained and node is not None:
+                    self._add(child.tail, keep)
+                continue
+            self._enter(child, name)
+            if len(stack) > self.max_depth:
+                self.max_depth = len(stack)
+            # Ranges cover descendants only, matching find_all() semantics
+            starts[child] = self._counters()
+            child_contained = contained or name in containers
+            child_keep = keep or name in preserve
+            if child.text and not child_contained:
+                self._add(child.text, child_keep)
+            stack.append((child, iter(child), child_contained, child_keep))
+
+    def _enter(self, elem: Any, name: str):
+        if name == "body":
+            if self._body is None:
+                self._body = elem
+        elif name == "html":
+            if self._html is None:
+                self._html = elem
+        self._register(elem, name)
+
+    def _tag_string(self, elem: Any) -> Optional[str]:
+        # Tag.string: the only child's string, recursing through single-child tags
+        contents = []
+        if elem.text:
+            contents.append(self._string(elem.text, elem.tag in self.PRESERVE_WHITESPACE))
+        for child in elem:
+            contents.append(child)
+            if child.tail:
+                contents.append(self._string(child.tail, elem.tag in self.PRESERVE_WHITESPACE))
+        if len(contents) != 1:
+            return None
+        only = contents[0]
+        if isinstance(only, str):
+            return only
+        if isinstance(only.tag, str):
+            return self._tag_string(only)
+        if only.tag is etree.ProcessingInstruction:
+            return only.target + " " + (only.text or "")
+        return only.text
+
+    def meta(self) -> MetaData:
+        # Same lookups as ScraperUtils.extract_meta, as compiled XPath
+        root = self._root
+        title = None
+        found = self.TITLE(root)
+        if found:
+            title = self._tag_string(found[0])
+
+        if not title:
+            found = self.OG_TITLE(root)
+            if found:
+                title = found[0].get("content")
+
+        description = None
+        found = self.DESCRIPTION(root)
+        if found:
+            description = found[0].get("content")
+
+        found = self.HTML(root)
+        language = found[0].get("lang") if found else None
+
+        canonical = None
+        for link in self.LINKS_WITH_REL(root):
+            if "canonical" in link.get("rel").split():
+                canonical = urljoin(self.base_url, link.get("href"))
+                break
+
+        next_page = None
+        for link in self.LINKS_WITH_REL(root) + self.ANCHORS_WITH_REL(root):
+            if "next" in link.get("rel").split() and link.get("href") is not None:
+                next_page = urljoin(self.base_url, link.get("href"))
+                break
+
+        return MetaData(
+            title=title,
+            description=description,
+            language=language,
+            canonical=canonical,
+            next=next_page
+        )
+
+    def raw_html(self, elem: Any) -> str:
+        # Serializes like str(tag) with bs4's minimal formatter, but stops once past
+        # MAX_RAW_HTML_LENGTH since truncate_html() keeps nothing after that
+        out = []
+        budget = [MAX_RAW_HTML_LENGTH + 1]
+        keep = any(a.tag in self.PRESERVE_WHITESPACE for a in elem.iterancestors())
+        self._serialize(elem, keep, out, budget)
+        return "".join(out)[:MAX_RAW_HTML_LENGTH + 1]
+
+    def _emit(self, out: List[str], budget: List[int], text: str):
+        out.append(text)
+        budget[0] -= len(text)
+
+    def _text(self, text: str, keep: bool, parent: str) -> str:
+        text = self._string(text, keep)
+        if parent in self.CDATA_CONTAINING:
+            return text
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+    def _attribute(self, name: str, key: str, value: str) -> str:
+        if value == key and key in LxmlBackend.BOOLEAN_ATTRIBUTES and key in self.valueless():
+            value = ""
+        multi = _HTML_BUILDER.cdata_list_attributes
+        if key in multi.get("*", ()) or key in multi.get(name, ()):
+            value = " ".join(value.split())
+        value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        if '"' in value:
+            if "'" in value:
+                return '"' + value.replace('"', "&quot;") + '"'
+            return "'" + value + "'"
+        return '"' + value + '"'
+
+    def valueless(self) -> Set[str]:
+        # Boolean attributes this document writes without a value (bs4 sees those as
+        # attr=""); libxml2 stores both forms as name="name", so look at the source.
+        # Only needed when such an attribute shows up in a serialized section.
+        if self._valueless is None:
+            self._valueless = set(LxmlBackend.BOOLEAN_ATTRIBUTES)
+            for name, value in LxmlBackend.EXPLICIT_BOOLEAN.findall(self._html_source):
+                if value == name.lower():
+                    self._valueless.discard(value)
+        return self._valueless
+
+    def _serialize(self, elem: Any, keep: bool, out: List[str], budget: List[int]):
+        tag = elem.tag
+        if not isinstance(tag, str):
+            if tag is etree.Comment:
+                self._emit(out, budget, "<!--" + (elem.text or "") + "-->")
+            elif tag is etree.ProcessingInstruction:
+                self._emit(out, budget, "<?" + elem.target + " " + (elem.text or "") + ">")
+            return
+        attrs = "".join(" " + k + "=" + self._attribute(tag, k, v) for k, v in sorted(elem.attrib.items()))
+        if not elem.text and len(elem) == 0 and tag in _HTML_BUILDER.empty_element_tags:
+            self._emit(out, budget, "<" + tag + attrs + "/>")
+            return
+        self._emit(out, budget, "<" + tag + attrs + ">")
+        keep = keep or tag in self.PRESERVE_WHITESPACE
+        if elem.text:
+            self._emit(out, budget, self._text(elem.text, keep, tag))
+        for child in elem:
+            if budget[0] <= 0:
+                return
+            if child not in self._noise:
+                self._serialize(child, keep, out, budget)
+            if child.tail:
+                self._emit(out, budget, self._text(child.tail, keep, tag))
+        self._emit(out, budget, "</" + tag + ">")
+
+class _BrowserIndex:
+    # Same accessors as _DocumentIndex over the JSON returned by EXTRACT_SCRIPT.
+    # Candidates are positions in payload["sections"]; their ranges index the shared
+    # texts/headings/links/images/lists/items/tables/rows arrays. URLs are joined here
+    # (not in the page) so hrefs resolve exactly like the BeautifulSoup path.
+    def __init__(self, payload: Dict[str, Any], base_url: str):
+        self.base_url = base_url
+        self._payload = payload
+        self._sections = payload["sections"]
+        self._links: Dict[int, Link] = {}
+        self._images: Dict[int, Image] = {}
+        self.limits: Set[str] = set(payload.get("limits", ()))
+
+    def meta(self) -> MetaData:
+        meta = self._payload["meta"]
+        canonical = meta["canonical"]
+        return MetaData(
+            title=meta["title"],
+            description=meta["description"],
+            language=meta["language"],
+            canonical=urljoin(self.base_url, canonical[0]) if canonical else None,
+            next=urljoin(self.base_url, meta["next"]) if meta["next"] is not None else None
+        )
+
+    def candidates(self) -> List[int]:
+        return list(range(len(self._sections)))
+
+    def name(self, elem: int) -> str:
+        return self._sections[elem]["tag"]
+
+    def attr(self, elem: int, key: str) -> Optional[str]:
+        if key == "id":
+            return self._sections[elem]["id"]
+        if key == "aria-label":
+            return self._sections[elem]["ariaLabel"]
+        return None
+
+    def classes(self, elem: int) -> List[str]:
+        return self._sections[elem]["classes"]
+
+    def raw_html(self, elem: int) -> str:
+        return self._sections[elem]["rawHtml"]
+
+    def _range(self, elem: int, field: int) -> Tuple[int, int]:
+        start, end = self._sections[elem]["ranges"]
+        return start[field], end[field]
+
+    def strings_between(self, a: int, b: int) -> List[str]:
+        return self._payload["texts"][a:b]
+
+    def text(self, elem: int) -> str:
+        return ScraperUtils.clean_text(" ".join(self.strings_between(*self._range(elem, 0))))
+
+    def headings_between(self, a: int, b: int) -> List[str]:
+        return self._payload["headings"][a:b]
+
+    def headings(self, elem: int) -> List[str]:
+        return self.headings_between(*self._range(elem, 1))
+
+    def links_between(self, a: int, b: int) -> List[Link]:
+        links = []
+        for i in range(a, b):
+            if i not in self._links:
+                text, href = self._payload["links"][i]
+                self._links[i] = Link(text=text, href=urljoin(self.base_url, href))
+            links.append(self._links[i])
+        return links
+
+    def links(self, elem: int) -> List[Link]:
+        return self.links_between(*self._range(elem, 2))
+
+    def images_between(self, a: int, b: int) -> List[Image]:
+        images = []
+        for i in range(a, b):
+            if i not in self._images:
+                src, alt = self._payload["images"][i]
+                self._images[i] = Image(src=urljoin(self.base_url, src), alt=alt)
+            images.append(self._images[i])
+        return images
+
+    def images(self, elem: int) -> List[Image]:
+        return self.images_between(*self._range(elem, 3))
+
+    def lists_between(self, a: int, b: int) -> List[List[str]]:
+        items = self._payload["items"]
+        lists = []
+        for ia, ib in self._payload["lists"][a:b]:
+            if ib > ia:
+                lists.append(items[ia:ib])
+        return lists
+
+    def lists(self, elem: int) -> List[List[str]]:
+        return self.lists_between(*self._range(elem, 4))
+
+    def tables_between(self, a: int, b: int) -> List[Any]:
+        rows = self._payload["rows"]
+        return [[list(row) for row in rows[ra:rb]] for ra, rb in self._payload["tables"][a:b]]
+
+    def tables(self, elem: int) -> List[Any]:
+        return self.tables_between(*self._range(elem, 6))
+
+class SoupBackend:
+    """BeautifulSoup tree over the requested parser ("lxml" or "html.parser")."""
+
+    @staticmethod
+    def extract(html: str, url: str, parser: str, layout: str = "flat",
+                fields: FrozenSet[str] = ALL_FIELDS) -> Tuple[MetaData, List[Section], List[Error]]:
+        with timed("soup_build", parser):
+            soup = BeautifulSoup(html, parser)
+        # Meta first: the indexing walk can change what tag.string returns
+        with timed("meta_extraction"):
+            meta = ScraperUtils.extract_meta(soup, url)
+        with timed("noise_removal_indexing"):
+            # One phase: noise matching complex selectors is decomposed up front, the rest
+            # as the indexing walk reaches it
+            index = _DocumentIndex(soup, url)
+        with timed("section_extraction"):
+            sections = ScraperUtils.build_sections(index, url, layout, fields)
+        return meta, sections, ScraperUtils.limit_errors(index)
+
+class LxmlBackend:
+    """lxml's HTML parser and element tree, walked directly (the parser argument is ignored)."""
+
+    # libxml2 stores these as name="name" when written without a value, where bs4
+    # (fed through lxml's SAX interface) gets ""; see _LxmlIndex.valueless()
+    BOOLEAN_ATTRIBUTES = (
+        "checked", "compact", "declare", "defer", "disabled", "ismap", "multiple",
+        "nohref", "noresize", "noshade", "nowrap", "readonly", "selected",
+    )
+    EXPLICIT_BOOLEAN = re.compile(
+        r"\b(%s)\s*=\s*[\"']?(%s)\b" % ("|".join(BOOLEAN_ATTRIBUTES), "|".join(BOOLEAN_ATTRIBUTES)), re.I
+    )
+    # Tree depth at which libxml2 stops nesting (and drops content); bs4 has no such limit
+    MAX_DEPTH = 2048
+
+    @staticmethod
+    def parse(html: str) -> Optional[Any]:
+        # Same parser BeautifulSoup's lxml builder uses; huge_tree raises the nesting
+        # limit, which its event-based tree building does not hit
+        if html.startswith("\ufeff"):
+            html = html[1:]
+        parser = etree.HTMLParser(recover=True, huge_tree=True)
+        try:
+            parser.feed(html)
+            return parser.close()
+        except etree.ParserError:
+            # Empty document
+            return None
+
+    @staticmethod
+    def extract(html: str, url: str, parser: str, layout: str = "flat",
+                fields: FrozenSet[str] = ALL_FIELDS) -> Tuple[MetaData, List[Section], List[Error]]:
+        with timed("soup_build", "lxml tree"):
+            root = LxmlBackend.parse(html)
+        if root is None:
+            return MetaData(), [], []
+        with timed("noise_removal_indexing"):
+            # Same phase as bs4's, though lxml skips noise instead of removing it
+            index = _LxmlIndex(root, url, html)
+        # Past libxml2's nesting limit content is silently dropped, so a document that
+        # reaches the depth budget may be incomplete too: bs4 builds it in full
+        if index.max_depth >= LxmlBackend.MAX_DEPTH or "depth" in index.limits:
+            return SoupBackend.extract(html, url, "lxml", layout, fields)
+        with timed("meta_extraction"):
+            meta = index.meta()
+        with timed("section_extraction"):
+            sections = ScraperUtils.build_sections(index, url, layout, fields)
+        return meta, sections, ScraperUtils.limit_errors(index)
+
+EXTRACTION_BACKENDS = {
+    "bs4": SoupBackend,
+    "lxml": LxmlBackend,
+}
@@ -0,0 +1,276 @@
+import asyncio
+import ipaddress
+import socket
+import ssl
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import httpx
+import httpcore
+from charset_normalizer import detect
+from app.metrics import record, timed
+from app.config import (
+    HTTP_TIMEOUT, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY, HTTP2_ENABLED, DNS_CACHE_TTL
+)
+
+# Media types the static path parses; a missing Content-Type is given the benefit of the doubt
+PARSEABLE_TYPES = ("application/xhtml+xml", "application/xml", "application/json")
+# Wide encodings legitimately contain NUL bytes
+WIDE_ENCODING_BOMS = (b"\xff\xfe", b"\xfe\xff")
+
+# HTTP/2 needs the optional `h2` package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class _CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    # Resolves hostnames through a TTL cache before connecting. TLS still uses the
+    # original hostname for SNI/verification because httpcore passes it separately.
+    def __init__(self, ttl: float):
+        self._backend = httpcore.AnyIOBackend()
+        self._ttl = ttl
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        key = (host, port)
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        try:
+            with timed("dns", host):
+                infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(str(e)) from e
+        addresses = []
+        for info in infos:
+            address = info[4][0]
+            if address not in addresses:
+                addresses.append(address)
+        self._cache[key] = (time.monotonic() + self._ttl, addresses)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = await self.resolve(host, port)
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                with timed("connect", host):
+                    return await self._backend.connect_tcp(
+                        address, port, timeout=timeout,
+                        local_address=local_address, socket_options=socket_options
+                    )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        # Every cached address failed: forget them so the next attempt re-resolves
+        self._cache.pop((host, port), None)
+        raise last_error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+class _DNSCachingTransport(httpx.AsyncHTTPTransport):
+    # httpx.AsyncHTTPTransport whose connection pool resolves through the caching backend.
+    # Takes the base transport's settings except proxy: no proxies (and so no
+    # trust_env proxy variables) are supported on this client. The base __init__ is
+    # not called since it would only build a second pool; request handling just uses
+    # self._pool.
+    def __init__(
+        self,
+        resolver: _CachingNetworkBackend,
+        verify: Union[ssl.SSLContext, str, bool] = True,
+        cert: Optional[Any] = None,
+        trust_env: bool = True,
+        http1: bool = True,
+        http2: bool = False,
+        limits: httpx.Limits = httpx.Limits(),
+        uds: Optional[str] = None,
+        local_address: Optional[str] = None,
+        retries: int = 0,
+        socket_options: Optional[Iterable[Any]] = None,
+    ):
+        self._pool = httpcore.AsyncConnectionPool(
+            # trust_env here only means SSL_CERT_FILE / SSL_CERT_DIR
+            ssl_context=httpx.create_ssl_context(verify=verify, cert=cert, trust_env=trust_env),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=http1,
+            http2=http2,
+            uds=uds,
+            local_address=local_address,
+            retries=retries,
+            socket_options=socket_options,
+            network_backend=resolver,
+        )
+
+class PhaseTrace:
+    """httpcore trace hook (request extension "trace") recording TLS, TTFB and download time.
+
+    DNS and TCP connect are timed by _CachingNetworkBackend. Each redirect hop adds its
+    own entries; reused keep-alive connections record no connect or TLS time.
+    """
+
+    # event name without the "http11."/"http2." prefix -> phase
+    PHASES = {
+        "connection.start_tls": "tls",
+        "receive_response_body": "download",
+    }
+
+    def __init__(self):
+        self._started: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Dict[str, object]):
+        name, _, state = event_name.rpartition(".")
+        if not name.startswith("connection."):
+            name = name.partition(".")[2]
+        now = time.perf_counter()
+        if name == "send_request_headers" and state == "started":
+            # Time to first byte: request sent until the response headers are in
+            self._started["ttfb"] = now
+        elif name == "receive_response_headers" and state == "complete" and "ttfb" in self._started:
+            record("ttfb", now - self._started.pop("ttfb"))
+        elif name in self.PHASES:
+            if state == "started":
+                self._started[name] = now
+            elif name in self._started:
+                record(self.PHASES[name], now - self._started.pop(name))
+
+class SharedHttpClient:
+    """App-wide httpx.AsyncClient: keep-alive connection pools per origin, optional HTTP/2, DNS cache."""
+
+    def __init__(
+        self,
+        timeout: float = HTTP_TIMEOUT,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = HTTP2_ENABLED,
+        dns_cache_ttl: float = DNS_CACHE_TTL,
+    ):
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.dns_cache_ttl = dns_cache_ttl
+        self._client: Optional[httpx.AsyncClient] = None
+        self._resolver: Optional[_CachingNetworkBackend] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return
+        self._loop = loop
+        self._resolver = _CachingNetworkBackend(self.dns_cache_ttl)
+        self._client = httpx.AsyncClient(
+            transport=_DNSCachingTransport(self._resolver, limits=self.limits, http2=self.http2),
+            timeout=self.timeout,
+            follow_redirects=True,
+        )
+
+    async def stop(self):
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+
+    async def get_client(self) -> httpx.AsyncClient:
+        # Lazily started for scripts that don't run the FastAPI lifespan
+        if self._client is None or self._loop is not asyncio.get_running_loop():
+            await self.start()
+        return self._client
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "http2": self.http2,
+            "maxConnections": self.limits.max_connections,
+            "maxKeepaliveConnections": self.limits.max_keepalive_connections,
+            "dnsCacheHits": self._resolver.hits if self._resolver else 0,
+            "dnsCacheMisses": self._resolver.misses if self._resolver else 0,
+        }
+
+def unsupported_content_type(response: httpx.Response) -> Optional[str]:
+    # The media type when the headers already say the body is not a document (image, PDF, archive)
+    media_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+    if not media_type or media_type.startswith("text/") or media_type in PARSEABLE_TYPES:
+        return None
+    if media_type.endswith("+xml") or media_type.endswith("+json"):
+        return None
+    return media_type
+
+def looks_binary(response: httpx.Response, content: bytes) -> bool:
+    # Binary bodies served under a text type: NUL bytes early on, unless the text is UTF-16/32
+    head = content[:1024]
+    if b"\x00" not in head or head.startswith(WIDE_ENCODING_BOMS):
+        return False
+    encoding = (response.charset_encoding or "").lower().replace("-", "")
+    return not encoding.startswith(("utf16", "utf32"))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After as seconds from now: delta-seconds or an HTTP date; None when absent or invalid
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None or when.tzinfo is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+async def read_body(response: httpx.Response, max_bytes: int) -> Tuple[bytes, bool]:
+    # Streams a response opened with client.stream(); stops at max_bytes (after content
+    # decoding) and returns the prefix read so far and whether the body was cut off
+    chunks: List[bytes] = []
+    size = 0
+    async for chunk in response.aiter_bytes():
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            return b"".join(chunks)[:max_bytes], True
+    return b"".join(chunks), False
+
+def decode_html(response: httpx.Response, content: Optional[bytes] = None) -> str:
+    with timed("encoding_detection"):
+        return _decode_html(response, response.content if content is None else content)
+
+def _decode_html(response: httpx.Response, content: bytes) -> str:
+    # Same rules the static path had with `requests`: a declared charset wins, except a
+    # missing one or the ISO-8859-1 default, which are replaced by the sniffed encoding
+    # (fixes mojibake on pages that don't declare their charset properly).
+    if not content:
+        return ""
+    encoding = response.charset_encoding
+    if encoding is None and "application/json" in response.headers.get("content-type", ""):
+        encoding = "utf-8"
+    if encoding is None or encoding == "ISO-8859-1":
+        encoding = detect(content)["encoding"]
+    try:
+        return str(content, encoding, errors="replace")
+    except (LookupError, TypeError):
+        return str(content, errors="replace")
+
+http_client = SharedHttpClient()
@@ -0,0 +1,103 @@
+from typing import Dict, FrozenSet, Optional
+from urllib.parse import urlparse
+from playwright.async_api import Page, Route, Request, Response
+from app.models import ResourceStats
+
+# Ad, analytics and tag-manager hosts (subdomains included)
+BLOCKED_DOMAINS = frozenset([
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com", "analytics.google.com",
+    "facebook.net", "connect.facebook.net", "ads-twitter.com", "analytics.twitter.com", "static.ads-twitter.com",
+    "bat.bing.com", "clarity.ms", "hotjar.com", "hotjar.io", "mouseflow.com", "fullstory.com",
+    "segment.com", "segment.io", "mixpanel.com", "amplitude.com", "heap.io", "heapanalytics.com",
+    "newrelic.com", "nr-data.net", "scorecardresearch.com", "quantserve.com", "chartbeat.com", "chartbeat.net",
+    "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "adnxs.com", "rubiconproject.com",
+    "pubmatic.com", "openx.net", "casalemedia.com", "amazon-adsystem.com", "moatads.com",
+    "adsrvr.org", "demdex.net", "omtrdc.net", "everesttech.net", "krxd.net", "bluekai.com",
+    "yandex.ru/metrika", "mc.yandex.ru", "analytics.tiktok.com",
+    "snap.licdn.com", "px.ads.linkedin.com", "sc-static.net", "pinimg.com/ct", "ct.pinterest.com",
+    "optimizely.com", "cdn.optimizely.com", "branch.io", "app.link",
+])
+
+# Rough transfer sizes per resource type, used to estimate bytes saved by aborted requests
+AVERAGE_BYTES = {
+    "image": 50_000, "media": 500_000, "font": 40_000, "stylesheet": 30_000,
+    "script": 40_000, "xhr": 5_000, "fetch": 5_000, "other": 5_000,
+}
+
+class InterceptionProfile:
+    def __init__(self, name: str, resource_types: FrozenSet[str], block_trackers: bool):
+        self.name = name
+        self.resource_types = resource_types
+        self.block_trackers = block_trackers
+
+    @property
+    def active(self) -> bool:
+        return bool(self.resource_types) or self.block_trackers
+
+    def block_reason(self, request: Request) -> Optional[str]:
+        # The page itself (and frames) always loads
+        if request.resource_type == "document":
+            return None
+        if request.resource_type in self.resource_types:
+            return "type"
+        if self.block_trackers and is_tracker(request.url):
+            return "tracker"
+        return None
+
+PROFILES: Dict[str, InterceptionProfile] = {
+    "off": InterceptionProfile("off", frozenset(), False),
+    "trackers": InterceptionProfile("trackers", frozenset(), True),
+    # We only keep DOM text, links and img src attributes, so the bytes aren't needed
+    "default": InterceptionProfile("default", frozenset({"image", "media", "font"}), True),
+    # Also drops CSS: fastest, but visibility checks and lazy layouts may behave differently
+    "aggressive": InterceptionProfile("aggressive", frozenset({"image", "media", "font", "stylesheet"}), True),
+}
+
+def is_tracker(url: str) -> bool:
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    labels = host.split(".")
+    for i in range(len(labels) - 1):
+        if ".".join(labels[i:]) in BLOCKED_DOMAINS:
+            return True
+    # A few entries are host + path prefix
+    first_segment = parsed.path.strip("/").split("/")[0]
+    if first_segment and f"{host}/{first_segment}" in BLOCKED_DOMAINS:
+        return True
+    return False
+
+class RequestInterceptor:
+    """Applies an interception profile to a page via page.route and counts what it saved."""
+
+    def __init__(self, profile_name: str):
+        self.profile = PROFILES.get(profile_name, PROFILES["default"])
+        self.stats = ResourceStats(profile=self.profile.name)
+
+    async def install(self, page: Page):
+        page.on("request", self._on_request)
+        page.on("response", self._on_response)
+        if self.profile.active:
+            await page.route("**/*", self._handle)
+
+    def _on_request(self, request: Request):
+        self.stats.requests += 1
+
+    def _on_response(self, response: Response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.stats.bytesDownloaded += int(length)
+
+    async def _handle(self, route: Route):
+        request = route.request
+        reason = self.profile.block_reason(request)
+        if reason is None:
+            await route.continue_()
+            return
+        self.stats.blockedRequests += 1
+        if reason == "tracker":
+            self.stats.blockedTrackers += 1
+        resource_type = request.resource_type
+        self.stats.blockedByType[resource_type] = self.stats.blockedByType.get(resource_type, 0) + 1
+        self.stats.estimatedBytesSaved += AVERAGE_BYTES.get(resource_type, AVERAGE_BYTES["other"])
+        await route.abort("blockedbyclient")
@@ -0,0 +1,344 @@
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from app.config import JOB_WORKERS, JOB_QUEUE_MAX, JOBS_DB_PATH, JOB_RETENTION, JOB_EVENTS_KEEPALIVE
+from app.metrics import reporting
+from app.models import Job, JobRequest, ScrapeOptions, ScrapeResult
+from app.results import result_store
+from app.scraper import UniversalScraper
+
+# Phase events kept per running job so late subscribers can catch up
+MAX_EVENT_HISTORY = 200
+
+class QueueFull(Exception):
+    """The queue already holds JOB_QUEUE_MAX waiting jobs."""
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+class _JobStore:
+    COLUMNS = ("id", "url", "options", "priority", "status", "created_at",
+               "started_at", "finished_at", "error", "result", "updated_at")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, url TEXT, options TEXT, priority INTEGER, status TEXT, "
+                "created_at TEXT, started_at TEXT, finished_at TEXT, error TEXT, result BLOB, updated_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, updated_at)")
+        return self._conn
+
+    @staticmethod
+    def _job(row: tuple) -> Job:
+        fields = dict(zip(_JobStore.COLUMNS, row))
+        return Job(
+            id=fields["id"],
+            url=fields["url"],
+            options=ScrapeOptions.model_validate_json(fields["options"]),
+            priority=fields["priority"],
+            status=fields["status"],
+            createdAt=fields["created_at"],
+            startedAt=fields["started_at"],
+            finishedAt=fields["finished_at"],
+            error=fields["error"],
+            result=ScrapeResult.model_validate_json(fields["result"]) if fields["result"] else None,
+        )
+
+    def save(self, job: Job):
+        result = job.result.model_dump_json().encode() if job.result is not None else None
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                (job.id, job.url, job.options.model_dump_json(), job.priority, job.status, job.createdAt,
+                 job.startedAt, job.finishedAt, job.error, result, time.time())
+            )
+            conn.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def unfinished(self) -> List[Job]:
+        # Queued jobs plus jobs that were running when the process stopped
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE status IN ('queued', 'running') "
+                "ORDER BY priority DESC, created_at"
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND updated_at < ?",
+                (older_than,)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class _ActiveJob:
+    def __init__(self, job: Job):
+        self.job = job
+        self.task: Optional[asyncio.Task] = None
+        self.history: List[Dict[str, Any]] = []
+        self.subscribers: Set[asyncio.Queue] = set()
+
+class JobQueue:
+    """Persistent priority queue of scrape jobs worked off by a bounded pool of workers."""
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_QUEUE_MAX,
+        db_path: str = JOBS_DB_PATH,
+        retention: float = JOB_RETENTION,
+        keepalive: float = JOB_EVENTS_KEEPALIVE,
+    ):
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.retention = retention
+        self.keepalive = keepalive
+        self._store = _JobStore(db_path)
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._seq = itertools.count()
+        # Queued and running jobs; finished ones live only in the store
+        self._active: Dict[str, _ActiveJob] = {}
+        self._workers: List[asyncio.Task] = []
+        self._stopping = False
+        self._finished_since_purge = 0
+        self.counters: Dict[str, int] = {
+            "submitted": 0, "rejected": 0, "restored": 0,
+            "done": 0, "failed": 0, "cancelled": 0,
+        }
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for active in self._active.values() if active.job.status == "queued")
+
+    async def start(self):
+        if self._workers:
+            return
+        self._stopping = False
+        self._queue = asyncio.PriorityQueue()
+        await self._purge()
+        # Work left over from the previous run: interrupted jobs start over
+        for job in await asyncio.to_thread(self._store.unfinished):
+            job.status, job.startedAt, job.phase = "queued", None, None
+            self._enqueue(_ActiveJob(job))
+            self.counters["restored"] += 1
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # Running jobs stay "running" in the store and are requeued on the next start
+        self._stopping = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._active.clear()
+        self._store.close()
+
+    def _enqueue(self, active: _ActiveJob):
+        self._active[active.job.id] = active
+        self._queue.put_nowait((-active.job.priority, next(self._seq), active.job.id))
+
+    async def submit(self, request: JobRequest) -> Job:
+        # Started lazily for scripts that don't run the FastAPI lifespan
+        if not self._workers:
+            await self.start()
+        if self.queued >= self.max_queued:
+            self.counters["rejected"] += 1
+            raise QueueFull(f"Job queue is full ({self.max_queued} jobs waiting)")
+        job = Job(
+            id=uuid.uuid4().hex,
+            url=str(request.url),
+            options=request.options,
+            priority=request.priority,
+            createdAt=_now(),
+        )
+        await asyncio.to_thread(self._store.save, job)
+        self._enqueue(_ActiveJob(job))
+        self.counters["submitted"] += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        active = self._active.get(job_id)
+        if active is not None:
+            return active.job
+        return await asyncio.to_thread(self._store.get, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        active = self._active.get(job_id)
+        if active is None:
+            return await asyncio.to_thread(self._store.get, job_id)
+        if active.task is not None:
+            # Running: _run records the cancellation
+            active.task.cancel()
+            await asyncio.wait([active.task])
+        else:
+            # Still waiting: the worker skips it when it comes up
+            await self._finish(active, "cancelled")
+        return await self.get(job_id)
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            active = self._active.get(job_id)
+            if active is None or active.job.status != "queued":
+                continue
+            active.task = asyncio.create_task(self._run(active))
+            try:
+                await asyncio.wait([active.task])
+            finally:
+                if not active.task.done():
+                    # Worker stopped (shutdown): stop the job too
+                    active.task.cancel()
+
+    async def _run(self, active: _ActiveJob):
+        job = active.job
+        job.status, job.startedAt = "running", _now()
+        await self._save(job)
+        self._publish(active, "status", self._summary(job))
+
+        def on_phase(phase: str, state: str, detail: Optional[str], seconds: Optional[float]):
+            if state == "started":
+                job.phase = phase
+            self._publish(active, "phase", {
+                "phase": phase,
+                "state": state,
+                "detail": detail,
+                "ms": round(1000 * seconds, 3) if seconds is not None else None,
+            })
+
+        try:
+            with reporting(on_phase):
+                result = await UniversalScraper.scrape(job.url, job.options)
+        except asyncio.CancelledError:
+            if self._stopping:
+                raise
+            await self._finish(active, "cancelled")
+        except Exception as e:
+            traceback.print_exc()
+            await self._finish(active, "failed", error=f"{type(e).__name__}: {e}")
+        else:
+            await self._finish(active, "done", result=result)
+
+    async def _finish(self, active: _ActiveJob, status: str, result: Optional[ScrapeResult] = None,
+                      error: Optional[str] = None):
+        job = active.job
+        job.status, job.finishedAt, job.result, job.error = status, _now(), result, error
+        self.counters[status] += 1
+        if result is not None:
+            # Paged access through GET /results/{id} without reloading it from the store
+            result_store.put(job.id, result, job.options)
+        await self._save(job)
+        self._active.pop(job.id, None)
+        self._finished_since_purge += 1
+        if self._finished_since_purge >= 100:
+            self._finished_since_purge = 0
+            await self._purge()
+        self._publish(active, "status", self._summary(job))
+        for queue in active.subscribers:
+            queue.put_nowait(None)
+
+    async def _save(self, job: Job):
+        # A failing store must not take the worker down; the job still completes in memory
+        try:
+            await asyncio.to_thread(self._store.save, job)
+        except sqlite3.Error:
+            traceback.print_exc()
+
+    async def _purge(self):
+        # Finished jobs are kept for `retention` seconds
+        try:
+            await asyncio.to_thread(self._store.purge, time.time() - self.retention)
+        except sqlite3.Error:
+            traceback.print_exc()
+
+    @staticmethod
+    def _summary(job: Job) -> Dict[str, Any]:
+        # Status events leave the result out; GET /jobs/{id} returns it
+        return job.model_dump(exclude={"result", "options"})
+
+    def _publish(self, active: _ActiveJob, event: str, data: Dict[str, Any]):
+        message = {"event": event, "data": data}
+        if event == "phase":
+            active.history.append(message)
+            del active.history[:-MAX_EVENT_HISTORY]
+        for queue in active.subscribers:
+            queue.put_nowait(message)
+
+    async def events(self, job_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        # Current status, the phases seen so far, then live events until the job finishes.
+        # None marks an idle keepalive interval.
+        active = self._active.get(job_id)
+        if active is None:
+            job = await asyncio.to_thread(self._store.get, job_id)
+            if job is not None:
+                yield {"event": "status", "data": self._summary(job)}
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        active.subscribers.add(queue)
+        backlog = [{"event": "status", "data": self._summary(active.job)}] + list(active.history)
+        try:
+            for message in backlog:
+                yield message
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            active.subscribers.discard(queue)
+
+    async def sse(self, job_id: str) -> AsyncIterator[str]:
+        # text/event-stream framing; comments keep idle connections open behind proxies
+        async for message in self.events(job_id):
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": self.queued,
+            "running": sum(1 for active in self._active.values() if active.job.status == "running"),
+            "maxQueued": self.max_queued,
+            **self.counters,
+        }
+
+job_queue = JobQueue()
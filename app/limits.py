@@ -0,0 +1,322 @@
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, List, Optional
+from urllib.parse import urlparse
+from app.config import (
+    STATIC_CONCURRENCY, STATIC_PER_HOST_CONCURRENCY,
+    DYNAMIC_CONCURRENCY, DYNAMIC_PER_HOST_CONCURRENCY,
+    HOST_LIMITER_ENABLED, HOST_RATE_LIMIT, HOST_RATE_MIN, HOST_CONCURRENCY_MAX, HOST_LATENCY_FACTOR,
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+)
+from app.metrics import Counter, Gauge
+
+# Responses that mean "slow down"; the retryable ones add gateway failures
+THROTTLE_STATUSES = frozenset((429, 503))
+RETRY_STATUSES = frozenset((429, 502, 503, 504))
+# Multiplicative decrease: halved on throttling or errors, trimmed on slow responses
+DECREASE_ON_FAILURE = 0.5
+DECREASE_ON_SLOW = 0.9
+# Weight of the newest response in a host's average latency
+LATENCY_ALPHA = 0.2
+# Idle hosts whose state is forgotten (seconds), and how often that is checked
+HOST_STATE_TTL = 600.0
+PRUNE_INTERVAL = 60.0
+
+class _HostSlot:
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+class ConcurrencyLimiter:
+    """Global plus per-host concurrency cap for one kind of fetch (static or dynamic)."""
+
+    def __init__(self, name: str, global_limit: int, per_host_limit: int):
+        self.name = name
+        self.global_limit = max(1, global_limit)
+        self.per_host_limit = max(1, per_host_limit)
+        # Created by _bind_loop() on first use
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, _HostSlot] = {}
+        self._active = 0
+        self._waiting = 0
+
+    def _bind_loop(self):
+        # Semaphores belong to the loop that first waits on them; the module-level
+        # limiters outlive it (scripts calling asyncio.run() repeatedly), so each new
+        # loop starts with fresh ones, as in browser_pool
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.global_limit)
+            self._hosts = {}
+            self._active = 0
+            self._waiting = 0
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        self._bind_loop()
+        host = self.host_of(url)
+        host_slot = self._hosts.get(host)
+        if host_slot is None:
+            host_slot = self._hosts[host] = _HostSlot(self.per_host_limit)
+        host_slot.users += 1
+        self._waiting += 1
+        acquired = False
+        try:
+            # Per-host first so a single busy host can't hold global slots while queued
+            async with host_slot.semaphore:
+                async with self._global:
+                    self._waiting -= 1
+                    acquired = True
+                    self._active += 1
+                    try:
+                        yield
+                    finally:
+                        self._active -= 1
+        finally:
+            if not acquired:
+                self._waiting -= 1
+            host_slot.users -= 1
+            if host_slot.users == 0:
+                self._hosts.pop(host, None)
+
+    def stats(self) -> Dict[str, Any]:
+        busiest: List[Dict[str, Any]] = sorted(
+            ({"host": h, "users": s.users} for h, s in self._hosts.items()),
+            key=lambda x: -x["users"]
+        )[:10]
+        return {
+            "globalLimit": self.global_limit,
+            "perHostLimit": self.per_host_limit,
+            "active": self._active,
+            "waiting": self._waiting,
+            "hosts": len(self._hosts),
+            "busiestHosts": busiest,
+        }
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+    # Seconds to wait before retry number `attempt` (1-based), None to give up: the
+    # server's Retry-After when it sent one, else exponential backoff with equal jitter
+    if attempt >= RETRY_MAX_ATTEMPTS:
+        return None
+    if retry_after is not None:
+        if retry_after > RETRY_MAX_DELAY:
+            return None
+        # A little jitter so clients told the same time don't return in lockstep
+        return retry_after + random.uniform(0, RETRY_BASE_DELAY)
+    ceiling = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+class HostThrottled(Exception):
+    """The host's Retry-After pause runs longer than a request is worth waiting."""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Rate limited by {host}: it asked for no requests during the next {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+class _HostRate:
+    def __init__(self, now: float, rate: float, limit: float):
+        # Token bucket: `rate` tokens per second, at most one second's worth stored
+        self.rate = rate
+        self.tokens = rate
+        self.refilled = now
+        # AIMD concurrency limit; requests wait while `active` has reached it
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        # Retry-After: no request starts before this time
+        self.blocked_until = 0.0
+        self.latency: Optional[float] = None
+        self.last_decrease = 0.0
+        self.last_used = now
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        # Replaced on every release or limit change; waiters wake up and re-check
+        self.changed = asyncio.Event()
+
+    def refill(self, now: float):
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+    def notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+class HostPermit:
+    """One admitted request; observe() reports how the host answered it."""
+
+    def __init__(self, limiter: "HostRateLimiter", state: Optional[_HostRate], started: float):
+        self._limiter = limiter
+        self._state = state
+        self._started = started
+
+    def observe(self, status: Optional[int], retry_after: Optional[float] = None, timed: bool = True):
+        # status None: the request failed without a response. timed=False for browser
+        # navigations, whose duration says nothing about the server's load
+        if self._state is not None:
+            self._limiter._observe(self._state, status, retry_after, self._started if timed else None)
+
+class HostRateLimiter:
+    """Adaptive per-host limit shared by static and browser fetches: a token bucket
+    spacing request starts plus a concurrency limit, both adjusted by AIMD from
+    throttling, errors and latency. Retry-After pauses the whole host."""
+
+    def __init__(self, enabled: bool = HOST_LIMITER_ENABLED, rate: float = HOST_RATE_LIMIT,
+                 min_rate: float = HOST_RATE_MIN, max_concurrency: int = HOST_CONCURRENCY_MAX):
+        self.enabled = enabled
+        self.max_rate = max(min_rate, rate)
+        self.min_rate = min_rate
+        self.max_concurrency = max(1, max_concurrency)
+        self._hosts: Dict[str, _HostRate] = {}
+        self._last_prune = 0.0
+
+    def _state(self, host: str, now: float) -> _HostRate:
+        state = self._hosts.get(host)
+        if state is None:
+            # Optimistic start: limits only come down once the host pushes back
+            state = self._hosts[host] = _HostRate(now, self.max_rate, float(self.max_concurrency))
+        state.last_used = now
+        return state
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[HostPermit]:
+        loop = asyncio.get_running_loop()
+        if not self.enabled:
+            yield HostPermit(self, None, loop.time())
+            return
+        host = ConcurrencyLimiter.host_of(url)
+        state = self._state(host, loop.time())
+        if state.blocked_until - loop.time() > RETRY_MAX_DELAY:
+            raise HostThrottled(host, state.blocked_until - loop.time())
+        state.waiting += 1
+        try:
+            while True:
+                now = loop.time()
+                wait: Optional[float] = state.blocked_until - now
+                if wait <= 0:
+                    state.refill(now)
+                    if state.active >= int(state.limit):
+                        wait = None  # until a request finishes
+                    elif state.tokens >= 1:
+                        break
+                    else:
+                        wait = (1 - state.tokens) / state.rate
+                try:
+                    await asyncio.wait_for(state.changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            state.waiting -= 1
+        state.tokens -= 1
+        state.active += 1
+        state.requests += 1
+        try:
+            yield HostPermit(self, state, loop.time())
+        finally:
+            state.active -= 1
+            state.last_used = loop.time()
+            state.notify()
+            self._prune(state.last_used)
+
+    def _observe(self, state: _HostRate, status: Optional[int], retry_after: Optional[float],
+                 started: Optional[float]):
+        now = asyncio.get_running_loop().time()
+        if status in THROTTLE_STATUSES:
+            state.throttled += 1
+            if retry_after is not None:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+            self._decrease(state, now, DECREASE_ON_FAILURE)
+        elif status is None or status >= 500:
+            state.errors += 1
+            self._decrease(state, now, DECREASE_ON_FAILURE)
+        elif started is None:
+            self._increase(state)
+        else:
+            seconds = now - started
+            if state.latency is not None and seconds > HOST_LATENCY_FACTOR * state.latency:
+                self._decrease(state, now, DECREASE_ON_SLOW)
+            else:
+                self._increase(state)
+            state.latency = seconds if state.latency is None else (
+                LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * state.latency)
+
+    def _decrease(self, state: _HostRate, now: float, factor: float):
+        # Requests already in flight when the host pushed back report the same
+        # congestion; one decrease per round trip (at least a second)
+        if now - state.last_decrease < max(1.0, state.latency or 0.0):
+            return
+        state.last_decrease = now
+        state.limit = max(1.0, state.limit * factor)
+        state.rate = max(self.min_rate, state.rate * factor)
+        state.tokens = min(state.tokens, 1.0)
+
+    def _increase(self, state: _HostRate):
+        # Additive increase: about +1 concurrent request per window of `limit` successes,
+        # and +1 request/second per second's worth of successes
+        state.limit = min(float(self.max_concurrency), state.limit + 1 / state.limit)
+        state.rate = min(self.max_rate, state.rate + 1 / state.rate)
+        state.notify()
+
+    def _prune(self, now: float):
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        for host, state in list(self._hosts.items()):
+            if (not state.active and not state.waiting and state.blocked_until <= now
+                    and now - state.last_used > HOST_STATE_TTL):
+                del self._hosts[host]
+
+    def _host_stats(self, host: str, state: _HostRate, now: float) -> Dict[str, Any]:
+        return {
+            "host": host,
+            "rate": round(state.rate, 3),
+            "concurrencyLimit": round(state.limit, 2),
+            "active": state.active,
+            "waiting": state.waiting,
+            "blockedFor": round(max(0.0, state.blocked_until - now), 3),
+            "latencyMs": round(1000 * state.latency, 1) if state.latency is not None else None,
+            "requests": state.requests,
+            "throttled": state.throttled,
+            "errors": state.errors,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        now = asyncio.get_running_loop().time()
+        # Hosts that pushed back first, then the busiest
+        hosts = sorted(self._hosts.items(), key=lambda item: (
+            item[1].rate >= self.max_rate, -item[1].throttled - item[1].errors, -item[1].requests))[:10]
+        return {
+            "enabled": self.enabled,
+            "maxRate": self.max_rate,
+            "maxConcurrency": self.max_concurrency,
+            "hosts": len(self._hosts),
+            "throttledHosts": sum(1 for s in self._hosts.values() if s.rate < self.max_rate),
+            "blockedHosts": sum(1 for s in self._hosts.values() if s.blocked_until > now),
+            "topHosts": [self._host_stats(host, state, now) for host, state in hosts],
+        }
+
+    def render(self) -> str:
+        rate = Gauge("scraper_host_rate_limit", "Current request rate allowed per host (requests/second).", "host")
+        limit = Gauge("scraper_host_concurrency_limit", "Current concurrency limit per host.", "host")
+        active = Gauge("scraper_host_active_requests", "Requests in flight per host.", "host")
+        throttled = Counter("scraper_host_throttled_total", "429/503 responses per host.", "host")
+        errors = Counter("scraper_host_errors_total", "Failed requests (5xx, connection errors) per host.", "host")
+        for host, state in self._hosts.items():
+            rate.set(host, round(state.rate, 3))
+            limit.set(host, round(state.limit, 2))
+            active.set(host, state.active)
+            throttled.inc(host, state.throttled)
+            errors.inc(host, state.errors)
+        lines = rate.render() + limit.render() + active.render() + throttled.render() + errors.render()
+        return "\n".join(lines) + "\n"
+
+static_limiter = ConcurrencyLimiter("static", STATIC_CONCURRENCY, STATIC_PER_HOST_CONCURRENCY)
+dynamic_limiter = ConcurrencyLimiter("dynamic", DYNAMIC_CONCURRENCY, DYNAMIC_PER_HOST_CONCURRENCY)
+host_limiter = HostRateLimiter()
@@ -1,12 +1,49 @@
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from app.models import ScrapeRequest, ScrapeResponse, ScrapeResult, Error, Interactions, MetaData
+from app.models import (
+    ScrapeRequest, BatchScrapeRequest, ScrapeResponse, ScrapeResult, Error, Interactions, MetaData, Job, JobRequest,
+    CrawlRequest, CrawlPage, ResultSummary, SectionPage
+)
 from app.scraper import UniversalScraper
+from app.browser_pool import browser_pool
+from app.http_client import http_client
+from app.executor import cpu_executor
+from app.limits import static_limiter, dynamic_limiter, host_limiter
+from app.cache import result_cache
+from app.snapshots import snapshot_store
+from app.sessions import session_store
+from app.archive import html_archive
+from app.strategy import strategy_table
+from app.metrics import scrape_metrics
+from app.jobs import job_queue, QueueFull
+from app.results import result_store, StoredResult
+from app.config import RESULTS_PAGE_MAX
+from app.crawler import Crawler, robots_cache
+from app.responses import json_response, projection
+from contextlib import asynccontextmanager
 import os
 
-app = FastAPI(title="Universal Website Scraper")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # CPU executor for parsing/extraction, shared HTTP client for static fetches
+    # and warm Chromium pool for the JS fallback
+    cpu_executor.start()
+    await http_client.start()
+    await browser_pool.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await browser_pool.stop()
+    await http_client.stop()
+    cpu_executor.stop()
+    result_cache.close()
+    snapshot_store.close()
+    session_store.close()
+    strategy_table.save()
+
+app = FastAPI(title="Universal Website Scraper", lifespan=lifespan)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -18,19 +55,56 @@ templates = Jinja2Templates(directory="app/templates")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/stats")
+async def stats():
+    return {
+        "browserPool": browser_pool.stats(),
+        "httpClient": http_client.stats(),
+        "cpuExecutor": cpu_executor.stats(),
+        "staticLimiter": static_limiter.stats(),
+        "dynamicLimiter": dynamic_limiter.stats(),
+        "hostLimiter": host_limiter.stats(),
+        "cache": result_cache.stats(),
+        "snapshots": snapshot_store.stats(),
+        "sessions": session_store.stats(),
+        "archive": html_archive.stats(),
+        "singleflight": UniversalScraper.inflight.stats(),
+        "strategy": strategy_table.stats(),
+        "jobs": job_queue.stats(),
+        "results": result_store.stats(),
+        "robots": robots_cache.stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(scrape_metrics.render() + host_limiter.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/admin/strategies")
+async def list_strategies():
+    return {"domains": strategy_table.snapshot()}
+
+@app.delete("/admin/strategies/{domain}")
+async def reset_strategy(domain: str):
+    if not await strategy_table.reset(domain):
+        raise HTTPException(status_code=404, detail=f"No strategy recorded for {domain}")
+    return {"domain": domain, "reset": True}
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.post("/scrape", response_model=ScrapeResponse)
-async def scrape_url(request: ScrapeRequest):
+async def scrape_url(request: ScrapeRequest, http_request: Request):
     try:
         # Validate URL scheme
         if request.url.scheme not in ["http", "https"]:
              raise HTTPException(status_code=400, detail="Only http and https schemes are supported.")
         
-        result = await UniversalScraper.scrape(str(request.url))
-        return ScrapeResponse(result=result)
+        result = await UniversalScraper.scrape(str(request.url), request.options)
+        exclude = projection(request.options)
+        return await json_response(http_request, ScrapeResponse.model_construct(result=result),
+                                   exclude={"result": exclude} if exclude else None)
     except Exception as e:
         # Return a partial failure if possible, or a 500
         # The spec asks for a JSON response with errors, but FastAPI exception handler might override.
@@ -46,6 +120,106 @@ async def scrape_url(request: ScrapeRequest):
             errors=[Error(message=f"{type(e).__name__}: {str(e)}", phase="api_handler")]
         ))
 
+@app.post("/scrape/batch")
+async def scrape_batch(request: BatchScrapeRequest):
+    # One ScrapeResult per line (NDJSON), streamed as each URL finishes
+    exclude = projection(request.options)
+
+    async def stream_results():
+        async for result in UniversalScraper.scrape_many((str(url) for url in request.urls), request.options):
+            yield result.model_dump_json(exclude=exclude) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post("/crawl")
+async def crawl(request: CrawlRequest):
+    # NDJSON: {"event": "page", "data": CrawlPage} per page as it is scraped, then
+    # {"event": "summary", "data": CrawlSummary}
+    exclude = projection(request.options)
+
+    async def stream_events():
+        async for item in Crawler(request).run():
+            if isinstance(item, CrawlPage):
+                data = item.model_dump_json(exclude={"result": exclude} if exclude else None)
+                yield f'{{"event": "page", "data": {data}}}\n'
+            else:
+                yield f'{{"event": "summary", "data": {item.model_dump_json()}}}\n'
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+async def _job_response(http_request: Request, job: Job, status_code: int = 200):
+    exclude = projection(job.options)
+    return await json_response(http_request, job, exclude={"result": exclude} if exclude else None, status_code=status_code)
+
+@app.post("/jobs", response_model=Job, status_code=202)
+async def submit_job(request: JobRequest, http_request: Request):
+    if request.url.scheme not in ["http", "https"]:
+        raise HTTPException(status_code=400, detail="Only http and https schemes are supported.")
+    try:
+        job = await job_queue.submit(request)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return await _job_response(http_request, job, status_code=202)
+
+@app.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str, http_request: Request):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return await _job_response(http_request, job)
+
+@app.delete("/jobs/{job_id}", response_model=Job)
+async def cancel_job(job_id: str, http_request: Request):
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return await _job_response(http_request, job)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    # Server-sent events: "status" on state changes, "phase" as scrape phases start and finish
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return StreamingResponse(
+        job_queue.sse(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _stored_result(result_id: str) -> StoredResult:
+    stored = result_store.get(result_id)
+    if stored is None:
+        # Evicted from memory (or finished before a restart): the job store still has it
+        job = await job_queue.get(result_id)
+        if job is None or job.result is None:
+            raise HTTPException(status_code=404, detail=f"No result for {result_id}")
+        stored = result_store.put(result_id, job.result, job.options)
+    return stored
+
+@app.get("/results/{result_id}", response_model=ResultSummary)
+async def get_result_summary(result_id: str, http_request: Request):
+    # Everything but section content, plus id/type/label per section
+    stored = await _stored_result(result_id)
+    return await json_response(http_request, result_store.summary(stored))
+
+@app.get("/results/{result_id}/sections", response_model=SectionPage)
+async def get_result_sections(result_id: str, http_request: Request, offset: int = Query(0, ge=0),
+                              limit: int = Query(50, ge=1, le=RESULTS_PAGE_MAX)):
+    stored = await _stored_result(result_id)
+    exclude = stored.section_exclude()
+    return await json_response(http_request, result_store.page(stored, offset, limit),
+                               exclude={stored.key: exclude} if exclude else None)
+
+@app.get("/results/{result_id}/download")
+async def download_result(result_id: str):
+    # The full {"result": ...} document, streamed
+    stored = await _stored_result(result_id)
+    return StreamingResponse(
+        result_store.stream(stored),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="scrape-{result_id}.json"'},
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
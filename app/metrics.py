@@ -0,0 +1,211 @@
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.models import PhaseTiming, Timings
+
+# Seconds; phases range from sub-millisecond DNS cache hits to minute-long browser runs
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# static: the static fetch was enough; fallback: the browser produced the result;
+# fallback_failed: the browser was needed but failed; cache: served from the result cache;
+# unchanged: diff mode fetched the same document as the snapshot and skipped extraction
+OUTCOMES = ("cache", "static", "fallback", "fallback_failed", "unchanged", "error")
+
+PhaseEntry = Tuple[str, float, Optional[str]]
+
+class PhaseTimer:
+    """Phase durations of one scrape, in the order the phases finished."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[PhaseEntry] = []
+
+    def add(self, phase: str, seconds: float, detail: Optional[str] = None):
+        self.phases.append((phase, seconds, detail))
+
+    def extend(self, entries: Iterable[PhaseEntry]):
+        self.phases.extend(entries)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def to_model(self) -> Timings:
+        return Timings(
+            totalMs=round(1000 * self.elapsed(), 3),
+            phases=[PhaseTiming(phase=p, ms=round(1000 * s, 3), detail=d) for p, s, d in self.phases],
+        )
+
+# Timer of the scrape running in the current task; tasks started by it (a raced
+# browser scrape) inherit it. Code outside a scrape records nothing.
+_current_timer: ContextVar[Optional[PhaseTimer]] = ContextVar("phase_timer", default=None)
+# Live progress (job event streams): called as listener(phase, "started" | "finished", detail, seconds)
+ProgressListener = Callable[[str, str, Optional[str], Optional[float]], None]
+_progress_listener: ContextVar[Optional[ProgressListener]] = ContextVar("progress_listener", default=None)
+
+@contextmanager
+def timing(timer: PhaseTimer) -> Iterator[PhaseTimer]:
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+@contextmanager
+def reporting(listener: ProgressListener) -> Iterator[None]:
+    token = _progress_listener.set(listener)
+    try:
+        yield
+    finally:
+        _progress_listener.reset(token)
+
+class ProgressFanout:
+    """Listeners of every caller sharing one run (SingleFlight); the run reports to this."""
+
+    def __init__(self):
+        self._listeners: List[ProgressListener] = []
+
+    def add(self, listener: ProgressListener):
+        self._listeners.append(listener)
+
+    def remove(self, listener: ProgressListener):
+        self._listeners.remove(listener)
+
+    def __call__(self, phase: str, state: str, detail: Optional[str], seconds: Optional[float]):
+        for listener in list(self._listeners):
+            listener(phase, state, detail, seconds)
+
+def current_listener() -> Optional[ProgressListener]:
+    return _progress_listener.get()
+
+def fanout_context(fanout: ProgressFanout) -> Context:
+    # Copy of the current context whose progress goes to the fanout instead of the caller
+    context = copy_context()
+    context.run(_progress_listener.set, fanout)
+    return context
+
+def record(phase: str, seconds: float, detail: Optional[str] = None):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(phase, seconds, detail)
+    listener = _progress_listener.get()
+    if listener is not None:
+        listener(phase, "finished", detail, seconds)
+
+@contextmanager
+def timed(phase: str, detail: Optional[str] = None) -> Iterator[None]:
+    timer = _current_timer.get()
+    listener = _progress_listener.get()
+    if timer is None and listener is None:
+        yield
+        return
+    if listener is not None:
+        listener(phase, "started", detail, None)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        if timer is not None:
+            timer.add(phase, seconds, detail)
+        if listener is not None:
+            listener(phase, "finished", detail, seconds)
+
+def _label(name: str, value: str) -> str:
+    value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'{name}="{value}"'
+
+class Histogram:
+    """Prometheus-style cumulative histogram with one label."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        # label value -> per-bucket counts (last one is +Inf) and sum of observations
+        self._counts: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = {}
+
+    def observe(self, value: str, seconds: float):
+        counts = self._counts.get(value)
+        if counts is None:
+            counts = self._counts[value] = [0] * (len(self.buckets) + 1)
+            self._sums[value] = 0.0
+        counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self._sums[value] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for value in sorted(self._counts):
+            labels = _label(self.label, value)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self._counts[value]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {self._sums[value]}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+class Counter:
+    """Prometheus-style counter with one label."""
+
+    def __init__(self, name: str, help_text: str, label: str, values: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, int] = {value: 0 for value in values}
+
+    def inc(self, value: str, amount: int = 1):
+        self._values[value] = self._values.get(value, 0) + amount
+
+    def get(self, value: str) -> int:
+        return self._values.get(value, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for value in sorted(self._values):
+            lines.append(f"{self.name}{{{_label(self.label, value)}}} {self._values[value]}")
+        return lines
+
+class Gauge:
+    """Prometheus-style gauge with one label."""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+
+    def set(self, value: str, amount: float):
+        self._values[value] = amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for value in sorted(self._values):
+            lines.append(f"{self.name}{{{_label(self.label, value)}}} {self._values[value]}")
+        return lines
+
+class ScrapeMetrics:
+    """Process-wide scrape histograms and outcome counters, exposed at /metrics."""
+
+    def __init__(self):
+        self.phase_seconds = Histogram(
+            "scraper_phase_duration_seconds", "Time spent in each scrape phase.", "phase")
+        self.scrape_seconds = Histogram(
+            "scraper_scrape_duration_seconds", "End-to-end scrape time by outcome.", "outcome")
+        self.scrapes = Counter(
+            "scraper_scrapes_total", "Scrapes by outcome (static, browser fallback, cache).", "outcome", OUTCOMES)
+
+    def observe(self, timer: PhaseTimer, outcome: str):
+        for phase, seconds, _ in timer.phases:
+            self.phase_seconds.observe(phase, seconds)
+        self.scrape_seconds.observe(outcome, timer.elapsed())
+        self.scrapes.inc(outcome)
+
+    def render(self) -> str:
+        lines = self.scrapes.render() + self.scrape_seconds.render() + self.phase_seconds.render()
+        return "\n".join(lines) + "\n"
+
+scrape_metrics = ScrapeMetrics()
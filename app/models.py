@@ -1,15 +1,82 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional, Any, Dict, Union
+from typing import List, Optional, Any, Dict, Union, Literal
 from datetime import datetime
+from app.config import (
+    WAIT_MODE, INTERCEPTION_PROFILE, EXTRACT_MODE, PARSER_BACKEND, HTML_ARCHIVE, SESSION_CACHE_ENABLED,
+    CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES, CRAWL_CONCURRENCY, CRAWL_POLITENESS_DELAY
+)
+
+# Section fields a request can project (content lists plus rawHtml/truncated)
+SectionField = Literal["rawHtml", "headings", "text", "links", "images", "lists", "tables"]
+SECTION_FIELDS = ("rawHtml", "headings", "text", "links", "images", "lists", "tables")
+PROJECTION_PROFILES = {
+    "full": SECTION_FIELDS,
+    "text": ("headings", "text"),
+    "links": ("links",),
+}
+
+class ScrapeOptions(BaseModel):
+    # Skip cached results (the fresh result still refreshes the cache)
+    bypassCache: bool = False
+    # Dynamic scrapes: "adaptive" waits for DOM/network quiet, "fixed" uses fixed sleeps
+    waitMode: Literal["adaptive", "fixed"] = WAIT_MODE
+    # Dynamic scrapes: which requests to abort (see app/interception.py)
+    blockProfile: Literal["off", "trackers", "default", "aggressive"] = INTERCEPTION_PROFILE
+    # Dynamic scrapes: "browser" builds sections inside the page instead of reparsing its HTML
+    extractMode: Literal["python", "browser"] = EXTRACT_MODE
+    # HTML extraction backend: "bs4" (BeautifulSoup) or "lxml" (lxml tree, same output, faster)
+    parserBackend: Literal["bs4", "lxml"] = PARSER_BACKEND
+    # Return per-phase timings (fetch, parse, browser steps) in the result
+    includeTimings: bool = False
+    # "tree" returns nested sections in sectionTree (own content only) instead of the flat list
+    sectionLayout: Literal["flat", "tree"] = "flat"
+    # Section fields to return: a profile, or an explicit include list, minus exclude.
+    # rawHtml, links, images, lists and tables left out are not extracted at all.
+    profile: Literal["full", "text", "links"] = "full"
+    include: Optional[List[SectionField]] = None
+    exclude: List[SectionField] = Field(default_factory=list)
+    # Return only sections added or changed since this URL's previous diff scrape (same
+    # layout and fields), plus a diff summary; the result becomes the new snapshot
+    diff: bool = False
+    # Append the fetched HTML (static and rendered) to the archive for offline re-extraction
+    archiveHtml: bool = HTML_ARCHIVE
+    # Dynamic scrapes: start from the host's saved cookies and localStorage, and save
+    # them back after a scrape that found sections
+    reuseSession: bool = SESSION_CACHE_ENABLED
+    # Dynamic scrapes: skip the cookie banner step when the restored session already
+    # holds a consent cookie
+    skipConsentBanner: bool = True
 
 class ScrapeRequest(BaseModel):
     url: HttpUrl
+    options: ScrapeOptions = Field(default_factory=ScrapeOptions)
+
+class BatchScrapeRequest(BaseModel):
+    urls: List[HttpUrl] = Field(min_length=1)
+    options: ScrapeOptions = Field(default_factory=ScrapeOptions)
+
+class CrawlRequest(BaseModel):
+    seeds: List[HttpUrl] = Field(min_length=1)
+    options: ScrapeOptions = Field(default_factory=ScrapeOptions)
+    # Link hops from a seed; pagination (rel="next", "Next" links) does not add depth
+    maxDepth: int = Field(default=CRAWL_MAX_DEPTH, ge=0, le=10)
+    maxPages: int = Field(default=CRAWL_MAX_PAGES, ge=1, le=10000)
+    # "host": the seeds' hosts, "domain": their subdomains too, "any": no restriction
+    scope: Literal["host", "domain", "any"] = "host"
+    followLinks: bool = True
+    followPagination: bool = True
+    respectRobots: bool = True
+    # Seconds between requests to one host
+    delay: float = Field(default=CRAWL_POLITENESS_DELAY, ge=0, le=60)
+    concurrency: int = Field(default=CRAWL_CONCURRENCY, ge=1, le=64)
 
 class MetaData(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     language: Optional[str] = None
     canonical: Optional[str] = None
+    # rel="next" pagination link: a <link> in the head, else the first <a rel="next">
+    next: Optional[str] = None
 
 class Link(BaseModel):
     text: str
@@ -35,23 +102,142 @@ class Section(BaseModel):
     content: SectionContent
     rawHtml: str
     truncated: bool
+    # Hash of content (own content for SectionNodes): equal across scrapes with the same
+    # fields while the section is unchanged
+    fingerprint: str = ""
+
+class SectionRef(BaseModel):
+    # A child section and where its content goes in the parent's own content when
+    # flattening: a character offset into text and positions in the lists
+    id: str
+    textAt: int = 0
+    headingsAt: int = 0
+    linksAt: int = 0
+    imagesAt: int = 0
+    listsAt: int = 0
+    tablesAt: int = 0
+
+class SectionNode(Section):
+    # content holds only what is not inside a child section; label, type and rawHtml
+    # describe the whole section, as in the flat layout
+    parentId: Optional[str] = None
+    children: List[SectionRef] = Field(default_factory=list)
 
 class Interactions(BaseModel):
     clicks: List[str] = Field(default_factory=list)
     scrolls: int = 0
     pages: List[str] = Field(default_factory=list)
 
+class ResourceStats(BaseModel):
+    # Network activity of a dynamic scrape; requests aborted by the interception profile
+    profile: str
+    requests: int = 0
+    bytesDownloaded: int = 0
+    blockedRequests: int = 0
+    blockedTrackers: int = 0
+    blockedByType: Dict[str, int] = Field(default_factory=dict)
+    estimatedBytesSaved: int = 0
+
+class PhaseTiming(BaseModel):
+    # One timed step; repeated phases (interaction, scroll, redirects) get one entry each
+    phase: str
+    ms: float
+    detail: Optional[str] = None
+
+class Timings(BaseModel):
+    totalMs: float
+    phases: List[PhaseTiming] = Field(default_factory=list)
+
 class Error(BaseModel):
     message: str
     phase: str
 
+class SectionDiff(BaseModel):
+    # Against the snapshot scraped at `since` (None: first diff scrape, everything is added).
+    # Sections are matched by fingerprint first, then by id; changed ids are current ones.
+    since: Optional[str] = None
+    added: List[str] = Field(default_factory=list)
+    changed: List[str] = Field(default_factory=list)
+    removed: List[str] = Field(default_factory=list)
+    unchanged: int = 0
+
 class ScrapeResult(BaseModel):
     url: str
     scrapedAt: str
     meta: MetaData
     sections: List[Section]
+    # sectionLayout="tree": the sections as nodes (sections is then empty); see
+    # ScraperUtils.flatten_sections for the flat view
+    sectionTree: Optional[List[SectionNode]] = None
     interactions: Interactions
     errors: List[Error] = Field(default_factory=list)
+    resources: Optional[ResourceStats] = None
+    timings: Optional[Timings] = None
+    # options.diff: sections/sectionTree then hold only the added and changed sections
+    diff: Optional[SectionDiff] = None
 
 class ScrapeResponse(BaseModel):
     result: ScrapeResult
+
+class SectionSummary(BaseModel):
+    id: str
+    type: str
+    label: str
+    # Tree layout only
+    parentId: Optional[str] = None
+
+class ResultSummary(BaseModel):
+    # A stored result without section content; GET /results/{id}/sections pages through it
+    id: str
+    url: str
+    scrapedAt: str
+    meta: MetaData
+    interactions: Interactions
+    errors: List[Error] = Field(default_factory=list)
+    resources: Optional[ResourceStats] = None
+    timings: Optional[Timings] = None
+    diff: Optional[SectionDiff] = None
+    layout: Literal["flat", "tree"] = "flat"
+    sectionCount: int
+    sections: List[SectionSummary]
+
+class SectionPage(BaseModel):
+    offset: int
+    total: int
+    # Same layout as the result: sections, or nodes in sectionTree
+    sections: List[Section] = Field(default_factory=list)
+    sectionTree: Optional[List[SectionNode]] = None
+
+class JobRequest(BaseModel):
+    url: HttpUrl
+    options: ScrapeOptions = Field(default_factory=ScrapeOptions)
+    # Higher runs first; equal priorities run in submission order
+    priority: int = Field(default=0, ge=0, le=9)
+
+class Job(BaseModel):
+    id: str
+    url: str
+    options: ScrapeOptions
+    priority: int = 0
+    status: Literal["queued", "running", "done", "failed", "cancelled"] = "queued"
+    createdAt: str
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    # Last phase started while running (see /jobs/{id}/events for the full stream)
+    phase: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[ScrapeResult] = None
+
+class CrawlPage(BaseModel):
+    # How the page was reached: a seed, a followed link or a pagination link from `parent`
+    depth: int
+    via: Literal["seed", "link", "pagination"]
+    parent: Optional[str] = None
+    result: ScrapeResult
+
+class CrawlSummary(BaseModel):
+    pagesVisited: int
+    # Visited pages in order, plus the clicks and scrolls of their scrapes
+    interactions: Interactions
+    # URLs not visited, by reason (robots, scope, frontierFull, maxPages)
+    skipped: Dict[str, int] = Field(default_factory=dict)
@@ -0,0 +1,95 @@
+import time
+from typing import Optional
+from playwright.async_api import Page, Request
+from app.config import WAIT_QUIET_WINDOW_MS, WAIT_POLL_INTERVAL_MS, PAGE_TIME_BUDGET_MS
+
+# Installed before any page script runs; records when the DOM last changed
+MUTATION_TRACKER_SCRIPT = """
+(() => {
+    if (window.__scraperQuiet) return;
+    window.__scraperQuiet = { lastMutation: performance.now() };
+    new MutationObserver(() => { window.__scraperQuiet.lastMutation = performance.now(); })
+        .observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+})();
+"""
+
+QUIET_PROBE_SCRIPT = """
+() => window.__scraperQuiet ? performance.now() - window.__scraperQuiet.lastMutation : 0
+"""
+
+class PageSettler:
+    """Waits for a page to settle, within one time budget for the whole page.
+
+    adaptive: returns as soon as there have been no DOM mutations and no in-flight
+    requests for the quiet window, never waiting longer than the old fixed sleep.
+    fixed: sleeps the given duration (previous behaviour).
+    """
+
+    def __init__(
+        self,
+        page: Page,
+        mode: str = "adaptive",
+        budget_ms: int = PAGE_TIME_BUDGET_MS,
+        quiet_window_ms: int = WAIT_QUIET_WINDOW_MS,
+        poll_interval_ms: int = WAIT_POLL_INTERVAL_MS,
+    ):
+        self.page = page
+        self.adaptive = mode == "adaptive"
+        self.quiet_window_ms = quiet_window_ms
+        self.poll_interval_ms = poll_interval_ms
+        self.deadline = time.monotonic() + budget_ms / 1000
+        self.waited_ms = 0.0
+        self._inflight = set()
+        self._last_network = time.monotonic()
+
+    async def install(self):
+        if not self.adaptive:
+            return
+        await self.page.add_init_script(MUTATION_TRACKER_SCRIPT)
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+
+    def _on_request(self, request: Request):
+        self._inflight.add(request)
+        self._last_network = time.monotonic()
+
+    def _on_request_done(self, request: Request):
+        self._inflight.discard(request)
+        self._last_network = time.monotonic()
+
+    @property
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.deadline - time.monotonic()) * 1000)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining_ms <= 0
+
+    def timeout_ms(self, default_ms: float) -> float:
+        # Playwright timeouts capped by what is left of the budget (0 would mean "no timeout")
+        return max(1.0, min(default_ms, self.remaining_ms))
+
+    async def settle(self, fixed_ms: float, max_ms: Optional[float] = None):
+        started = time.monotonic()
+        cap_ms = min(max_ms if max_ms is not None else fixed_ms, self.remaining_ms)
+        if not self.adaptive:
+            await self.page.wait_for_timeout(cap_ms)
+        else:
+            while (time.monotonic() - started) * 1000 < cap_ms:
+                if await self._is_quiet():
+                    break
+                await self.page.wait_for_timeout(self.poll_interval_ms)
+        self.waited_ms += (time.monotonic() - started) * 1000
+
+    async def _is_quiet(self) -> bool:
+        if self._inflight:
+            return False
+        if (time.monotonic() - self._last_network) * 1000 < self.quiet_window_ms:
+            return False
+        try:
+            since_mutation = await self.page.evaluate(QUIET_PROBE_SCRIPT)
+        except Exception:
+            # Page navigating or closed: not quiet yet, the caller's cap still applies
+            return False
+        return since_mutation >= self.quiet_window_ms
@@ -0,0 +1,197 @@
+"""Re-run meta and section extraction over stored HTML, on all cores, without fetching.
+
+Usage:
+    python -m app.reextract INPUT [INPUT ...] -o results.jsonl [--resume] [--shard I/N]
+        [--workers N] [--backend bs4|lxml] [--layout flat|tree] [--profile full|text|links]
+
+INPUT is a directory of .html files (URLs from --base-url plus the relative path, else
+file:// URLs), a JSONL file of {"url", "html"[, "source", "fetchedAt"]} records such as
+the HTML archive (options.archiveHtml) writes, gzipped or not, or a WARC file (needs the
+warcio package). One ScrapeResult per input record is written, in input order, so
+--resume skips as many records as the output already holds. --shard I/N keeps only the
+records whose normalized URL hashes to I modulo N, to split a corpus across machines.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import FrozenSet, Iterator, List, Optional, Tuple
+import httpx
+from app.cache import normalize_url
+from app.config import EXTRACT_WORKERS, PARSER_BACKEND
+from app.extraction import EXTRACTION_BACKENDS
+from app.http_client import decode_html
+from app.models import Error, Interactions, MetaData, ScrapeResult, PROJECTION_PROFILES
+
+try:
+    from warcio.archiveiterator import ArchiveIterator
+except ImportError:
+    ArchiveIterator = None
+
+# (url, html or None when the record could not be read, parser, fetchedAt, read error)
+Record = Tuple[str, Optional[str], str, Optional[str], Optional[str]]
+# Parsers the scraper used for each archive source
+SOURCE_PARSERS = {"static": "lxml", "dynamic": "html.parser"}
+# Records in flight per worker: keeps every core busy with memory bounded by the window
+WINDOW_PER_WORKER = 4
+
+def _decode(content: bytes, content_type: str) -> str:
+    # Same charset rules as the static fetch
+    return decode_html(httpx.Response(200, headers={"content-type": content_type}, content=content))
+
+def _directory_records(root: Path, base_url: Optional[str]) -> Iterator[Record]:
+    for path in sorted(p for p in root.rglob("*") if p.suffix.lower() in (".html", ".htm") and p.is_file()):
+        relative = path.relative_to(root).as_posix()
+        url = base_url.rstrip("/") + "/" + relative if base_url else path.resolve().as_uri()
+        yield url, _decode(path.read_bytes(), "text/html"), "lxml", None, None
+
+def _jsonl_records(path: Path) -> Iterator[Record]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                parser = SOURCE_PARSERS.get(record.get("source", "static"), "lxml")
+                yield record["url"], record["html"], parser, record.get("fetchedAt"), None
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                yield "", None, "lxml", None, f"{path}:{number}: unreadable record ({type(e).__name__}: {e})"
+
+def _warc_records(path: Path) -> Iterator[Record]:
+    if ArchiveIterator is None:
+        raise SystemExit("WARC input needs the warcio package (pip install warcio)")
+    with open(path, "rb") as f:
+        for record in ArchiveIterator(f):
+            if record.rec_type != "response" or record.http_headers is None:
+                continue
+            content_type = record.http_headers.get_header("Content-Type") or ""
+            if "html" not in content_type.lower():
+                continue
+            url = record.rec_headers.get_header("WARC-Target-URI")
+            fetched_at = record.rec_headers.get_header("WARC-Date")
+            yield url, _decode(record.content_stream().read(), content_type), "lxml", fetched_at, None
+
+def records(inputs: List[str], base_url: Optional[str] = None) -> Iterator[Record]:
+    for name in inputs:
+        path = Path(name)
+        if path.is_dir():
+            yield from _directory_records(path, base_url)
+        elif ".warc" in path.name.lower():
+            yield from _warc_records(path)
+        else:
+            yield from _jsonl_records(path)
+
+def shard_of(url: str, shards: int) -> int:
+    digest = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+def completed_lines(path: str) -> int:
+    # Complete result lines already written; a partial last line (interrupted write) is cut off
+    if not os.path.exists(path):
+        return 0
+    count, end, position = 0, 0, 0
+    with open(path, "rb+") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            count += chunk.count(b"\n")
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                end = position + newline + 1
+            position += len(chunk)
+        f.truncate(end)
+    return count
+
+def _result_line(url: str, scraped_at: Optional[str], layout: str, meta: MetaData, sections: list,
+                 errors: List[Error]) -> str:
+    return ScrapeResult.model_construct(
+        url=url,
+        scrapedAt=scraped_at or datetime.now(timezone.utc).isoformat(),
+        meta=meta,
+        sections=sections if layout == "flat" else [],
+        sectionTree=sections if layout == "tree" else None,
+        interactions=Interactions(),
+        errors=errors,
+        resources=None,
+        timings=None,
+        diff=None,
+    ).model_dump_json()
+
+def _extract(url: str, html: str, parser: str, fetched_at: Optional[str], backend: str, layout: str,
+             fields: FrozenSet[str]) -> str:
+    # Runs in a worker process; the result is serialized there too
+    try:
+        meta, sections, errors = EXTRACTION_BACKENDS[backend].extract(html, url, parser, layout, fields)
+    except Exception as e:
+        meta, sections, errors = MetaData(), [], [Error(message=f"{type(e).__name__}: {e}", phase="reextract")]
+    return _result_line(url, fetched_at, layout, meta, sections, errors)
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="directories of .html files, JSONL(.gz) archives or WARC files")
+    parser.add_argument("-o", "--output", required=True, help="ScrapeResult JSONL to write")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run instead of starting over")
+    parser.add_argument("--shard", default="0/1", help="I/N: only records whose URL hash is I modulo N")
+    parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS, help="extraction processes (default: all cores)")
+    parser.add_argument("--backend", choices=sorted(EXTRACTION_BACKENDS), default=PARSER_BACKEND, help="extraction backend")
+    parser.add_argument("--layout", choices=("flat", "tree"), default="flat", help="section layout")
+    parser.add_argument("--profile", choices=sorted(PROJECTION_PROFILES), default="full", help="section fields to extract")
+    parser.add_argument("--base-url", help="URL prefix for files read from directories")
+    args = parser.parse_args(argv)
+
+    try:
+        shard, shards = (int(part) for part in args.shard.split("/"))
+        if not 0 <= shard < shards:
+            raise ValueError
+    except ValueError:
+        parser.error("--shard must be I/N with 0 <= I < N")
+    fields = frozenset(PROJECTION_PROFILES[args.profile])
+    workers = max(1, args.workers)
+    skip = completed_lines(args.output) if args.resume else 0
+
+    written = 0
+    started = time.perf_counter()
+    window: deque = deque()
+    # spawn: same worker start method as the app's extraction executor
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool, \
+            open(args.output, "a" if args.resume else "w", encoding="utf-8") as out:
+        def flush(limit: int):
+            nonlocal written
+            while len(window) > limit:
+                out.write(window.popleft().result() + "\n")
+                written += 1
+                if written % 1000 == 0:
+                    rate = written / (time.perf_counter() - started)
+                    print(f"{skip + written} records ({rate:.0f}/s)", file=sys.stderr)
+
+        position = 0
+        for url, html, source_parser, fetched_at, error in records(args.inputs, args.base_url):
+            if shards > 1 and shard_of(url, shards) != shard:
+                continue
+            position += 1
+            if position <= skip:
+                continue
+            if html is None:
+                # Unreadable input still gets its line, so positions stay aligned for --resume
+                future: Future = Future()
+                future.set_result(_result_line(url, fetched_at, args.layout, MetaData(), [],
+                                               [Error(message=error, phase="reextract")]))
+                window.append(future)
+            else:
+                window.append(pool.submit(_extract, url, html, source_parser, fetched_at, args.backend, args.layout, fields))
+            flush(workers * WINDOW_PER_WORKER)
+        flush(0)
+
+    elapsed = time.perf_counter() - started
+    print(f"{written} records extracted in {elapsed:.1f}s ({skip} already done), shard {shard}/{shards}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,66 @@
+import asyncio
+import gzip
+from typing import Any, Dict, Optional
+from fastapi import Request, Response
+from pydantic import BaseModel
+from app.config import RESPONSE_COMPRESSION_MIN_BYTES, RESPONSE_GZIP_LEVEL, RESPONSE_BROTLI_QUALITY
+from app.extraction import ScraperUtils
+from app.models import ScrapeOptions, SECTION_FIELDS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def projection(options: ScrapeOptions) -> Optional[Dict[str, Any]]:
+    # pydantic exclude spec that drops the fields a request did not ask for from a ScrapeResult
+    fields = ScraperUtils.section_fields(options)
+    dropped = [field for field in SECTION_FIELDS if field not in fields]
+    if not dropped:
+        return None
+    section: Dict[str, Any] = {}
+    if "rawHtml" in dropped:
+        section["rawHtml"] = True
+        section["truncated"] = True
+    content = {field: True for field in dropped if field != "rawHtml"}
+    if content:
+        section["content"] = content
+    return {"sections": {"__all__": section}, "sectionTree": {"__all__": section}}
+
+def _accepted_encoding(accept: str) -> Optional[str]:
+    weights = {}
+    for part in accept.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    preferred = ("br", "gzip") if brotli is not None else ("gzip",)
+    for encoding in preferred:
+        if weights.get(encoding, weights.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL)
+
+async def json_response(request: Request, model: BaseModel, exclude: Optional[Dict[str, Any]] = None,
+                        status_code: int = 200) -> Response:
+    # Serialized straight to bytes by pydantic-core: no jsonable_encoder pass and no
+    # response_model re-validation of models the scraper built itself
+    body = model.__pydantic_serializer__.to_json(model, exclude=exclude)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = None
+    if len(body) >= RESPONSE_COMPRESSION_MIN_BYTES:
+        encoding = _accepted_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is not None:
+        # Large results take milliseconds to compress; keep that off the event loop
+        body = await asyncio.to_thread(_compress, body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
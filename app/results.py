@@ -0,0 +1,117 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Union
+from pydantic import TypeAdapter
+from app.config import RESULTS_MAX_ENTRIES, RESULTS_STREAM_BATCH, JOB_RETENTION
+from app.models import (
+    ResultSummary, ScrapeOptions, ScrapeResult, Section, SectionNode, SectionPage, SectionSummary
+)
+from app.responses import projection
+
+SECTION_ADAPTERS = {
+    "sections": TypeAdapter(List[Section]),
+    "sectionTree": TypeAdapter(List[SectionNode]),
+}
+
+class StoredResult:
+    def __init__(self, result_id: str, result: ScrapeResult, options: ScrapeOptions):
+        self.id = result_id
+        self.result = result
+        # Section fields the scrape asked for; the rest is left out of every response
+        self.exclude = projection(options)
+        self.key = "sectionTree" if result.sectionTree is not None else "sections"
+        self.stored_at = time.monotonic()
+
+    @property
+    def items(self) -> List[Union[Section, SectionNode]]:
+        return getattr(self.result, self.key)
+
+    def section_exclude(self) -> Optional[Dict[str, Any]]:
+        # Exclude spec for a list of this result's sections
+        return self.exclude[self.key] if self.exclude else None
+
+class ResultStore:
+    """Finished results by id (the job id), kept parsed for paged section access.
+    An LRU in memory; the caller reloads evicted results from the job store."""
+
+    def __init__(self, max_entries: int = RESULTS_MAX_ENTRIES, ttl: float = JOB_RETENTION):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "pages": 0, "downloads": 0}
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        stored = self._entries.get(result_id)
+        if stored is not None and time.monotonic() - stored.stored_at > self.ttl:
+            del self._entries[result_id]
+            stored = None
+        if stored is None:
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(result_id)
+        self.counters["hits"] += 1
+        return stored
+
+    def put(self, result_id: str, result: ScrapeResult, options: ScrapeOptions) -> StoredResult:
+        stored = StoredResult(result_id, result, options)
+        self._entries[result_id] = stored
+        self._entries.move_to_end(result_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.counters["stores"] += 1
+        return stored
+
+    @staticmethod
+    def summary(stored: StoredResult) -> ResultSummary:
+        result = stored.result
+        items = stored.items
+        return ResultSummary.model_construct(
+            id=stored.id,
+            url=result.url,
+            scrapedAt=result.scrapedAt,
+            meta=result.meta,
+            interactions=result.interactions,
+            errors=result.errors,
+            resources=result.resources,
+            timings=result.timings,
+            diff=result.diff,
+            layout="tree" if stored.key == "sectionTree" else "flat",
+            sectionCount=len(items),
+            sections=[
+                SectionSummary.model_construct(
+                    id=s.id, type=s.type, label=s.label, parentId=getattr(s, "parentId", None))
+                for s in items
+            ],
+        )
+
+    def page(self, stored: StoredResult, offset: int, limit: int) -> SectionPage:
+        self.counters["pages"] += 1
+        items = stored.items
+        window = items[offset:offset + limit]
+        return SectionPage.model_construct(
+            offset=offset,
+            total=len(items),
+            sections=window if stored.key == "sections" else [],
+            sectionTree=window if stored.key == "sectionTree" else None,
+        )
+
+    def stream(self, stored: StoredResult, batch: int = RESULTS_STREAM_BATCH) -> Iterator[bytes]:
+        # {"result": ...} as a download, sections serialized a batch at a time so a large
+        # result is never held as one string. Sync: the response iterates it in a thread.
+        self.counters["downloads"] += 1
+        result, key = stored.result, stored.key
+        exclude = dict(stored.exclude or {})
+        exclude[key] = True
+        head = result.__pydantic_serializer__.to_json(result, exclude=exclude)
+        yield b'{"result":' + head[:-1] + b',"' + key.encode() + b'":['
+        adapter = SECTION_ADAPTERS[key]
+        items = stored.items
+        for start in range(0, len(items), batch):
+            body = adapter.dump_json(items[start:start + batch], exclude=stored.section_exclude())
+            yield (b"," if start else b"") + body[1:-1]
+        yield b"]}}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "maxEntries": self.max_entries, **self.counters}
+
+result_store = ResultStore()
@@ -1,227 +1,53 @@
-
 import asyncio
-import re
-from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+import time
+from typing import List, Dict, FrozenSet, Optional, Tuple, Iterable, AsyncIterator
 from datetime import datetime, timezone
 import httpx
-import requests
-from bs4 import BeautifulSoup, Comment, Tag
-from playwright.async_api import async_playwright, Page, BrowserContext
 from playwright_stealth import stealth
 from app.models import (
-    ScrapeResult, MetaData, Section, SectionContent, 
-    Link, Image, Interactions, Error
+    ScrapeResult, MetaData, Section, Interactions, Error, ScrapeOptions, ResourceStats
 )
-from urllib.parse import urljoin, urlparse
 from fake_useragent import UserAgent
-
-# Constants
-MAX_RAW_HTML_LENGTH = 1000
-MIN_TEXT_LENGTH_FOR_SECTION = 1
-NOISE_SELECTORS = [
-    "script", "style", "noscript", "iframe", "svg", 
-    ".cookie-banner", "#cookie-banner", ".popup", ".modal", 
-    "[aria-modal='true']", ".ad", ".advertisement", ".dialog",
-    "#onetrust-banner-sdk"
-]
-SECTION_TAGS = ["header", "nav", "main", "section", "footer", "article", "aside"]
-HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
-
-class ScraperUtils:
-    @staticmethod
-    def clean_text(text: str) -> str:
-        # Replace newlines/tabs with spaces and collapse multiple spaces
-        text = re.sub(r'[\r\n\t]+', ' ', text)
-        return re.sub(r'\s+', ' ', text).strip()
-
-    @staticmethod
-    def truncate_html(html: str, max_length: int = MAX_RAW_HTML_LENGTH) -> Tuple[str, bool]:
-        if len(html) <= max_length:
-            return html, False
-        return html[:max_length] + "...", True
-
-    @staticmethod
-    def extract_meta(soup: BeautifulSoup, url: str) -> MetaData:
-        title = None
-        if soup.title:
-            title = soup.title.string 
-        
-        if not title:
-            og_title = soup.find("meta", property="og:title")
-            if og_title:
-                title = og_title.get("content")
-
-        description = None
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        if meta_desc:
-            description = meta_desc.get("content")
-        
-        language = soup.html.get("lang") if soup.html else None
-        
-        canonical = None
-        link_canonical = soup.find("link", rel="canonical")
-        if link_canonical:
-            canonical = link_canonical.get("href")
-            # Ensure absolute URL
-            canonical = urljoin(url, canonical)
-            
-        return MetaData(
-            title=title,
-            description=description,
-            language=language,
-            canonical=canonical
-        )
-
-    @staticmethod
-    def get_section_type(tag_name: str, class_names: List[str], text_sample: str) -> str:
-        class_str = " ".join(class_names).lower()
-        if tag_name == "nav" or "nav" in class_str:
-            return "nav"
-        if tag_name == "footer" or "footer" in class_str:
-            return "footer"
-        if "hero" in class_str:
-            return "hero"
-        if "faq" in class_str:
-            return "faq"
-        if "price" in class_str or "pricing" in class_str:
-            return "pricing"
-        if tag_name == "ul" or tag_name == "ol":
-            return "list"
-        # Heuristic for grid? maybe later
-        return "section"
-
-    @staticmethod
-    def get_section_label(elem: Tag, text: str) -> str:
-        # 1. Try to find a heading inside
-        heading = elem.find(["h1", "h2", "h3", "h4", "h5", "h6"])
-        if heading:
-            return ScraperUtils.clean_text(heading.get_text(separator=" ", strip=True))
-        
-        # 2. Use aria-label if present
-        if elem.get("aria-label"):
-            return ScraperUtils.clean_text(elem.get("aria-label"))
-            
-        # 3. Heuristic for Nav/Footer based on tag name
-        if elem.name == 'nav':
-            return "Navigation"
-        if elem.name == 'footer':
-            return "Footer"
-
-        # 4. Fallback to first few words
-        # Take up to 10 words, but ensure we don't grab a giant mashed string
-        words = text.split()
-        if words:
-            # Join first 5 words
-            label = " ".join(words[:5])
-            # Cap at 50 chars
-            if len(label) > 50:
-                return label[:47] + "..."
-            return label
-        
-        return "Untitled Section"
-
-    @staticmethod
-    def parse_sections(soup: BeautifulSoup, base_url: str) -> List[Section]:
-        sections = []
-        
-        # Remove noise
-        for selector in NOISE_SELECTORS:
-            for noise in soup.select(selector):
-                noise.decompose()
-        
-        # Identify section candidates
-        # We start with semantic tags, then fall back to divs with substantial content if needed.
-        candidates = soup.find_all(SECTION_TAGS)
-        
-        # Add common content wrappers
-        div_candidates = soup.find_all("div", class_=re.compile(r"content|main|article|body|entry", re.I))
-        candidates.extend(div_candidates)
-
-        if not candidates:
-             if soup.body:
-                 candidates = [soup.body]
-             elif soup.html:
-                 candidates = [soup.html]
-             else:
-                 candidates = []
-
-        seen_ids = set()
-        
-        for idx, elem in enumerate(candidates):
-            if elem is None: continue
-            
-            # Use ID if present, else generate one
-            sec_id = elem.get("id")
-            if not sec_id:
-                sec_id = f"{elem.name}-{idx}"
-            
-            # Ensure unique ID
-            counter = 1
-            original_sec_id = sec_id
-            while sec_id in seen_ids:
-                sec_id = f"{original_sec_id}-{counter}"
-                counter += 1
-            seen_ids.add(sec_id)
-
-            # Extract content
-            text_content = ScraperUtils.clean_text(elem.get_text(separator=" ", strip=True))
-            if len(text_content) < MIN_TEXT_LENGTH_FOR_SECTION and elem.name != 'img':
-                continue # Skip empty sections
-
-            headings = [ScraperUtils.clean_text(h.get_text(separator=" ", strip=True)) for h in elem.find_all(HEADING_TAGS)]
-            
-            links = []
-            for a in elem.find_all("a", href=True):
-                href = urljoin(base_url, a["href"])
-                links.append(Link(text=ScraperUtils.clean_text(a.get_text()), href=href))
-            
-            images = []
-            for img in elem.find_all("img", src=True):
-                src = urljoin(base_url, img["src"])
-                alt = img.get("alt", "")
-                images.append(Image(src=src, alt=alt))
-            
-            lists = []
-            for ul in elem.find_all(["ul", "ol"]):
-                items = [ScraperUtils.clean_text(li.get_text(separator=" ", strip=True)) for li in ul.find_all("li")]
-                if items:
-                    lists.append(items)
-            
-            tables = [] # Placeholder logic for tables
-            for table in elem.find_all("table"):
-                # heavily simplified table parsing
-                rows_data = []
-                for tr in table.find_all("tr"):
-                     cells = [ScraperUtils.clean_text(td.get_text()) for td in tr.find_all(["td", "th"])]
-                     rows_data.append(cells)
-                tables.append(rows_data)
-
-            raw_html, truncated = ScraperUtils.truncate_html(str(elem))
-            
-            sec_type = ScraperUtils.get_section_type(elem.name, elem.get("class", []), text_content)
-            label = ScraperUtils.get_section_label(elem, text_content)
-
-            sections.append(Section(
-                id=sec_id,
-                type=sec_type,
-                label=label,
-                sourceUrl=base_url,
-                content=SectionContent(
-                    headings=headings,
-                    text=text_content,
-                    links=links,
-                    images=images,
-                    lists=lists,
-                    tables=tables
-                ),
-                rawHtml=raw_html,
-                truncated=truncated
-            ))
-            
-        return sections
+from app.browser_pool import browser_pool
+from app.http_client import (
+    http_client, decode_html, read_body, unsupported_content_type, looks_binary, parse_retry_after, PhaseTrace
+)
+from app.extraction import ScraperUtils, ALL_FIELDS, SKIPPABLE_FIELDS
+# Moved to app.extraction; still importable from here
+from app.extraction import (  # noqa: F401
+    MAX_RAW_HTML_LENGTH, MIN_TEXT_LENGTH_FOR_SECTION, NOISE_SELECTORS, SECTION_TAGS, HEADING_TAGS
+)
+from app.limits import (
+    static_limiter, dynamic_limiter, host_limiter, backoff_delay, HostThrottled, RETRY_STATUSES, THROTTLE_STATUSES
+)
+from app.config import BATCH_CONCURRENCY, PARSER_BACKEND, FETCH_MAX_BYTES
+from app.cache import CacheEntry, result_cache, normalize_url
+from app.snapshots import Snapshot, snapshot_store, diff_sections
+from app.archive import html_archive
+from app.sessions import session_store
+from app.singleflight import SingleFlight
+from app.page_wait import PageSettler
+from app.interception import RequestInterceptor
+from app.strategy import strategy_table, STATIC, DYNAMIC, RACE
+from app.metrics import PhaseTimer, scrape_metrics, timed, timing
 
 class StaticScraper:
-    async def scrape(self, url: str) -> Tuple[Optional[str], Optional[MetaData], List[Section], List[Error]]:
+    def __init__(self):
+        # Response validators for the result cache; not_modified is set on a 304
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.not_modified = False
+        # Set when the response is not a document at all (the browser would not do better)
+        self.rejected = False
+        # Set when the host still answered 429/503 after the retries (the browser would be throttled too)
+        self.throttled = False
+        # Hash of the fetched body; unchanged is set (and extraction skipped) when it
+        # equals the known_hash passed in
+        self.document_hash: Optional[str] = None
+        self.unchanged = False
+
+    async def scrape(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None, backend: str = PARSER_BACKEND, layout: str = "flat", fields: FrozenSet[str] = ALL_FIELDS, known_hash: Optional[str] = None) -> Tuple[Optional[str], Optional[MetaData], List[Section], List[Error]]:
         errors = []
         try:
             # Use a modern User-Agent to avoid blocks
@@ -229,80 +55,163 @@ class StaticScraper:
             headers = {
                 "User-Agent": user_agent,
             }
+            # Conditional request when revalidating a stale cached result
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
             
-            # Use requests in a thread (more reliable than httpx for some targets)
-            def fetch():
-                return requests.get(url, headers=headers, timeout=10)
-            
-            response = await asyncio.to_thread(fetch)
-            response.raise_for_status()
+            fetched = await self._fetch(url, headers, errors)
+            if fetched is None:
+                return None, None, [], errors
+            response, content, truncated = fetched
+            self.etag = response.headers.get("etag")
+            self.last_modified = response.headers.get("last-modified")
+            if looks_binary(response, content):
+                self.rejected = True
+                errors.append(Error(message="Response body is binary data, not a document.", phase="resource_limit"))
+                return None, None, [], errors
+            self.document_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+            if known_hash is not None and self.document_hash == known_hash and not truncated:
+                self.unchanged = True
+                return None, None, [], errors
+            if truncated:
+                errors.append(Error(
+                    message=f"Response body exceeded {FETCH_MAX_BYTES} bytes; only the first {FETCH_MAX_BYTES} were parsed.",
+                    phase="resource_limit"
+                ))
             
             # Fix encoding issues (mojibake)
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = response.apparent_encoding
-                
-            html = response.text
+            html = decode_html(response, content)
             
-            soup = BeautifulSoup(html, "lxml")
-            meta = ScraperUtils.extract_meta(soup, url)
-            sections = ScraperUtils.parse_sections(soup, url)
+            meta, sections, limit_errors = await ScraperUtils.extract(html, url, "lxml", backend, layout, fields)
+            errors.extend(limit_errors)
             
             return html, meta, sections, errors
+        except HostThrottled as e:
+            self.throttled = True
+            errors.append(Error(message=str(e), phase="rate_limit"))
+            return None, None, [], errors
         except Exception as e:
             errors.append(Error(message=f"Static fetch failed: {str(e)}", phase="static_fetch"))
             return None, None, [], errors
 
+    async def _fetch(self, url: str, headers: Dict[str, str], errors: List[Error]) -> Optional[Tuple[httpx.Response, bytes, bool]]:
+        # Response and (possibly truncated) body, or None when there is nothing to parse.
+        # Throttling and gateway/connection failures are retried with backoff.
+        # Shared pooled client: keep-alive connections, HTTP/2 when available, cached DNS
+        client = await http_client.get_client()
+        attempt = 1
+        while True:
+            async with static_limiter.slot(url), host_limiter.slot(url) as permit:
+                try:
+                    # Streamed so oversized and non-HTML bodies are cut off instead of buffered whole
+                    async with client.stream("GET", url, headers=headers, extensions={"trace": PhaseTrace()}) as response:
+                        retry_after = parse_retry_after(response.headers.get("retry-after"))
+                        permit.observe(response.status_code, retry_after)
+                        delay = backoff_delay(attempt, retry_after) if response.status_code in RETRY_STATUSES else None
+                        if delay is None:
+                            if response.status_code in THROTTLE_STATUSES:
+                                self.throttled = True
+                                wait = f"; it asked to retry after {retry_after:.0f}s" if retry_after is not None else ""
+                                errors.append(Error(
+                                    message=f"Rate limited by host (HTTP {response.status_code}) after {attempt} attempt(s){wait}.",
+                                    phase="rate_limit"
+                                ))
+                                return None
+                            if response.status_code == 304:
+                                self.not_modified = True
+                                return None
+                            response.raise_for_status()
+                            media_type = unsupported_content_type(response)
+                            if media_type:
+                                self.rejected = True
+                                errors.append(Error(message=f"Unsupported content type: {media_type}", phase="resource_limit"))
+                                return None
+                            content, truncated = await read_body(response, FETCH_MAX_BYTES)
+                            return response, content, truncated
+                except httpx.TransportError:
+                    permit.observe(None)
+                    delay = backoff_delay(attempt)
+                    if delay is None:
+                        raise
+            # Slots are given back while waiting
+            with timed("retry_wait", str(attempt)):
+                await asyncio.sleep(delay)
+            attempt += 1
+
 class PlaywrightScraper:
     @staticmethod
-    async def scrape(url: str, depth: int = 3) -> Tuple[Optional[str], Optional[MetaData], List[Section], Interactions, List[Error]]:
+    async def scrape(url: str, depth: int = 3, options: Optional[ScrapeOptions] = None) -> Tuple[Optional[str], Optional[MetaData], List[Section], Interactions, List[Error], Optional[ResourceStats]]:
+        options = options or ScrapeOptions()
         errors = []
         interactions = Interactions()
+        interceptor = RequestInterceptor(options.blockProfile)
         
-        async with async_playwright() as p:
-            try:
-                # Add args to reduce detection
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        "--disable-blink-features=AutomationControlled",
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-dev-shm-usage",
-                        "--disable-accelerated-2d-canvas",
-                        "--no-first-run",
-                        "--no-zygote",
-                        "--disable-gpu",
-                    ]
-                )
-                
+        try:
+            # Cookies and localStorage from the host's last successful scrape: consent
+            # choices and passed challenges carry over
+            session = None
+            if options.reuseSession:
+                with timed("session_restore"):
+                    session = await session_store.get(url)
+            if session is not None:
+                user_agent = session.user_agent
+                session_options = {"storage_state": session.state}
+            else:
                 ua = UserAgent()
                 user_agent = ua.random
+                session_options = {}
+            storage_state = None
 
-                context = await browser.new_context(
-                    user_agent=user_agent,
-                    viewport={"width": 1920, "height": 1080},
-                    device_scale_factor=1,
-                    locale="en-US",
-                )
-                
+            async with dynamic_limiter.slot(url), host_limiter.slot(url) as permit, browser_pool.context(
+                user_agent=user_agent,
+                viewport={"width": 1920, "height": 1080},
+                device_scale_factor=1,
+                locale="en-US",
+                **session_options,
+            ) as context:
                 page = await context.new_page()
                 await stealth(page)
+                # Adaptive waits return once the DOM and network go quiet; fixed mode sleeps
+                settler = PageSettler(page, options.waitMode)
+                await settler.install()
+                # Abort images/fonts/media/trackers we never use (per the request's profile)
+                await interceptor.install(page)
                 
                 # Navigate
+                observed = False
                 try:
-                    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                    await page.wait_for_timeout(3000) 
+                    ready_started = time.perf_counter()
+                    with timed("navigation"):
+                        response = await page.goto(url, wait_until="domcontentloaded", timeout=settler.timeout_ms(60000))
+                        if response is not None:
+                            observed = True
+                            permit.observe(response.status, parse_retry_after(await response.header_value("retry-after")), timed=False)
+                        await settler.settle(3000)
+                    if response is not None and response.status in THROTTLE_STATUSES:
+                        errors.append(Error(message=f"Rate limited by host (HTTP {response.status}).", phase="rate_limit"))
 
-                    # Attempt to handle cookie banners simply
-                    try:
-                        accept_btn = await page.query_selector("button:has-text('Accept'), button:has-text('Agree'), #onetrust-accept-btn-handler")
-                        if accept_btn:
-                            await accept_btn.click(timeout=2000)
-                            await page.wait_for_timeout(1000)
-                    except:
-                        pass
+                    if session is not None and session.consented and options.skipConsentBanner:
+                        # Consent was given in the restored session; the banner should not show
+                        session_store.banner_skipped()
+                    else:
+                        # Attempt to handle cookie banners simply
+                        try:
+                            with timed("interaction", "cookie banner"):
+                                accept_btn = await page.query_selector("button:has-text('Accept'), button:has-text('Agree'), #onetrust-accept-btn-handler")
+                                if accept_btn:
+                                    await accept_btn.click(timeout=settler.timeout_ms(2000))
+                                    await settler.settle(1000)
+                        except:
+                            pass
+                    if options.reuseSession:
+                        session_store.observe_ready(session is not None, time.perf_counter() - ready_started)
 
                 except Exception as e:
+                    if not observed:
+                        # No response (timeout, connection error): counts against the host like a failed fetch
+                        permit.observe(None, timed=False)
                     errors.append(Error(message=f"Navigation timeout or error: {str(e)}", phase="navigation"))
                 
                 interactions.pages.append(page.url)
@@ -319,87 +228,265 @@ class PlaywrightScraper:
                 ]
                 
                 for selector in interaction_selectors:
+                    if settler.expired:
+                        break
                     try:
                         elements = await page.query_selector_all(selector)
                         for i, handle in enumerate(elements[:3]): # Limit to first 3
+                            if settler.expired:
+                                break
                             if await handle.is_visible():
-                                await handle.click(timeout=1000)
-                                interactions.clicks.append(selector)
-                                await page.wait_for_timeout(500) 
+                                with timed("interaction", selector):
+                                    await handle.click(timeout=settler.timeout_ms(1000))
+                                    interactions.clicks.append(selector)
+                                    await settler.settle(500)
                     except Exception:
                         pass 
 
                 # 2. Infinite Scroll / Pagination
+                # In adaptive mode scrolling stops as soon as the page stops growing
+                last_height = None
                 for _ in range(depth):
+                    if settler.expired:
+                        break
                     try:
-                        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                        await page.wait_for_timeout(1500) 
+                        with timed("scroll", str(interactions.scrolls + 1)):
+                            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                            await settler.settle(1500)
                         interactions.scrolls += 1
+                        if settler.adaptive:
+                            height = await page.evaluate("document.body.scrollHeight")
+                            if last_height is not None and height <= last_height:
+                                break
+                            last_height = height
                         
                     except Exception as e:
                         errors.append(Error(message=f"Scroll error: {str(e)}", phase="interaction"))
 
+                if settler.expired:
+                    errors.append(Error(message="Page time budget exhausted; remaining interactions were skipped.", phase="interaction"))
+
                 if page.url not in interactions.pages:
                     interactions.pages.append(page.url)
 
                 # Get Content
-                content = await page.content()
-                soup = BeautifulSoup(content, "html.parser")
-                
-                meta = ScraperUtils.extract_meta(soup, url)
-                sections = ScraperUtils.parse_sections(soup, url)
-                
-                await browser.close()
-                return content, meta, sections, interactions, errors
+                if options.extractMode == "browser":
+                    # Sections are built from the live DOM; no HTML string is produced
+                    content = ""
+                    meta, sections, limit_errors = await ScraperUtils.extract_in_page(
+                        page, url, options.sectionLayout, ScraperUtils.section_fields(options))
+                else:
+                    with timed("dom_serialization"):
+                        content = await page.content()
+                    if len(content) > FETCH_MAX_BYTES:
+                        errors.append(Error(
+                            message=f"Rendered page exceeded {FETCH_MAX_BYTES} characters; only the first {FETCH_MAX_BYTES} were parsed.",
+                            phase="resource_limit"
+                        ))
+                        content = content[:FETCH_MAX_BYTES]
+
+                if options.reuseSession:
+                    try:
+                        storage_state = await context.storage_state()
+                    except Exception:
+                        pass
 
-            except Exception as e:
-                errors.append(Error(message=str(e), phase="playwright_setup"))
-                return None, None, [], interactions, errors
+            if options.extractMode != "browser":
+                meta, sections, limit_errors = await ScraperUtils.extract(
+                    content, url, "html.parser", options.parserBackend, options.sectionLayout,
+                    ScraperUtils.section_fields(options))
+            errors.extend(limit_errors)
+            if storage_state is not None and sections and not any(e.phase == "rate_limit" for e in errors):
+                with timed("session_save"):
+                    await session_store.put(url, storage_state, user_agent)
+            
+            return content, meta, sections, interactions, errors, interceptor.stats
+
+        except HostThrottled as e:
+            errors.append(Error(message=str(e), phase="rate_limit"))
+            return None, None, [], interactions, errors, None
+        except Exception as e:
+            errors.append(Error(message=str(e), phase="playwright_setup"))
+            return None, None, [], interactions, errors, None
 
 # Main Scraper Orchestrator
 class UniversalScraper:
+    # Concurrent scrapes of the same normalized URL with the same options share one run
+    inflight = SingleFlight()
+
     @staticmethod
-    async def scrape(url: str) -> ScrapeResult:
-        try:
-            # 1. Try Static First
-            static_scraper = StaticScraper()
-            html, meta, sections, static_errors = await static_scraper.scrape(url)
-            
-            needs_fallback = False
-            
-            # Updated Heuristics
-            if not html:
+    async def scrape(url: str, options: Optional[ScrapeOptions] = None) -> ScrapeResult:
+        options = options or ScrapeOptions()
+        key = (normalize_url(url), options.model_dump_json())
+        return await UniversalScraper.inflight.do(key, lambda: UniversalScraper._scrape(url, options))
+
+    @staticmethod
+    def needs_fallback(html: Optional[str], meta: Optional[MetaData], sections: List[Section]) -> bool:
+        needs_fallback = False
+        
+        # Updated Heuristics
+        if not html:
+            needs_fallback = True
+        elif not sections:
+            needs_fallback = True
+        else:
+            total_text = sum(len(s.content.text) for s in sections)
+            if total_text < 300: # Increased threshold
                 needs_fallback = True
-            elif not sections:
+            
+            suspicious_titles = ["Access Denied", "Just a moment", "Challenge", "Security Check", "Robot", "Captcha"]
+            if meta and meta.title:
+                for t in suspicious_titles:
+                    if t.lower() in meta.title.lower():
+                        needs_fallback = True
+                        break
+            # Check for body-only simplistic fails
+            if len(sections) == 1 and sections[0].content.text == "":
                 needs_fallback = True
+
+        if html and ("You need to enable JavaScript" in html or "Loading..." in html):
+            needs_fallback = True
+        return needs_fallback
+
+    @staticmethod
+    def _from_cache(cached: CacheEntry, layout: str) -> Optional[ScrapeResult]:
+        # A tree entry serves flat requests too; a flat one cannot rebuild the tree
+        result = cached.result()
+        if result.sectionTree is None:
+            return result if layout == "flat" else None
+        if layout == "tree":
+            return result
+        return result.model_copy(update={"sections": ScraperUtils.flatten_sections(result.sectionTree), "sectionTree": None})
+
+    @staticmethod
+    async def _scrape(url: str, options: ScrapeOptions) -> ScrapeResult:
+        # Phases recorded anywhere below (fetch, parse, browser) land in this timer
+        timer = PhaseTimer()
+        with timing(timer):
+            if options.diff:
+                result, outcome = await UniversalScraper._diff(url, options)
             else:
-                total_text = sum(len(s.content.text) for s in sections)
-                if total_text < 300: # Increased threshold
-                    needs_fallback = True
-                
-                suspicious_titles = ["Access Denied", "Just a moment", "Challenge", "Security Check", "Robot", "Captcha"]
-                if meta and meta.title:
-                    for t in suspicious_titles:
-                        if t.lower() in meta.title.lower():
-                            needs_fallback = True
-                            break
-                # Check for body-only simplistic fails
-                if len(sections) == 1 and sections[0].content.text == "":
-                    needs_fallback = True
-    
-            if html and ("You need to enable JavaScript" in html or "Loading..." in html):
+                result, outcome, _ = await UniversalScraper._run(url, options)
+        scrape_metrics.observe(timer, outcome)
+        if options.includeTimings:
+            # Added after caching so cached results never carry another request's timings
+            result = result.model_copy(update={"timings": timer.to_model()})
+        return result
+
+    @staticmethod
+    async def _diff(url: str, options: ScrapeOptions) -> Tuple[ScrapeResult, str]:
+        # Scrape, then keep only the sections that differ from the previous snapshot
+        key = snapshot_store.key(url, options.sectionLayout, ScraperUtils.section_fields(options))
+        with timed("snapshot_lookup"):
+            snapshot = await snapshot_store.get(key)
+        result, outcome, document_hash = await UniversalScraper._run(url, options, snapshot)
+        sections = result.sectionTree if options.sectionLayout == "tree" else result.sections
+        if not sections:
+            # Failed scrape: nothing to compare, and the snapshot is kept
+            return result, outcome
+        if document_hash is None and snapshot is not None:
+            # Not a static fetch (revalidated cache entry, browser): the stored hash still
+            # describes the last fetched document and keeps the fast path working
+            document_hash = snapshot.document_hash
+        with timed("snapshot_store"):
+            await snapshot_store.put(key, result, document_hash)
+        previous = []
+        if snapshot is not None:
+            baseline = snapshot.result()
+            previous = baseline.sectionTree if options.sectionLayout == "tree" else baseline.sections
+        changed, diff = diff_sections(previous, sections, snapshot.scraped_at if snapshot else None)
+        field = "sectionTree" if options.sectionLayout == "tree" else "sections"
+        return result.model_copy(update={field: changed, "diff": diff}), outcome
+
+    @staticmethod
+    async def _run(url: str, options: ScrapeOptions, snapshot: Optional[Snapshot] = None) -> Tuple[ScrapeResult, str, Optional[str]]:
+        # Also returns the hash of the statically fetched document (None for cached and browser results)
+        dynamic_task = None
+        try:
+            # 0. Cached result (a stale static one, or any one in diff mode, is revalidated
+            # by the static fetch)
+            cached, cached_result = None, None
+            # Projected scrapes skip fields; a cached full result serves them too, except
+            # in diff mode, where fingerprints must come from the same fields
+            fields = ScraperUtils.section_fields(options)
+            if options.bypassCache or (options.diff and fields != ALL_FIELDS):
+                result_cache.bypass()
+            else:
+                with timed("cache_lookup"):
+                    cached, fresh = await result_cache.lookup(url)
+                if cached is not None:
+                    cached_result = UniversalScraper._from_cache(cached, options.sectionLayout)
+                    if cached_result is None:
+                        cached = None
+                    elif fresh and not options.diff:
+                        # Diff mode always asks the site (conditionally): a fresh cache
+                        # entry can be up to an hour behind the page
+                        return cached_result, "cache", None
+
+            # Learned per-domain strategy. A cached static result is revalidated by the static
+            # fetch; a JS-rendered one (diff mode) cannot be, so the table decides as usual
+            revalidate = cached is not None and cached.revalidatable
+            strategy = STATIC if cached is not None and cached.source == "static" else strategy_table.choose(url)
+            static_scraper = StaticScraper()
+            if strategy == RACE:
+                # Undecided domain: start the browser alongside the static fetch
+                dynamic_task = asyncio.create_task(PlaywrightScraper.scrape(url, options=options))
+
+            if strategy == DYNAMIC:
+                # Known JS domain: skip the doomed static attempt
+                html, meta, sections, static_errors = None, None, [], []
                 needs_fallback = True
+            else:
+                # 1. Try Static First
+                html, meta, sections, static_errors = await static_scraper.scrape(
+                    url,
+                    etag=cached.etag if revalidate else None,
+                    last_modified=cached.last_modified if revalidate else None,
+                    backend=options.parserBackend,
+                    layout=options.sectionLayout,
+                    fields=fields,
+                    known_hash=snapshot.document_hash if snapshot else None,
+                )
+                if options.archiveHtml and html:
+                    await html_archive.add(url, html, "static")
+                if static_scraper.not_modified:
+                    await result_cache.mark_revalidated(url, cached)
+                    return cached_result, "cache", None
+                if static_scraper.unchanged:
+                    # Same document as the snapshot: its sections are still current
+                    result = snapshot.result().model_copy(update={"scrapedAt": datetime.now(timezone.utc).isoformat()})
+                    return result, "unchanged", static_scraper.document_hash
+                flat_sections = ScraperUtils.flatten_sections(sections) if options.sectionLayout == "tree" else sections
+                needs_fallback = UniversalScraper.needs_fallback(html, meta, flat_sections)
+                if static_scraper.throttled:
+                    # The host is rate limiting us: a browser would get the same answer, and
+                    # it says nothing about whether the domain needs one
+                    needs_fallback = False
+                else:
+                    strategy_table.record_static(url, not needs_fallback)
+                if static_scraper.rejected:
+                    # An image, PDF or archive: a browser would not find sections in it either
+                    needs_fallback = False
     
             final_sections = sections if sections else []
             final_meta = meta
             interactions = Interactions()
             final_errors = static_errors
+            source = "static"
+            resources = None
     
             if needs_fallback:
                 # 2. Playwright Fallback
-                dynamic_content, dynamic_meta, dynamic_sections, dyn_interactions, dyn_errors = await PlaywrightScraper.scrape(url)
+                if dynamic_task is None:
+                    dynamic_task = asyncio.create_task(PlaywrightScraper.scrape(url, options=options))
+                dynamic_content, dynamic_meta, dynamic_sections, dyn_interactions, dyn_errors, resources = await dynamic_task
+                if options.archiveHtml and dynamic_content:
+                    # Empty in extractMode="browser": no HTML string is produced
+                    await html_archive.add(url, dynamic_content, "dynamic")
+                strategy_table.record_dynamic(url, dynamic_content is not None and bool(dynamic_sections))
                 
-                if dynamic_content: 
+                if dynamic_content is not None: 
+                    source = "dynamic"
                     final_sections = dynamic_sections
                     final_meta = dynamic_meta
                     interactions = dyn_interactions
@@ -412,7 +499,12 @@ class UniversalScraper:
                 
                 # Check for definitive block signals in errors
                 is_blocked = any("403" in e.message or "Access Denied" in e.message for e in final_errors)
-                if is_blocked:
+                if any(e.phase == "rate_limit" for e in final_errors):
+                    final_errors.append(Error(
+                        message="The host is rate limiting requests; retry later or lower the request rate.",
+                        phase="analysis_tip"
+                    ))
+                elif is_blocked:
                     error_msg = "Scraping Blocked (Anti-Bot Defense Detected)."
                     final_errors.append(Error(
                         message="Target site is using advanced protection (e.g., Akamai, Cloudflare). Standard scrapers cannot bypass this without residential proxies.",
@@ -429,14 +521,23 @@ class UniversalScraper:
             if not final_meta:
                 final_meta = MetaData()
     
-            return ScrapeResult(
+            result = ScrapeResult(
                 url=url,
                 scrapedAt=datetime.now(timezone.utc).isoformat(),
                 meta=final_meta,
-                sections=final_sections,
+                sections=final_sections if options.sectionLayout == "flat" else [],
+                sectionTree=final_sections if options.sectionLayout == "tree" else None,
                 interactions=interactions,
-                errors=final_errors
+                errors=final_errors,
+                resources=resources
             )
+            if final_sections and fields.issuperset(SKIPPABLE_FIELDS):
+                with timed("cache_store"):
+                    await result_cache.store(url, result, static_scraper.etag, static_scraper.last_modified, source)
+            document_hash = static_scraper.document_hash if source == "static" else None
+            if not needs_fallback:
+                return result, "static", document_hash
+            return result, "fallback" if source == "dynamic" else "fallback_failed", document_hash
         except Exception as e:
             # THIS IS THE CATCH-ALL TO PREVENT 500s or NotImplementedErrors bubbling up
             import traceback
@@ -448,4 +549,34 @@ class UniversalScraper:
                 sections=[],
                 interactions=Interactions(),
                 errors=[Error(message=f"CRITICAL SCRAPER ERROR: {str(e)}", phase="core_engine")]
-            )
+            ), "error", None
+        finally:
+            # A raced browser scrape is dropped once static won (or on error/cancellation)
+            if dynamic_task is not None and not dynamic_task.done():
+                dynamic_task.cancel()
+
+    @staticmethod
+    async def scrape_many(urls: Iterable[str], options: Optional[ScrapeOptions] = None, concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[ScrapeResult]:
+        # Yields results in completion order with at most `concurrency` scrapes in flight,
+        # so memory stays flat however many URLs are fed in. Static/dynamic and per-host
+        # limits are enforced further down by the limiters.
+        pending = set()
+        url_iter = iter(urls)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max(1, concurrency):
+                    url = next(url_iter, None)
+                    if url is None:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.create_task(UniversalScraper.scrape(url, options)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # Client went away or the consumer stopped early
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.config import SESSIONS_DB_PATH, SESSION_TTL, SESSION_MAX_ENTRIES, SESSION_MAX_BYTES
+
+# Cookie or localStorage names that record a consent choice (Cookiebot, OneTrust, TCF,
+# Didomi, CookieYes, Complianz, Borlabs, iubenda, Axeptio, Usercentrics, Google, generic)
+CONSENT_NAME = re.compile(
+    r"consent|optanonalertboxclosed|didomi_token|cmplz_|borlabs-cookie|_iub_cs|axeptio|cookielawinfo"
+    r"|uc_settings|ucdata|cookies?_?(accepted|notice|policy)|gdpr|^socs$",
+    re.I,
+)
+# Set on the first visit, before the visitor chose anything
+NOT_CONSENT = frozenset(("optanonconsent",))
+
+def _matches_host(domain: str, host: str) -> bool:
+    domain = domain.lstrip(".").lower()
+    return host == domain or host.endswith("." + domain)
+
+def has_consent(state: Dict[str, Any], host: str) -> bool:
+    # A consent cookie or localStorage entry for the host: the banner was answered before
+    def consent(name: str) -> bool:
+        return bool(CONSENT_NAME.search(name)) and name.lower() not in NOT_CONSENT
+    for cookie in state.get("cookies", []):
+        if consent(cookie.get("name", "")) and _matches_host(cookie.get("domain", ""), host):
+            return True
+    for origin in state.get("origins", []):
+        if (urlparse(origin.get("origin", "")).hostname or "") != host:
+            continue
+        if any(consent(item.get("name", "")) for item in origin.get("localStorage", [])):
+            return True
+    return False
+
+class Session:
+    def __init__(self, state: Dict[str, Any], user_agent: str, host: str):
+        # Playwright storage_state: {"cookies": [...], "origins": [{"origin", "localStorage"}]}
+        self.state = state
+        # Challenge clearance cookies are tied to the user agent that earned them
+        self.user_agent = user_agent
+        self.consented = has_consent(state, host)
+
+class SessionStore:
+    """Playwright storage state (cookies, localStorage) per host, in SQLite. Entries
+    expire after the TTL; the least recently saved are dropped past the size cap."""
+
+    def __init__(self, path: str = SESSIONS_DB_PATH, ttl: float = SESSION_TTL,
+                 max_entries: int = SESSION_MAX_ENTRIES, max_bytes: int = SESSION_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0, "tooLarge": 0, "bannerSkips": 0,
+        }
+        # Navigation plus cookie banner step, with and without a restored session
+        self._ready: Dict[bool, List[float]] = {True: [0, 0.0], False: [0, 0.0]}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "host TEXT PRIMARY KEY, state TEXT, user_agent TEXT, saved_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_saved ON sessions(saved_at)")
+        return self._conn
+
+    def _get(self, host: str) -> Optional[Tuple[str, str, float]]:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT state, user_agent, saved_at FROM sessions WHERE host = ?", (host,)
+            ).fetchone()
+
+    def _put(self, host: str, state: str, user_agent: str) -> int:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)", (host, state, user_agent, time.time()))
+            evicted = conn.execute(
+                "DELETE FROM sessions WHERE host IN (SELECT host FROM sessions ORDER BY saved_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            conn.commit()
+        return evicted
+
+    def _delete(self, host: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM sessions WHERE host = ?", (host,))
+            conn.commit()
+
+    async def get(self, url: str) -> Optional[Session]:
+        host = self.host_of(url)
+        row = await self._call(self._get, host)
+        if row is not None and time.time() - row[2] > self.ttl:
+            self.counters["expired"] += 1
+            await self._call(self._delete, host)
+            row = None
+        if row is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        state = json.loads(row[0])
+        # Cookies that expired since the save would only be dropped by the browser
+        now = time.time()
+        state["cookies"] = [c for c in state.get("cookies", []) if not 0 <= c.get("expires", -1) < now]
+        return Session(state, row[1], host)
+
+    async def put(self, url: str, state: Dict[str, Any], user_agent: str):
+        body = json.dumps(state, separators=(",", ":"))
+        if len(body) > self.max_bytes:
+            self.counters["tooLarge"] += 1
+            return
+        evicted = await self._call(self._put, self.host_of(url), body, user_agent)
+        self.counters["stores"] += 1
+        self.counters["evictions"] += evicted or 0
+
+    async def _call(self, fn, *args) -> Any:
+        # Best effort like the snapshot store: a broken store means fresh contexts
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except sqlite3.Error:
+            traceback.print_exc()
+            return None
+
+    def banner_skipped(self):
+        self.counters["bannerSkips"] += 1
+
+    def observe_ready(self, restored: bool, seconds: float):
+        entry = self._ready[restored]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        averages = {restored: (total / count if count else None) for restored, (count, total) in self._ready.items()}
+        saved = None
+        if averages[True] is not None and averages[False] is not None:
+            # Estimate: restored scrapes times how much sooner their pages were ready
+            saved = round(1000 * self._ready[True][0] * max(0.0, averages[False] - averages[True]), 1)
+        return {
+            **self.counters,
+            "hitRate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            "avgReadyMsRestored": round(1000 * averages[True], 1) if averages[True] is not None else None,
+            "avgReadyMsFresh": round(1000 * averages[False], 1) if averages[False] is not None else None,
+            "estimatedSavedMs": saved,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+session_store = SessionStore()
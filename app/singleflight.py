@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+from app.metrics import ProgressFanout, current_listener, fanout_context
+
+T = TypeVar("T")
+
+class _Call:
+    def __init__(self, task: asyncio.Task, progress: ProgressFanout):
+        self.task = task
+        self.waiters = 0
+        # Progress listeners of the callers still waiting (job event streams)
+        self.progress = progress
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight task and its result."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            progress = ProgressFanout()
+            call = _Call(asyncio.create_task(fn(), context=fanout_context(progress)), progress)
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        # Joiners get the phases from now on; a caller that goes away stops getting them
+        listener = current_listener()
+        if listener is not None:
+            call.progress.add(listener)
+        try:
+            # shield: one waiter being cancelled must not cancel the shared task
+            return await asyncio.shield(call.task)
+        finally:
+            if listener is not None:
+                call.progress.remove(listener)
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Last interested caller went away: stop the work and let the
+                # next caller start afresh instead of joining a cancelled task
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inFlight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
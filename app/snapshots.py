@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+from app.cache import normalize_url
+from app.config import SNAPSHOTS_DB_PATH, SNAPSHOT_MAX_ENTRIES
+from app.models import ScrapeResult, Section, SectionDiff, SectionNode
+
+class Snapshot:
+    def __init__(self, body: bytes, document_hash: Optional[str], scraped_at: str):
+        self.body = body
+        # Hash of the fetched document the result was extracted from (static fetches only)
+        self.document_hash = document_hash
+        self.scraped_at = scraped_at
+
+    def result(self) -> ScrapeResult:
+        return ScrapeResult.model_validate_json(self.body)
+
+def diff_sections(previous: List[Union[Section, SectionNode]], current: List[Union[Section, SectionNode]],
+                  since: Optional[str] = None) -> Tuple[List[Union[Section, SectionNode]], SectionDiff]:
+    # Unchanged: a previous section with the same fingerprint (ids shift when sections
+    # are inserted). Of the rest, a previous section with the same id was changed.
+    by_fingerprint: Dict[str, List[str]] = {}
+    for section in previous:
+        by_fingerprint.setdefault(section.fingerprint, []).append(section.id)
+    matched = set()
+    unmatched = []
+    for section in current:
+        ids = by_fingerprint.get(section.fingerprint)
+        if ids:
+            # Prefer the section that kept its id
+            matched.add(ids.pop(ids.index(section.id) if section.id in ids else 0))
+        else:
+            unmatched.append(section)
+    left = {section.id for section in previous if section.id not in matched}
+    diff = SectionDiff(since=since, unchanged=len(current) - len(unmatched))
+    for section in unmatched:
+        if section.id in left:
+            left.discard(section.id)
+            diff.changed.append(section.id)
+        else:
+            diff.added.append(section.id)
+    diff.removed = [section.id for section in previous if section.id in left]
+    return unmatched, diff
+
+class SnapshotStore:
+    """Last diff-mode result per URL and projection, in SQLite, least recently used dropped first."""
+
+    def __init__(self, path: str = SNAPSHOTS_DB_PATH, max_entries: int = SNAPSHOT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def key(url: str, layout: str, fields: FrozenSet[str]) -> str:
+        # Fingerprints only compare between scrapes that extracted the same fields
+        return f"{normalize_url(url)} {layout} {','.join(sorted(fields))}"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "key TEXT PRIMARY KEY, document_hash TEXT, scraped_at TEXT, body BLOB, updated_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS snapshots_updated ON snapshots(updated_at)")
+        return self._conn
+
+    def _get(self, key: str) -> Optional[Snapshot]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT body, document_hash, scraped_at FROM snapshots WHERE key = ?", (key,)
+            ).fetchone()
+        return Snapshot(row[0], row[1], row[2]) if row else None
+
+    def _put(self, key: str, snapshot: Snapshot):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                (key, snapshot.document_hash, snapshot.scraped_at, snapshot.body, time.time())
+            )
+            conn.execute(
+                "DELETE FROM snapshots WHERE key IN (SELECT key FROM snapshots ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    async def get(self, key: str) -> Optional[Snapshot]:
+        snapshot = await self._call(self._get, key)
+        self.counters["hits" if snapshot is not None else "misses"] += 1
+        return snapshot
+
+    async def put(self, key: str, result: ScrapeResult, document_hash: Optional[str]):
+        # Stored without timings or diff: the full result of the scrape
+        body = result.model_dump_json(exclude={"timings", "diff"}).encode()
+        await self._call(self._put, key, Snapshot(body, document_hash, result.scrapedAt))
+        self.counters["stores"] += 1
+
+    async def _call(self, fn, *args) -> Any:
+        # Best effort like the cache's disk tier: a broken store degrades to full results
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except sqlite3.Error:
+            traceback.print_exc()
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+snapshot_store = SnapshotStore()
@@ -3,6 +3,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const scrapeBtn = document.getElementById('scrapeBtn');
     const clearBtn = document.getElementById('clearBtn');
     const loadingDiv = document.getElementById('loading');
+    const loadingText = document.getElementById('loadingText');
+    const defaultLoadingText = loadingText.textContent;
     const resultsDiv = document.getElementById('results');
     const errorDiv = document.getElementById('error');
     
@@ -25,7 +27,10 @@ document.addEventListener('DOMContentLoaded', () => {
     const interactionsInfoDiv = document.getElementById('interactionsInfo');
     const downloadBtn = document.getElementById('downloadBtn');
 
+    // Summary of the shown result (no section content) and its id for /results/{id}/...
     let currentResult = null;
+    let currentResultId = null;
+    let sectionList = null;
 
     scrapeBtn.addEventListener('click', async () => {
         const url = urlInput.value.trim();
@@ -39,7 +44,8 @@ document.addEventListener('DOMContentLoaded', () => {
         scrapeBtn.textContent = 'Scraping...';
 
         try {
-            const response = await fetch('/scrape', {
+            // Queue a job and follow its progress instead of holding one long request open
+            const response = await fetch('/jobs', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -47,13 +53,20 @@ document.addEventListener('DOMContentLoaded', () => {
                 body: JSON.stringify({ url })
             });
 
-            const data = await response.json();
+            const job = await response.json();
             
             if (!response.ok) {
-                 throw new Error(data.detail || 'Failed to scrape URL');
+                 throw new Error(job.detail || 'Failed to queue scrape');
             }
 
-            currentResult = data.result;
+            const finished = await waitForJob(job.id);
+            if (finished.status !== 'done') {
+                 throw new Error(finished.error || `Scrape ${finished.status}`);
+            }
+
+            // Sections are fetched page by page as they are shown; only the summary is loaded here
+            currentResult = await fetchResultSummary(job.id);
+            currentResultId = job.id;
             
             // Check for explicit scraper errors even if 200 OK
             if (currentResult.errors && currentResult.errors.length > 0) {
@@ -67,22 +80,96 @@ document.addEventListener('DOMContentLoaded', () => {
             errorDiv.classList.remove('hidden');
         } finally {
             loadingDiv.classList.add('hidden');
+            loadingText.textContent = defaultLoadingText;
             scrapeBtn.disabled = false;
             scrapeBtn.textContent = 'Scrape URL';
         }
     });
 
+    const FINISHED = ['done', 'failed', 'cancelled'];
+
+    function showPhase(status, phase) {
+        if (status === 'queued') {
+            loadingText.textContent = 'Waiting in queue...';
+        } else if (phase) {
+            loadingText.textContent = `Working: ${phase.replace(/_/g, ' ')}...`;
+        }
+    }
+
+    async function fetchResultSummary(id) {
+        const response = await fetch(`/results/${id}`);
+        const summary = await response.json();
+        if (!response.ok) {
+            throw new Error(summary.detail || 'Failed to load scrape result');
+        }
+        return summary;
+    }
+
+    async function fetchSection(id, index) {
+        const response = await fetch(`/results/${id}/sections?offset=${index}&limit=1`);
+        const page = await response.json();
+        if (!response.ok) {
+            throw new Error(page.detail || 'Failed to load section');
+        }
+        return (page.sectionTree || page.sections)[0];
+    }
+
+    async function fetchJob(id) {
+        const response = await fetch(`/jobs/${id}`);
+        const job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.detail || 'Failed to load scrape job');
+        }
+        return job;
+    }
+
+    // Follows the job's event stream; falls back to polling if streaming is unavailable
+    function waitForJob(id) {
+        if (!window.EventSource) {
+            return pollJob(id);
+        }
+        return new Promise((resolve, reject) => {
+            const events = new EventSource(`/jobs/${id}/events`);
+            let status = 'queued';
+            events.addEventListener('phase', (e) => {
+                const data = JSON.parse(e.data);
+                if (data.state === 'started') showPhase(status, data.phase);
+            });
+            events.addEventListener('status', (e) => {
+                const data = JSON.parse(e.data);
+                status = data.status;
+                showPhase(status, data.phase);
+                if (FINISHED.includes(status)) {
+                    // The status event carries everything but the result, which is paged in later
+                    events.close();
+                    resolve(data);
+                }
+            });
+            events.onerror = () => {
+                events.close();
+                pollJob(id).then(resolve, reject);
+            };
+        });
+    }
+
+    async function pollJob(id) {
+        while (true) {
+            const job = await fetchJob(id);
+            showPhase(job.status, job.phase);
+            if (FINISHED.includes(job.status)) return job;
+            await new Promise(r => setTimeout(r, 1000));
+        }
+    }
+
     downloadBtn.addEventListener('click', () => {
-        if (!currentResult) return;
-        const blob = new Blob([JSON.stringify({ result: currentResult }, null, 2)], { type: 'application/json' });
-        const url = URL.createObjectURL(blob);
+        if (!currentResultId) return;
+        // Streamed by the server straight to disk; nothing is serialized in the page
         const a = document.createElement('a');
-        a.href = url;
+        a.href = `/results/${currentResultId}/download`;
         a.download = 'scrape-result.json';
         document.body.appendChild(a);
         a.click();
         document.body.removeChild(a);
-        URL.revokeObjectURL(url);
     });
 
     function renderErrorWarning(errors) {
@@ -120,7 +207,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
         // Render Sections
         sectionsListDiv.innerHTML = '';
-        if (result.sections.length === 0) {
+        sectionList = null;
+        if (result.sectionCount === 0) {
                 const blockedError = result.errors.find(e => e.phase === 'analysis_tip');
                 if (blockedError) {
                     sectionsListDiv.innerHTML = `
@@ -146,51 +234,8 @@ document.addEventListener('DOMContentLoaded', () => {
                     `;
                 }
         } else {
-            result.sections.forEach(section => {
-                const card = document.createElement('div');
-                card.className = 'section-card';
-                card.innerHTML = `
-                    <div class="section-header">
-                        <div class="section-title-group">
-                            <span class="badge">${section.type}</span>
-                            <h3>${escapeHtml(section.label)}</h3>
-                        </div>
-                        <span class="chevron">▼</span>
-                    </div>
-                    <div class="section-content">
-                        <pre>${escapeHtml(JSON.stringify(section, null, 2))}</pre>
-                    </div>
-                `;
-                
-                const header = card.querySelector('.section-header');
-                const content = card.querySelector('.section-content');
-                const chevron = card.querySelector('.chevron');
-                
-                header.addEventListener('click', () => {
-                   const isOpen = content.classList.contains('open');
-                   content.classList.toggle('open');
-                   chevron.style.transform = isOpen ? 'rotate(0deg)' : 'rotate(180deg)';
-                });
-
-                sectionsListDiv.appendChild(card);
-                
-                // Add copy functionality
-                const copyBtn = document.createElement('button');
-                copyBtn.className = 'copy-btn';
-                copyBtn.textContent = 'Copy JSON';
-                copyBtn.onclick = (e) => {
-                    e.stopPropagation();
-                    navigator.clipboard.writeText(JSON.stringify(section, null, 2));
-                    const originalText = copyBtn.textContent;
-                    copyBtn.textContent = 'Copied!';
-                    setTimeout(() => copyBtn.textContent = originalText, 2000);
-                };
-                
-                // Insert copy button into content area header or top right
-                // Let's put it inside the content div, top right
-                content.style.position = 'relative';
-                content.prepend(copyBtn);
-            });
+            sectionList = createSectionList(currentResultId, result.sections);
+            sectionsListDiv.appendChild(sectionList.element);
         }
 
         // Render Interactions
@@ -230,6 +275,176 @@ document.addEventListener('DOMContentLoaded', () => {
 
 
         resultsDiv.classList.remove('hidden');
+        // Cards are only built once the list has a size
+        if (sectionList) sectionList.render();
+    }
+
+    // Virtualized section list: only the cards in and near the visible part of the list
+    // exist. Collapsed cards share one measured height; expanded ones are measured after
+    // their JSON, fetched from the server on first expand, is shown.
+    const CARD_GAP = 16;
+    const OVERSCAN = 8;
+
+    window.addEventListener('resize', () => {
+        if (sectionList) sectionList.render();
+    });
+
+    function createSectionList(resultId, sections) {
+        const viewport = document.createElement('div');
+        viewport.className = 'sections-viewport';
+        const spacer = document.createElement('div');
+        spacer.className = 'sections-spacer';
+        viewport.appendChild(spacer);
+
+        let collapsedHeight = 82;
+        let measured = false;
+        const heights = new Array(sections.length).fill(collapsedHeight);
+        let offsets = [];
+        const cards = new Map();
+        const expanded = new Set();
+        const jsonCache = new Map();
+
+        function layout() {
+            offsets = new Array(sections.length + 1);
+            offsets[0] = 0;
+            for (let i = 0; i < sections.length; i++) {
+                offsets[i + 1] = offsets[i] + heights[i];
+            }
+            spacer.style.height = `${offsets[sections.length]}px`;
+            cards.forEach((card, i) => { card.style.top = `${offsets[i]}px`; });
+        }
+
+        function indexAt(y) {
+            // Last card starting at or above y
+            let lo = 0, hi = sections.length - 1;
+            while (lo < hi) {
+                const mid = (lo + hi + 1) >> 1;
+                if (offsets[mid] <= y) lo = mid; else hi = mid - 1;
+            }
+            return lo;
+        }
+
+        function buildCard(i) {
+            const section = sections[i];
+            const isOpen = expanded.has(i);
+            const card = document.createElement('div');
+            card.className = 'section-card';
+            card.innerHTML = `
+                <div class="section-header">
+                    <div class="section-title-group">
+                        <span class="badge">${escapeHtml(section.type)}</span>
+                        <h3>${escapeHtml(section.label)}</h3>
+                    </div>
+                    <span class="chevron" style="transform: rotate(${isOpen ? 180 : 0}deg)">▼</span>
+                </div>
+            `;
+            card.querySelector('.section-header').addEventListener('click', () => toggle(i));
+
+            if (isOpen) {
+                const content = document.createElement('div');
+                content.className = 'section-content open';
+                const json = jsonCache.get(i);
+                const pre = document.createElement('pre');
+                pre.textContent = json === undefined ? 'Loading...' : json;
+                if (json !== undefined) {
+                    const copyBtn = document.createElement('button');
+                    copyBtn.className = 'copy-btn';
+                    copyBtn.textContent = 'Copy JSON';
+                    copyBtn.onclick = (e) => {
+                        e.stopPropagation();
+                        navigator.clipboard.writeText(json);
+                        const originalText = copyBtn.textContent;
+                        copyBtn.textContent = 'Copied!';
+                        setTimeout(() => copyBtn.textContent = originalText, 2000);
+                    };
+                    content.appendChild(copyBtn);
+                }
+                content.appendChild(pre);
+                card.appendChild(content);
+            }
+            return card;
+        }
+
+        function refresh(i) {
+            // Rebuilds a shown card after it opened, closed or got its JSON
+            const old = cards.get(i);
+            if (old) {
+                const card = buildCard(i);
+                card.style.top = `${offsets[i]}px`;
+                old.replaceWith(card);
+                cards.set(i, card);
+                heights[i] = expanded.has(i) ? card.offsetHeight + CARD_GAP : collapsedHeight;
+            } else if (!expanded.has(i)) {
+                heights[i] = collapsedHeight;
+            }
+            layout();
+            render();
+        }
+
+        async function toggle(i) {
+            if (expanded.has(i)) {
+                expanded.delete(i);
+                refresh(i);
+                return;
+            }
+            expanded.add(i);
+            refresh(i);
+            if (!jsonCache.has(i)) {
+                try {
+                    jsonCache.set(i, JSON.stringify(await fetchSection(resultId, i), null, 2));
+                } catch (err) {
+                    expanded.delete(i);
+                    errorDiv.innerHTML = `<strong>Error:</strong> ${escapeHtml(err.message)}`;
+                    errorDiv.classList.remove('hidden');
+                }
+                refresh(i);
+            }
+        }
+
+        function render() {
+            if (!measured && sections.length > 0 && viewport.clientHeight > 0) {
+                // Real collapsed height, from a card rendered off the list
+                const probe = buildCard(0);
+                probe.style.visibility = 'hidden';
+                spacer.appendChild(probe);
+                collapsedHeight = probe.offsetHeight + CARD_GAP;
+                probe.remove();
+                measured = true;
+                for (let i = 0; i < sections.length; i++) {
+                    if (!expanded.has(i)) heights[i] = collapsedHeight;
+                }
+                layout();
+            }
+            const top = viewport.scrollTop;
+            const first = Math.max(0, indexAt(top) - OVERSCAN);
+            const last = Math.min(sections.length - 1, indexAt(top + viewport.clientHeight) + OVERSCAN);
+            cards.forEach((card, i) => {
+                if (i < first || i > last) {
+                    card.remove();
+                    cards.delete(i);
+                }
+            });
+            for (let i = first; i <= last; i++) {
+                if (!cards.has(i)) {
+                    const card = buildCard(i);
+                    card.style.top = `${offsets[i]}px`;
+                    cards.set(i, card);
+                    spacer.appendChild(card);
+                }
+            }
+        }
+
+        let scheduled = false;
+        viewport.addEventListener('scroll', () => {
+            if (scheduled) return;
+            scheduled = true;
+            requestAnimationFrame(() => {
+                scheduled = false;
+                render();
+            });
+        });
+        layout();
+        return { element: viewport, render };
     }
 
     function formatDate(isoString) {
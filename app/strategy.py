@@ -0,0 +1,290 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import traceback
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.config import (
+    STRATEGY_ENABLED, STRATEGY_MIN_SAMPLES, STRATEGY_DYNAMIC_THRESHOLD,
+    STRATEGY_STATIC_THRESHOLD, STRATEGY_HALF_LIFE, STRATEGY_MAX_WEIGHT,
+    STRATEGY_REPROBE_INTERVAL, STRATEGY_PATH, STRATEGY_MAX_DOMAINS
+)
+
+STATIC = "static"    # static first, Playwright only on fallback (original flow)
+DYNAMIC = "dynamic"  # known JS domain: straight to Playwright
+RACE = "race"        # undecided: run both, keep static if it passes the heuristics
+# Decayed weight below which a record says nothing any more and is dropped
+PRUNE_WEIGHT = 0.01
+
+class _Outcomes:
+    # Exponentially decayed success/attempt counts: old samples fade with time
+    # (half-life) and the window is capped so recent outcomes can flip a decision.
+    def __init__(self, attempts: float = 0.0, successes: float = 0.0, updated_at: float = 0.0):
+        self.attempts = attempts
+        self.successes = successes
+        self.updated_at = updated_at
+
+    def _factor(self, now: float, half_life: float) -> float:
+        if self.updated_at and half_life > 0:
+            return 0.5 ** (max(0.0, now - self.updated_at) / half_life)
+        return 1.0
+
+    def decay(self, now: float, half_life: float):
+        factor = self._factor(now, half_life)
+        self.attempts *= factor
+        self.successes *= factor
+        self.updated_at = now
+
+    def weight(self, now: float, half_life: float) -> float:
+        # Decayed attempts without touching the record
+        return self.attempts * self._factor(now, half_life)
+
+    def add(self, success: bool, now: float, half_life: float, max_weight: float):
+        self.decay(now, half_life)
+        if self.attempts >= max_weight:
+            scale = (max_weight - 1) / self.attempts
+            self.attempts *= scale
+            self.successes *= scale
+        self.attempts += 1
+        self.successes += 1 if success else 0
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self.successes / self.attempts if self.attempts else None
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"attempts": self.attempts, "successes": self.successes, "updatedAt": self.updated_at}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, float]) -> "_Outcomes":
+        return cls(data.get("attempts", 0.0), data.get("successes", 0.0), data.get("updatedAt", 0.0))
+
+class _DomainRecord:
+    def __init__(self):
+        self.static = _Outcomes()
+        self.dynamic = _Outcomes()
+        self.last_static_probe = 0.0
+
+    @property
+    def updated_at(self) -> float:
+        # Last outcome or decision for the domain
+        return max(self.static.updated_at, self.dynamic.updated_at)
+
+class StrategyTable:
+    """Learns per domain whether the static fetch is worth trying."""
+
+    def __init__(
+        self,
+        enabled: bool = STRATEGY_ENABLED,
+        path: str = STRATEGY_PATH,
+        min_samples: float = STRATEGY_MIN_SAMPLES,
+        dynamic_threshold: float = STRATEGY_DYNAMIC_THRESHOLD,
+        static_threshold: float = STRATEGY_STATIC_THRESHOLD,
+        half_life: float = STRATEGY_HALF_LIFE,
+        max_weight: float = STRATEGY_MAX_WEIGHT,
+        reprobe_interval: float = STRATEGY_REPROBE_INTERVAL,
+        max_domains: int = STRATEGY_MAX_DOMAINS,
+    ):
+        self.enabled = enabled
+        self.path = path
+        self.min_samples = min_samples
+        self.dynamic_threshold = dynamic_threshold
+        self.static_threshold = static_threshold
+        self.half_life = half_life
+        self.max_weight = max_weight
+        self.reprobe_interval = reprobe_interval
+        self.max_domains = max(1, max_domains)
+        self._domains: Optional[Dict[str, _DomainRecord]] = None
+        self._dirty = False
+        self._saved_at = 0.0
+        self._saving: Optional[asyncio.Task] = None
+        # Writes run in a thread; the generation keeps an older one from replacing a newer file
+        self._write_lock = threading.Lock()
+        self._generation = 0
+        self._written = 0
+        self.pruned = 0
+        self.decisions: Dict[str, int] = {STATIC: 0, DYNAMIC: 0, RACE: 0, "reprobe": 0}
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+    def _records(self) -> Dict[str, _DomainRecord]:
+        if self._domains is None:
+            self._domains = {}
+            self.load()
+        return self._domains
+
+    def _record(self, url: str) -> _DomainRecord:
+        domain = self.domain_of(url)
+        records = self._records()
+        if domain not in records:
+            records[domain] = _DomainRecord()
+        return records[domain]
+
+    def choose(self, url: str) -> str:
+        if not self.enabled:
+            return STATIC
+        record = self._records().get(self.domain_of(url))
+        if record is None:
+            self.decisions[STATIC] += 1
+            return STATIC
+        now = time.time()
+        record.static.decay(now, self.half_life)
+        rate = record.static.rate
+        if rate is None or not self._enough_samples(record) or rate >= self.static_threshold:
+            decision = STATIC
+        elif rate < self.dynamic_threshold:
+            decision = DYNAMIC
+            # Periodically give static another chance so the table can change its mind
+            if now - record.last_static_probe >= self.reprobe_interval:
+                record.last_static_probe = now
+                self.decisions["reprobe"] += 1
+                decision = STATIC
+        else:
+            decision = RACE
+        self.decisions[decision] += 1
+        return decision
+
+    def record_static(self, url: str, success: bool):
+        if not self.enabled:
+            return
+        now = time.time()
+        record = self._record(url)
+        record.static.add(success, now, self.half_life, self.max_weight)
+        record.last_static_probe = now
+        self._changed()
+
+    def record_dynamic(self, url: str, success: bool):
+        if not self.enabled:
+            return
+        record = self._record(url)
+        record.dynamic.add(success, time.time(), self.half_life, self.max_weight)
+        self._changed()
+
+    def _changed(self):
+        self._dirty = True
+        # Debounced persistence off the event loop; everything left is flushed on shutdown
+        if time.time() - self._saved_at > 5 and (self._saving is None or self._saving.done()):
+            self._saved_at = time.time()
+            self._saving = asyncio.get_running_loop().create_task(self.flush())
+
+    async def reset(self, domain: str) -> bool:
+        removed = self._records().pop(domain.lower(), None) is not None
+        if removed:
+            self._dirty = True
+            await self.flush()
+        return removed
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for domain, entry in data.get("domains", {}).items():
+                record = _DomainRecord()
+                record.static = _Outcomes.from_dict(entry.get("static", {}))
+                record.dynamic = _Outcomes.from_dict(entry.get("dynamic", {}))
+                record.last_static_probe = entry.get("lastStaticProbe", 0.0)
+                self._domains[domain] = record
+        except (OSError, ValueError):
+            traceback.print_exc()
+
+    def _prune(self, now: float):
+        # Fully decayed records decide like a missing one; past the cap the least
+        # recently updated go
+        domains = self._domains
+        for domain, record in list(domains.items()):
+            if record.static.weight(now, self.half_life) + record.dynamic.weight(now, self.half_life) < PRUNE_WEIGHT:
+                del domains[domain]
+                self.pruned += 1
+        if len(domains) > self.max_domains:
+            by_age = sorted(domains, key=lambda domain: domains[domain].updated_at)
+            for domain in by_age[:len(domains) - self.max_domains]:
+                del domains[domain]
+                self.pruned += 1
+
+    def _serialize(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        # On the event loop: a consistent copy of the table for the writer thread
+        if self._domains is None or not self._dirty:
+            return None
+        self._prune(time.time())
+        self._dirty = False
+        self._generation += 1
+        return self._generation, {"domains": {
+            domain: {
+                "static": record.static.to_dict(),
+                "dynamic": record.dynamic.to_dict(),
+                "lastStaticProbe": record.last_static_probe,
+            }
+            for domain, record in self._domains.items()
+        }}
+
+    def _write(self, generation: int, data: Dict[str, Any]) -> bool:
+        with self._write_lock:
+            if generation <= self._written:
+                return True
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+                self._written = generation
+                return True
+            except OSError:
+                traceback.print_exc()
+                return False
+
+    async def flush(self):
+        pending = self._serialize()
+        if pending is not None and not await asyncio.to_thread(self._write, *pending):
+            self._dirty = True
+
+    def save(self):
+        # Synchronous flush for shutdown
+        pending = self._serialize()
+        if pending is not None and not self._write(*pending):
+            self._dirty = True
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        rows = []
+        for domain, record in sorted(self._records().items()):
+            rows.append({
+                "domain": domain,
+                "decision": self._peek(record),
+                "staticSuccessRate": _round(record.static.rate),
+                "staticAttempts": round(record.static.attempts, 2),
+                "dynamicSuccessRate": _round(record.dynamic.rate),
+                "dynamicAttempts": round(record.dynamic.attempts, 2),
+                "lastStaticProbe": record.last_static_probe,
+            })
+        return rows
+
+    def _enough_samples(self, record: _DomainRecord) -> bool:
+        # Decayed counts are fractional; a just-recorded sample shouldn't fall short by rounding
+        return round(record.static.attempts, 3) >= self.min_samples
+
+    def _peek(self, record: _DomainRecord) -> str:
+        # Decision without side effects (no re-probe bookkeeping)
+        rate = record.static.rate
+        if rate is None or not self._enough_samples(record) or rate >= self.static_threshold:
+            return STATIC
+        return DYNAMIC if rate < self.dynamic_threshold else RACE
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "domains": len(self._records()),
+            "maxDomains": self.max_domains,
+            "pruned": self.pruned,
+            "decisions": dict(self.decisions),
+        }
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+strategy_table = StrategyTable()
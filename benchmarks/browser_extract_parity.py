@@ -0,0 +1,90 @@
+"""Check that in-page extraction (extractMode="browser") matches the bs4 path.
+
+Usage:
+    python -m benchmarks.browser_extract_parity [page.html ...] [--layout flat|tree] [--executable-path PATH]
+
+Without files the saved corpus in benchmarks/corpus/ is used. Each page is served
+to Chromium from a routed URL, then extracted twice: by app/browser_extract.js
+against the live DOM (ScraperUtils.extract_in_page), and by the bs4/html.parser
+backend over page.content() of the same DOM, which is the output the script
+mirrors. Meta, sections and limit errors are compared as JSON along with the
+time each path took; the exit status is 1 if any page differs. Needs Playwright's
+Chromium (playwright install chromium), or another Chromium build via --executable-path.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from playwright.async_api import async_playwright
+
+from app.browser_pool import LAUNCH_ARGS
+from app.extraction import EXTRACTION_ADAPTERS, EXTRACTION_BACKENDS, ScraperUtils
+
+URL = "https://example.com/wiki/Benchmark"
+CORPUS_DIR = Path(__file__).with_name("corpus")
+
+def _first_difference(browser: bytes, soup: bytes) -> str:
+    at = next((i for i, (a, b) in enumerate(zip(browser, soup)) if a != b), min(len(browser), len(soup)))
+    start = max(0, at - 60)
+    return (f"first difference at byte {at}:\n"
+            f"  browser: {browser[start:at + 60].decode(errors='replace')}\n"
+            f"  bs4:     {soup[start:at + 60].decode(errors='replace')}")
+
+async def _compare(page, html: str, layout: str) -> Tuple[bytes, bytes, float, float]:
+    async def serve(route):
+        if route.request.url == URL:
+            await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+        else:
+            # Offline: subresources would only make the run slower and flakier
+            await route.abort()
+
+    await page.route("**/*", serve)
+    try:
+        await page.goto(URL, wait_until="load")
+        started = time.perf_counter()
+        browser = await ScraperUtils.extract_in_page(page, URL, layout)
+        browser_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        content = await page.content()
+        soup = EXTRACTION_BACKENDS["bs4"].extract(content, URL, "html.parser", layout)
+        soup_seconds = time.perf_counter() - started
+    finally:
+        await page.unroute("**/*", serve)
+    adapter = EXTRACTION_ADAPTERS[layout]
+    return adapter.dump_json(browser), adapter.dump_json(soup), browser_seconds, soup_seconds
+
+async def run(paths: List[Path], layout: str, executable_path: Optional[str] = None) -> bool:
+    identical = True
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True, args=LAUNCH_ARGS, executable_path=executable_path)
+        try:
+            page = await browser.new_page()
+            print(f"Chromium {browser.version}")
+            print(f"{'page':<24} {'layout':<6} {'browser ms':>11} {'content+bs4 ms':>15}  result")
+            for path in paths:
+                html = path.read_text(encoding="utf-8", errors="replace")
+                in_page, soup, browser_seconds, soup_seconds = await _compare(page, html, layout)
+                same = in_page == soup
+                identical = identical and same
+                print(f"{path.name:<24} {layout:<6} {1000 * browser_seconds:>11.1f} {1000 * soup_seconds:>15.1f}  "
+                      f"{'identical' if same else 'DIFFERENT'}")
+                if not same:
+                    print(_first_difference(in_page, soup))
+        finally:
+            await browser.close()
+    return identical
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="HTML files to check (default: benchmarks/corpus/*.html)")
+    parser.add_argument("--layout", choices=sorted(EXTRACTION_ADAPTERS), default="flat")
+    parser.add_argument("--executable-path", help="Chromium binary to use instead of Playwright's")
+    args = parser.parse_args(argv)
+    paths = [Path(f) for f in args.files] or sorted(CORPUS_DIR.glob("*.html"))
+    return 0 if asyncio.run(run(paths, args.layout, args.executable_path)) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
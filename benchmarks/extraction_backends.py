@@ -0,0 +1,87 @@
+"""Compare the extraction backends (bs4 vs lxml) on throughput and peak memory.
+
+Usage:
+    python -m benchmarks.extraction_backends [page.html ...] [--repeat N]
+
+Without files a synthetic article page is generated. Each backend runs in its own
+fresh process so peak RSS (lxml allocates outside the Python heap) is comparable;
+outputs of the two backends are checked for equality first.
+"""
+import argparse
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from typing import List, Tuple
+
+from app.extraction import EXTRACTION_ADAPTERS, EXTRACTION_BACKENDS
+
+URL = "https://example.com/wiki/Benchmark"
+
+def synthetic_page(sections: int = 150, seed: int = 1) -> str:
+    r = random.Random(seed)
+    words = "alpha beta gamma delta python language code data model system network value".split()
+
+    def para(n: int = 80) -> str:
+        return " ".join(r.choice(words) for _ in range(n))
+
+    out = ['<!DOCTYPE html><html lang="en"><head><title>Benchmark &amp; Page</title>'
+           '<meta name="description" content="d"><link rel="canonical" href="/wiki/Benchmark">'
+           '<script>var x = 1;</script></head><body>',
+           '<header><nav><ul><li><a href="/a">A</a></li><li><a href="/b">B</a></li></ul></nav></header>',
+           '<div id="content" class="mw-body"><main><article>']
+    for i in range(sections):
+        out.append(f'<section id="s{i}"><h2>Heading {i} <sup>[e]</sup></h2>')
+        for j in range(4):
+            out.append(f'<p>{para()} <a href="#c{j}">cite {j}</a> <a href="https://ex.com/{i}/{j}">ext</a></p>')
+        out.append(f'<img src="/img/{i}.png" alt="i{i}"><ul><li>one <b>1</b></li><li>two</li></ul>')
+        out.append('<table><tr><th>h1</th><th>h2</th></tr><tr><td>a <i>b</i></td><td>c</td></tr></table>')
+        out.append('<div class="ad">ad</div><svg><text>svg</text></svg><!-- comment --></section>')
+    out.append('</article></main></div><footer><p>foot</p></footer></body></html>')
+    return "".join(out)
+
+def _run(backend: str, pages: List[str], repeat: int) -> Tuple[float, int]:
+    extract = EXTRACTION_BACKENDS[backend].extract
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            extract(html, URL, "lxml")
+    elapsed = time.perf_counter() - started
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _measure(backend: str, pages: List[str], repeat: int) -> Tuple[float, int]:
+    # Fresh interpreter per run: ru_maxrss is a high-water mark
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run, (backend, pages, repeat))
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="HTML files to extract (default: a synthetic page)")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the pages per backend")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        pages = [open(path, encoding="utf-8", errors="replace").read() for path in args.files]
+    else:
+        pages = [synthetic_page()]
+    total_bytes = sum(len(html.encode("utf-8")) for html in pages)
+
+    outputs = {
+        name: [EXTRACTION_ADAPTERS["flat"].dump_json(backend.extract(html, URL, "lxml")) for html in pages]
+        for name, backend in EXTRACTION_BACKENDS.items()
+    }
+    identical = len({tuple(o) for o in outputs.values()}) == 1
+    print(f"{len(pages)} page(s), {total_bytes / 1024:.0f} KiB, repeat {args.repeat}; outputs identical: {identical}")
+
+    _, baseline_rss = _measure(next(iter(EXTRACTION_BACKENDS)), pages, 0)
+    print(f"{'backend':<8} {'pages/s':>9} {'MiB/s':>8} {'ms/page':>9} {'peak RSS':>10} {'over idle':>10}")
+    for name in EXTRACTION_BACKENDS:
+        elapsed, rss = _measure(name, pages, args.repeat)
+        runs = len(pages) * args.repeat
+        print(f"{name:<8} {runs / elapsed:>9.1f} {total_bytes * args.repeat / elapsed / 2**20:>8.2f} "
+              f"{1000 * elapsed / runs:>9.1f} {rss / 1024:>8.1f}Mi {(rss - baseline_rss) / 1024:>8.1f}Mi")
+    return 0 if identical else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,148 @@
+"""Regenerate the saved HTML corpus in benchmarks/corpus/ used by benchmarks.suite.
+
+Usage:
+    python -m benchmarks.make_corpus
+
+Pages are generated from fixed seeds so the committed files only change when
+this script does. Each page has enough server-rendered text that the static path
+succeeds without the Playwright fallback.
+"""
+import json
+import random
+from pathlib import Path
+from typing import Callable, Dict, List
+
+CORPUS_DIR = Path(__file__).with_name("corpus")
+
+WORDS = (
+    "the of and to in is was for on that with as by at from his her it an were are which "
+    "this be also has had first one their its after new who they two or been but not all "
+    "system language python model data network value software design release version "
+    "protocol library function compiler memory interpreter standard module syntax runtime"
+).split()
+
+def _para(r: random.Random, n: int) -> str:
+    words = [r.choice(WORDS) for _ in range(n)]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+def small_static() -> str:
+    r = random.Random(13)
+    paras = "".join(f"<p>{_para(r, 60)}</p>" for _ in range(4))
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Release notes 2.4</title>'
+        '<meta name="description" content="What changed in release 2.4">'
+        '<link rel="canonical" href="/blog/release-2-4"><link rel="stylesheet" href="/site.css"></head>'
+        '<body><header><nav><a href="/">Home</a> <a href="/blog">Blog</a> <a href="/docs">Docs</a></nav></header>'
+        f'<main><article><h1>Release notes 2.4</h1>{paras}'
+        '<h2>Upgrading</h2><ul><li>Back up the data directory</li><li>Install the new package</li>'
+        '<li>Restart the service</li></ul><img src="/img/upgrade.png" alt="Upgrade steps"></article></main>'
+        '<footer><p>&copy; Example Project</p><a href="/privacy">Privacy</a></footer></body></html>'
+    )
+
+def wiki_article(sections: int = 180) -> str:
+    r = random.Random(7)
+    out = [
+        '<!DOCTYPE html><html class="client-nojs" lang="en" dir="ltr"><head><meta charset="UTF-8">'
+        '<title>Example language - Wikipedia</title><meta property="og:title" content="Example language">'
+        '<link rel="canonical" href="https://en.wikipedia.org/wiki/Example_language">'
+        '<style>.mw-parser-output .hatnote{font-style:italic}</style>'
+        '<script>RLCONF={"wgPageName":"Example_language","wgNamespaceNumber":0};</script></head>'
+        '<body class="mediawiki ltr skin-vector"><div class="mw-page-container">'
+        '<header class="vector-header"><nav aria-label="Site"><ul>'
+        + "".join(f'<li><a href="/wiki/Portal:{i}">Portal {i}</a></li>' for i in range(12))
+        + '</ul></nav><div class="cookie-banner">We use cookies</div></header>'
+        '<div id="content" class="mw-body" role="main"><h1 id="firstHeading">Example language</h1>'
+        '<div id="bodyContent" class="vector-body"><div class="mw-parser-output">'
+        '<table class="infobox vevent"><tbody>'
+    ]
+    for i in range(24):
+        out.append(f'<tr><th scope="row" class="infobox-label">Field {i}</th>'
+                   f'<td class="infobox-data"><a href="/wiki/Value_{i}">{_para(r, 4)}</a></td></tr>')
+    out.append('</tbody></table><div id="toc" class="toc"><ul>')
+    out.extend(f'<li class="toclevel-1"><a href="#Section_{i}"><span>{i + 1}</span> Section {i}</a></li>'
+               for i in range(sections))
+    out.append("</ul></div>")
+    for i in range(sections):
+        out.append(f'<section id="Section_{i}"><h2><span class="mw-headline">Section {i}</span>'
+                   f'<span class="mw-editsection">[<a href="/w/index.php?section={i}">edit</a>]</span></h2>')
+        for j in range(3):
+            out.append(f'<p>{_para(r, 90)} <a href="/wiki/Term_{i}_{j}" title="Term">term {j}</a>'
+                       f'<sup class="reference"><a href="#cite_note-{i}-{j}">[{j + 1}]</a></sup> {_para(r, 40)}</p>')
+        if i % 3 == 0:
+            out.append(f'<figure><img src="//upload.example.org/{i}.png" alt="Figure {i}" width="220">'
+                       f'<figcaption>{_para(r, 12)}</figcaption></figure>')
+        if i % 4 == 0:
+            out.append("<ul>" + "".join(f"<li>{_para(r, 10)}</li>" for _ in range(6)) + "</ul>")
+        if i % 5 == 0:
+            out.append('<table class="wikitable"><tr><th>Version</th><th>Date</th><th>Notes</th></tr>'
+                       + "".join(f"<tr><td>{i}.{k}</td><td>20{k:02d}-01-01</td><td>{_para(r, 8)}</td></tr>"
+                                 for k in range(8))
+                       + "</table>")
+        out.append('<div class="ad-slot">Advertisement</div></section>')
+    out.append('<h2>References</h2><ol class="references">')
+    out.extend(f'<li id="cite_note-{i}"><a href="https://example.org/ref/{i}">Reference {i}</a> {_para(r, 14)}</li>'
+               for i in range(400))
+    out.append('</ol></div></div></div><footer id="footer"><ul>'
+               '<li><a href="/wiki/Privacy">Privacy policy</a></li><li><a href="/wiki/About">About</a></li>'
+               "</ul></footer></div></body></html>")
+    return "".join(out)
+
+def spa_nested(cards: int = 60, depth: int = 40) -> str:
+    # Client-rendered app shell after hydration: hashed class names, no semantic
+    # section tags, deep wrapper chains and a large inline state blob
+    r = random.Random(21)
+    state = {"props": {"items": [{"id": i, "title": _para(r, 6), "body": _para(r, 30)} for i in range(cards)]}}
+    out = [
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Dashboard | Example App</title>'
+        '<meta name="description" content="Project dashboard"></head><body><div id="__next">'
+    ]
+    for i in range(cards):
+        out.append("".join(f'<div class="css-{r.randrange(16 ** 6):06x} e1x{d}">' for d in range(depth)))
+        out.append(f'<h3 class="css-title">{_para(r, 6)}</h3><p>{_para(r, 30)}</p>'
+                   f'<a href="/items/{i}" class="css-link">Open item {i}</a>'
+                   f'<button type="button" aria-label="Star item {i}"><svg viewBox="0 0 24 24"><path d="M0 0h24v24"/></svg></button>')
+        out.append("</div>" * depth)
+    out.append(f'</div><script id="__NEXT_DATA__" type="application/json">{json.dumps(state)}</script>'
+               '<script src="/_next/static/chunks/main.js" async></script></body></html>')
+    return "".join(out)
+
+def table_heavy(tables: int = 24, rows: int = 120) -> str:
+    r = random.Random(5)
+    out = [
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Quarterly statistics</title>'
+        '</head><body><header><h1>Quarterly statistics</h1></header><main>'
+    ]
+    for t in range(tables):
+        out.append(f'<section id="table-{t}"><h2>Region {t}</h2><p>{_para(r, 30)}</p>'
+                   '<table class="data"><thead><tr>'
+                   + "".join(f"<th>Column {c}</th>" for c in range(8))
+                   + "</tr></thead><tbody>")
+        for row in range(rows):
+            cells = [f'<td><a href="/region/{t}/row/{row}">R{row}</a></td>']
+            cells += [f"<td>{r.randint(0, 99999):,}</td>" for _ in range(6)]
+            cells.append(f"<td>{r.choice(WORDS)} {r.choice(WORDS)}</td>")
+            out.append("<tr>" + "".join(cells) + "</tr>")
+        out.append("</tbody></table></section>")
+    out.append("</main><footer><p>Source: example statistics office</p></footer></body></html>")
+    return "".join(out)
+
+PAGES: Dict[str, Callable[[], str]] = {
+    "small_static": small_static,
+    "wiki_article": wiki_article,
+    "spa_nested": spa_nested,
+    "table_heavy": table_heavy,
+}
+
+def main() -> List[Path]:
+    CORPUS_DIR.mkdir(exist_ok=True)
+    written = []
+    for name, build in PAGES.items():
+        path = CORPUS_DIR / f"{name}.html"
+        path.write_text(build(), encoding="utf-8")
+        print(f"{path}: {path.stat().st_size / 1024:.0f} KiB")
+        written.append(path)
+    return written
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare the flat and tree section layouts on payload size and serialization time.
+
+Usage:
+    python -m benchmarks.section_layouts [page.html ...] [--repeat N] [--backend bs4|lxml]
+
+Without files the saved corpus in benchmarks/corpus/ is used. Per page and layout:
+JSON payload bytes of the sections (sections vs sectionTree), the median time to
+build them (extraction, including parsing) and to serialize them, and for the tree
+the time ScraperUtils.flatten_sections takes to rebuild the flat view. The rebuilt
+flat view is checked against the flat layout first; the exit status is 1 if they differ.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from app.extraction import EXTRACTION_BACKENDS, ScraperUtils
+from app.models import Section, SectionNode
+
+URL = "https://example.com/wiki/Benchmark"
+CORPUS_DIR = Path(__file__).with_name("corpus")
+LAYOUT_ADAPTERS = {
+    "flat": TypeAdapter(List[Section]),
+    "tree": TypeAdapter(List[SectionNode]),
+}
+
+def _median_ms(call: Callable, repeat: int) -> float:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    return 1000 * statistics.median(latencies)
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="HTML files to extract (default: the benchmark corpus)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per page and layout")
+    parser.add_argument("--backend", choices=sorted(EXTRACTION_BACKENDS), default="bs4", help="extraction backend")
+    args = parser.parse_args(argv)
+
+    paths = [Path(path) for path in args.files] or sorted(CORPUS_DIR.glob("*.html"))
+    extract = EXTRACTION_BACKENDS[args.backend].extract
+    repeat = max(1, args.repeat)
+    identical = True
+
+    print(f"{'page':<16} {'layout':<6} {'sections':>8} {'bytes':>10} {'vs flat':>8} "
+          f"{'build ms':>9} {'dump ms':>8} {'flatten ms':>11}")
+    for path in paths:
+        html = path.read_text(encoding="utf-8", errors="replace")
+        _, flat, _ = extract(html, URL, "lxml", "flat")
+        _, tree, _ = extract(html, URL, "lxml", "tree")
+        if LAYOUT_ADAPTERS["flat"].dump_json(ScraperUtils.flatten_sections(tree)) != LAYOUT_ADAPTERS["flat"].dump_json(flat):
+            print(f"{path.name}: flatten_sections(tree) differs from the flat layout")
+            identical = False
+
+        flat_bytes = len(LAYOUT_ADAPTERS["flat"].dump_json(flat))
+        for layout, sections in (("flat", flat), ("tree", tree)):
+            adapter = LAYOUT_ADAPTERS[layout]
+            size = len(adapter.dump_json(sections))
+            build_ms = _median_ms(lambda: extract(html, URL, "lxml", layout), repeat)
+            dump_ms = _median_ms(lambda: adapter.dump_json(sections), repeat)
+            flatten = f"{_median_ms(lambda: ScraperUtils.flatten_sections(tree), repeat):>11.2f}" if layout == "tree" else f"{'-':>11}"
+            print(f"{path.stem:<16} {layout:<6} {len(sections):>8} {size:>10} {size / flat_bytes:>7.0%} "
+                  f"{build_ms:>9.2f} {dump_ms:>8.2f} {flatten}")
+    return 0 if identical else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,269 @@
+"""Offline benchmark suite for the scrape pipeline.
+
+Usage:
+    python -m benchmarks.suite [--iterations N] [--target NAME ...] [--output results.json]
+                               [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+                               [--update-baseline]
+
+The saved pages in benchmarks/corpus/ (see benchmarks.make_corpus) are served by a
+local HTTP server in its own process, so no network access is needed. Three targets
+are measured, each in a fresh process so its peak RSS is its own:
+
+    parse_sections  ScraperUtils.parse_sections on a pre-parsed soup
+    static          StaticScraper.scrape against the local server
+    universal       UniversalScraper.scrape (cache bypassed) against the local server
+
+Per page: sequential throughput and p50/p95/p99 latency. Per target: peak RSS of the
+benchmark process (extraction workers of the process executor are not included).
+Results are compared against the baseline; the exit status is 1 on a regression.
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+CORPUS_DIR = Path(__file__).with_name("corpus")
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+TARGETS = ("parse_sections", "static", "universal")
+# Latencies gated on in compare(); p99 of a few runs is reported but too noisy to gate
+LATENCY_METRICS = ("p50Ms", "p95Ms")
+
+class _CorpusHandler(http.server.SimpleHTTPRequestHandler):
+    extensions_map = {".html": "text/html; charset=utf-8"}
+
+    def log_message(self, format, *args):
+        pass
+
+def _serve(directory: str, port_queue):
+    handler = functools.partial(_CorpusHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+class CorpusServer:
+    """Serves the corpus from a separate process so it does not compete for the GIL."""
+
+    def __init__(self, directory: Path = CORPUS_DIR):
+        self.directory = directory
+        self.base_url: Optional[str] = None
+        self._process = None
+
+    def __enter__(self) -> "CorpusServer":
+        ctx = multiprocessing.get_context("spawn")
+        ports = ctx.Queue()
+        self._process = ctx.Process(target=_serve, args=(str(self.directory), ports), daemon=True)
+        self._process.start()
+        self.base_url = f"http://127.0.0.1:{ports.get(timeout=30)}/"
+        return self
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join()
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    # Linear interpolation between closest ranks
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+def _summarize(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "runs": len(ordered),
+        "throughputPerSec": round(len(ordered) / sum(ordered), 2),
+        "meanMs": round(1000 * statistics.fmean(ordered), 3),
+        "p50Ms": round(1000 * _percentile(ordered, 0.50), 3),
+        "p95Ms": round(1000 * _percentile(ordered, 0.95), 3),
+        "p99Ms": round(1000 * _percentile(ordered, 0.99), 3),
+    }
+
+async def _time_async(call: Callable, iterations: int, warmup: int) -> List[float]:
+    latencies = []
+    for i in range(warmup + iterations):
+        started = time.perf_counter()
+        await call()
+        if i >= warmup:
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+def _time_sync(call: Callable, iterations: int, warmup: int) -> List[float]:
+    latencies = []
+    for i in range(warmup + iterations):
+        started = time.perf_counter()
+        call()
+        if i >= warmup:
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+def _check(name: str, sections, errors=()):
+    if errors or not sections:
+        raise RuntimeError(f"{name}: scrape failed: {[e.message for e in errors] or 'no sections'}")
+
+def _bench_parse_sections(pages: Dict[str, str], base_url: str, iterations: int, warmup: int) -> Dict[str, List[float]]:
+    from bs4 import BeautifulSoup
+    from app.extraction import ScraperUtils
+
+    timings = {}
+    for name, html in pages.items():
+        url = base_url + name + ".html"
+        soup = BeautifulSoup(html, "lxml")
+        _check(name, ScraperUtils.parse_sections(soup, url))
+        timings[name] = _time_sync(lambda: ScraperUtils.parse_sections(soup, url), iterations, warmup)
+    return timings
+
+async def _bench_scrapers(target: str, pages: Dict[str, str], base_url: str, iterations: int, warmup: int) -> Dict[str, List[float]]:
+    from app.executor import cpu_executor
+    from app.http_client import http_client
+    from app.models import ScrapeOptions
+    from app.scraper import StaticScraper, UniversalScraper
+
+    cpu_executor.start()
+    await http_client.start()
+    try:
+        timings = {}
+        options = ScrapeOptions(bypassCache=True)
+        for name in pages:
+            url = base_url + name + ".html"
+            if target == "static":
+                async def call(url=url, name=name):
+                    _, _, sections, errors = await StaticScraper().scrape(url)
+                    _check(name, sections, errors)
+            else:
+                async def call(url=url, name=name):
+                    result = await UniversalScraper.scrape(url, options)
+                    _check(name, result.sections, result.errors)
+            timings[name] = await _time_async(call, iterations, warmup)
+        return timings
+    finally:
+        await http_client.stop()
+        cpu_executor.stop()
+
+def _run_target(target: str, pages: Dict[str, str], base_url: str, iterations: int, warmup: int) -> Tuple[Dict[str, List[float]], int]:
+    if target == "parse_sections":
+        timings = _bench_parse_sections(pages, base_url, iterations, warmup)
+    else:
+        timings = asyncio.run(_bench_scrapers(target, pages, base_url, iterations, warmup))
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return timings, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def _run_in_child(results, *args):
+    try:
+        results.put((True, _run_target(*args)))
+    except Exception as exc:
+        results.put((False, f"{type(exc).__name__}: {exc}"))
+
+def _measure(target: str, pages: Dict[str, str], base_url: str, iterations: int, warmup: int) -> Tuple[Dict[str, List[float]], int]:
+    # Fresh interpreter per target: ru_maxrss is a high-water mark. Not a Pool worker,
+    # which is daemonic and could not start the extraction process pool.
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_run_in_child, args=(results, target, pages, base_url, iterations, warmup))
+    process.start()
+    ok, value = results.get()
+    process.join()
+    if not ok:
+        raise RuntimeError(f"{target}: {value}")
+    return value
+
+def run(targets: List[str], iterations: int, warmup: int) -> Dict:
+    pages = {path.stem: path.read_text(encoding="utf-8") for path in sorted(CORPUS_DIR.glob("*.html"))}
+    if not pages:
+        raise RuntimeError(f"No corpus pages in {CORPUS_DIR}; run python -m benchmarks.make_corpus")
+
+    from app.config import EXTRACT_EXECUTOR, EXTRACT_WORKERS, PARSER_BACKEND
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "extractExecutor": EXTRACT_EXECUTOR,
+            "extractWorkers": EXTRACT_WORKERS,
+            "parserBackend": PARSER_BACKEND,
+        },
+        "iterations": iterations,
+        "pages": {name: len(html.encode("utf-8")) for name, html in pages.items()},
+        "targets": {},
+    }
+    # Benchmark processes keep their cache and strategy state out of the real data dir
+    with tempfile.TemporaryDirectory() as data_dir, CorpusServer() as server:
+        os.environ["SCRAPER_DATA_DIR"] = data_dir
+        for target in targets:
+            timings, peak_rss = _measure(target, pages, server.base_url, iterations, warmup)
+            report["targets"][target] = {
+                "peakRssMiB": round(peak_rss / 2**20, 1),
+                "pages": {name: _summarize(latencies) for name, latencies in timings.items()},
+            }
+    return report
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for target, result in current["targets"].items():
+        base = baseline.get("targets", {}).get(target)
+        if base is None:
+            continue
+        if result["peakRssMiB"] > base["peakRssMiB"] * (1 + tolerance):
+            regressions.append(f"{target}: peak RSS {base['peakRssMiB']} -> {result['peakRssMiB']} MiB")
+        for page, stats in result["pages"].items():
+            base_stats = base["pages"].get(page)
+            if base_stats is None:
+                continue
+            for metric in LATENCY_METRICS:
+                if stats[metric] > base_stats[metric] * (1 + tolerance):
+                    regressions.append(f"{target}/{page}: {metric} {base_stats[metric]} -> {stats[metric]}")
+            if stats["throughputPerSec"] < base_stats["throughputPerSec"] / (1 + tolerance):
+                regressions.append(f"{target}/{page}: throughputPerSec "
+                                   f"{base_stats['throughputPerSec']} -> {stats['throughputPerSec']}")
+    return regressions
+
+def print_report(report: Dict):
+    print(f"{'target':<15} {'page':<14} {'ops/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak RSS':>10}")
+    for target, result in report["targets"].items():
+        for page, stats in result["pages"].items():
+            print(f"{target:<15} {page:<14} {stats['throughputPerSec']:>8.1f} {stats['p50Ms']:>9.2f} "
+                  f"{stats['p95Ms']:>9.2f} {stats['p99Ms']:>9.2f} {result['peakRssMiB']:>8.1f}Mi")
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10, help="timed runs per page and target")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs per page before measuring")
+    parser.add_argument("--target", action="append", choices=TARGETS, help="target to run (default: all)")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown or growth")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    report = run(args.target or list(TARGETS), max(1, args.iterations), max(0, args.warmup))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if args.update_baseline:
+        Path(args.baseline).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not Path(args.baseline).exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regression(s) against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from app.cache import CacheEntry, ResultCache, _MemoryLRU, normalize_url
+from app.models import Interactions, MetaData, ScrapeResult
+
+URL = "https://example.com/page"
+
+def result(url: str = URL, title: str = "Title") -> ScrapeResult:
+    return ScrapeResult(url=url, scrapedAt="2024-01-01T00:00:00Z", meta=MetaData(title=title),
+                        sections=[], interactions=Interactions())
+
+def cache(tmp_path, **kwargs) -> ResultCache:
+    options = dict(enabled=True, memory_ttl=60, memory_max_bytes=1 << 20, disk_ttl=60,
+                   disk_max_entries=100, db_path=str(tmp_path / "cache.db"))
+    options.update(kwargs)
+    return ResultCache(**options)
+
+def age_on_disk(results: ResultCache, url: str, seconds: float):
+    results._disk.touch(normalize_url(url), time.time() - seconds)
+
+def test_lookup_miss_then_memory_hit(tmp_path):
+    results = cache(tmp_path)
+
+    async def run():
+        assert await results.lookup(URL) == (None, False)
+        await results.store(URL, result())
+        # Same page under another spelling of the URL
+        entry, fresh = await results.lookup("HTTPS://Example.com:443/page#top")
+        assert fresh and entry.result().meta.title == "Title"
+
+    asyncio.run(run())
+    assert results.counters["misses"] == 1
+    assert results.counters["memoryHits"] == 1
+    results.close()
+
+def test_disk_hit_after_restart(tmp_path):
+    first = cache(tmp_path)
+    asyncio.run(first.store(URL, result()))
+    first.close()
+    second = cache(tmp_path)
+    entry, fresh = asyncio.run(second.lookup(URL))
+    assert fresh and entry.result().url == URL
+    assert second.counters["diskHits"] == 1
+    # Promoted to memory
+    asyncio.run(second.lookup(URL))
+    assert second.counters["memoryHits"] == 1
+    second.close()
+
+def test_stale_static_entry_is_revalidated(tmp_path):
+    results = cache(tmp_path, memory_ttl=0)
+
+    async def run():
+        await results.store(URL, result(), etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+        age_on_disk(results, URL, 120)
+        entry, fresh = await results.lookup(URL)
+        # Stale but returned, with its validators, for a conditional request
+        assert entry is not None and not fresh
+        assert entry.etag == '"v1"' and entry.revalidatable
+        # 304 Not Modified: fresh again, in memory and on disk
+        results._memory.ttl = 60
+        await results.mark_revalidated(URL, entry)
+        assert entry.age < 5
+        return await results.lookup(URL)
+
+    entry, fresh = asyncio.run(run())
+    assert fresh and entry.etag == '"v1"'
+    assert results.counters["memoryHits"] == 1
+    assert results.counters["revalidations"] == 1
+    assert results.counters["revalidatedNotModified"] == 1
+    results.close()
+
+    reopened = cache(tmp_path)
+    entry, fresh = asyncio.run(reopened.lookup(URL))
+    assert fresh
+    reopened.close()
+
+def test_stale_entry_without_validators_is_a_miss(tmp_path):
+    results = cache(tmp_path, memory_ttl=0)
+
+    async def run():
+        await results.store(URL, result())
+        await results.store("https://example.com/js", result("https://example.com/js"),
+                            etag='"v1"', source="dynamic")
+        age_on_disk(results, URL, 120)
+        age_on_disk(results, "https://example.com/js", 120)
+        # Nothing to revalidate with, and a rendered page can't be revalidated by its HTML shell
+        assert await results.lookup(URL) == (None, False)
+        assert await results.lookup("https://example.com/js") == (None, False)
+
+    asyncio.run(run())
+    assert results.counters["misses"] == 2
+    assert results.counters["revalidations"] == 0
+    results.close()
+
+def test_disabled_cache(tmp_path):
+    results = cache(tmp_path, enabled=False)
+
+    async def run():
+        await results.store(URL, result())
+        return await results.lookup(URL)
+
+    assert asyncio.run(run()) == (None, False)
+    assert results.counters["stores"] == 0
+
+def entry(size: int) -> CacheEntry:
+    return CacheEntry(b"x" * size, time.time())
+
+def test_memory_lru_evicts_least_recently_used():
+    lru = _MemoryLRU(max_bytes=300, ttl=60)
+    lru.put("a", entry(100))
+    lru.put("b", entry(100))
+    lru.put("c", entry(100))
+    assert lru.get("a") is not None  # a is now the most recently used
+    lru.put("d", entry(100))
+    assert lru.get("b") is None
+    assert all(lru.get(key) is not None for key in "acd")
+    assert lru.bytes == 300 and len(lru) == 3
+
+def test_memory_lru_byte_accounting():
+    lru = _MemoryLRU(max_bytes=300, ttl=60)
+    lru.put("a", entry(100))
+    lru.put("a", entry(250))  # replaced, not added
+    assert lru.bytes == 250 and len(lru) == 1
+    lru.put("b", entry(100))  # over the cap: a goes
+    assert lru.get("a") is None and lru.bytes == 100
+    lru.put("big", entry(301))  # never fits
+    assert lru.get("big") is None and lru.bytes == 100
+
+def test_memory_lru_ttl():
+    lru = _MemoryLRU(max_bytes=300, ttl=60)
+    old = entry(10)
+    old.stored_at -= 61
+    lru.put("old", old)
+    assert lru.get("old") is None
+    assert lru.bytes == 0
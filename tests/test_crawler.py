@@ -0,0 +1,67 @@
+import pytest
+from app.crawler import BloomFilter, canonical_url
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.COM", "http://example.com/"),
+    ("https://example.com:443/a#section", "https://example.com/a"),
+    ("https://example.com:8443/a", "https://example.com:8443/a"),
+    ("  https://example.com/a  ", "https://example.com/a"),
+    # Query parameters sorted, tracking ones dropped
+    ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a?utm_source=x&id=3&fbclid=y&gclid", "https://example.com/a?id=3"),
+    ("https://example.com/a?utm_source=x", "https://example.com/a"),
+    # Only the parameter name is matched
+    ("https://example.com/a?utm=1", "https://example.com/a?utm=1"),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+@pytest.mark.parametrize("url", [
+    "mailto:someone@example.com",
+    "javascript:void(0)",
+    "ftp://example.com/file",
+    "https:///no-host",
+    "https://example.com/report.PDF",
+    "https://example.com/static/app.js",
+])
+def test_canonical_url_skips_non_pages(url):
+    assert canonical_url(url) is None
+
+def test_canonical_url_same_page_variants_collapse():
+    variants = [
+        "https://Example.com/a?x=1&y=2",
+        "https://example.com:443/a?y=2&x=1#top",
+        "https://example.com/a?x=1&utm_campaign=c&y=2",
+    ]
+    assert len({canonical_url(url) for url in variants}) == 1
+
+def test_bloom_filter_has_no_false_negatives():
+    seen = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"https://example.com/page/{i}" for i in range(1000)]
+    for item in items:
+        seen.add(item)
+    assert all(item in seen for item in items)
+
+def test_bloom_filter_add_reports_new_items():
+    seen = BloomFilter(capacity=100, error_rate=0.01)
+    assert "a" not in seen
+    assert seen.add("a") is True
+    assert seen.add("a") is False
+    assert "a" in seen
+    assert seen.count == 1
+
+def test_bloom_filter_false_positive_rate_near_target():
+    seen = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        seen.add(f"in-{i}")
+    false_positives = sum(f"out-{i}" in seen for i in range(20000))
+    # Deterministic hashes; allow for some slack around the 1% target
+    assert false_positives / 20000 < 0.02
+
+def test_bloom_filter_sizing():
+    seen = BloomFilter(capacity=1000, error_rate=0.01)
+    # About 9.6 bits and 7 hashes per item for 1%
+    assert 9000 < seen.size < 10000
+    assert seen.hashes == 7
+    tiny = BloomFilter(capacity=0, error_rate=0.5)
+    assert tiny.size >= 8 and tiny.hashes >= 1
@@ -0,0 +1,171 @@
+import asyncio
+import pytest
+from app.config import RETRY_MAX_DELAY
+from app.limits import DECREASE_ON_FAILURE, DECREASE_ON_SLOW, HostRateLimiter, HostThrottled
+
+URL = "https://example.com/page"
+
+def limiter(**kwargs) -> HostRateLimiter:
+    options = dict(enabled=True, rate=10, min_rate=0.2, max_concurrency=4)
+    options.update(kwargs)
+    return HostRateLimiter(**options)
+
+def state(hosts: HostRateLimiter):
+    return hosts._hosts["example.com"]
+
+async def request(hosts: HostRateLimiter, status, retry_after=None, timed=False):
+    async with hosts.slot(URL) as permit:
+        permit.observe(status, retry_after, timed=timed)
+
+def test_throttling_halves_rate_and_concurrency():
+    hosts = limiter()
+
+    async def run():
+        await request(hosts, 429)
+        # Responses from the same round trip don't back off again
+        await request(hosts, 503)
+
+    asyncio.run(run())
+    host = state(hosts)
+    assert host.rate == 10 * DECREASE_ON_FAILURE
+    assert host.limit == 4 * DECREASE_ON_FAILURE
+    assert host.throttled == 2
+
+@pytest.mark.parametrize("status", [None, 500, 502])
+def test_errors_back_off(status):
+    hosts = limiter()
+    asyncio.run(request(hosts, status))
+    host = state(hosts)
+    assert (host.rate, host.limit, host.errors) == (5, 2, 1)
+
+def test_one_decrease_per_round_trip_then_again():
+    hosts = limiter()
+
+    async def run():
+        await request(hosts, 429)
+        state(hosts).last_decrease -= 1.5
+        await request(hosts, 429)
+
+    asyncio.run(run())
+    assert state(hosts).rate == 10 * DECREASE_ON_FAILURE ** 2
+
+def test_floors():
+    hosts = limiter()
+
+    async def run():
+        # One request, so the shrinking token bucket doesn't make the test wait
+        async with hosts.slot(URL) as permit:
+            for _ in range(10):
+                permit.observe(429)
+                state(hosts).last_decrease = -1e9
+
+    asyncio.run(run())
+    assert state(hosts).rate == 0.2
+    assert state(hosts).limit == 1
+
+def test_successes_recover_additively_up_to_the_maximum():
+    hosts = limiter(rate=1000)  # spacing out of the way
+
+    async def run():
+        await request(hosts, 429)
+        host = state(hosts)
+        rate, limit = host.rate, host.limit
+        await request(hosts, 200)
+        assert host.rate == pytest.approx(rate + 1 / rate)
+        assert host.limit == pytest.approx(limit + 1 / limit)
+        for _ in range(30):
+            await request(hosts, 200)
+        return host
+
+    host = asyncio.run(run())
+    assert host.limit == 4
+    assert host.rate < 1000  # additive: far from recovered after a few dozen successes
+
+def test_slow_response_cuts_slightly():
+    hosts = limiter()
+
+    async def run():
+        async with hosts.slot(URL) as permit:
+            permit.observe(200)
+        host = state(hosts)
+        host.latency = 0.001
+        async with hosts.slot(URL) as permit:
+            await asyncio.sleep(0.05)
+            permit.observe(200)
+        return host
+
+    host = asyncio.run(run())
+    assert host.rate == pytest.approx(10 * DECREASE_ON_SLOW)
+    assert host.limit == pytest.approx(4 * DECREASE_ON_SLOW)
+
+def test_retry_after_blocks_the_host():
+    hosts = limiter()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        await request(hosts, 429, retry_after=0.2)
+        started = loop.time()
+        await request(hosts, 200)
+        return loop.time() - started
+
+    assert asyncio.run(run()) >= 0.19
+
+def test_long_retry_after_fails_fast():
+    hosts = limiter()
+
+    async def run():
+        await request(hosts, 503, retry_after=RETRY_MAX_DELAY + 60)
+        with pytest.raises(HostThrottled) as raised:
+            await request(hosts, 200)
+        return raised.value
+
+    error = asyncio.run(run())
+    assert error.retry_after > RETRY_MAX_DELAY
+
+def test_concurrency_limit():
+    hosts = limiter(rate=1000, max_concurrency=2)
+    peak = {"active": 0, "max": 0}
+
+    async def one():
+        async with hosts.slot(URL):
+            peak["active"] += 1
+            peak["max"] = max(peak["max"], peak["active"])
+            await asyncio.sleep(0.01)
+            peak["active"] -= 1
+
+    async def run():
+        await asyncio.gather(*(one() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak["max"] == 2
+
+def test_token_bucket_spaces_requests():
+    hosts = limiter(rate=20)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(25):
+            async with hosts.slot(URL):
+                pass
+        return loop.time() - started
+
+    # One second's worth up front, then one every 50 ms
+    assert 0.2 <= asyncio.run(run()) < 1.0
+
+def test_disabled_limiter_keeps_no_state():
+    hosts = limiter(enabled=False)
+    asyncio.run(request(hosts, 429, retry_after=60))
+    assert hosts._hosts == {}
+
+def test_hosts_are_separate():
+    hosts = limiter()
+
+    async def run():
+        await request(hosts, 429)
+        async with hosts.slot("https://other.example/") as permit:
+            permit.observe(200)
+
+    asyncio.run(run())
+    assert hosts._hosts["other.example"].rate == 10
+    assert state(hosts).rate == 5
@@ -0,0 +1,27 @@
+import time
+from email.utils import formatdate
+import pytest
+from app.http_client import parse_retry_after
+
+@pytest.mark.parametrize("value, expected", [
+    ("120", 120.0),
+    ("0", 0.0),
+    (" 5 ", 5.0),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+@pytest.mark.parametrize("value", [None, "", "soon", "-5", "1.5", "Wed, 99 Foo 2015 07:28:00"])
+def test_parse_retry_after_invalid(value):
+    assert parse_retry_after(value) is None
+
+def test_parse_retry_after_http_date():
+    value = formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= parse_retry_after(value) <= 60
+
+def test_parse_retry_after_past_date_is_now():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+def test_parse_retry_after_date_without_zone():
+    # Naive dates can't be placed in time
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00") is None
@@ -0,0 +1,172 @@
+import asyncio
+import pytest
+from app.jobs import JobQueue, QueueFull
+from app.metrics import timed
+from app.models import Interactions, JobRequest, MetaData, ScrapeResult
+from app.scraper import UniversalScraper
+
+class FakeScraper:
+    def __init__(self):
+        self.order = []
+        # URL -> event the scrape waits for
+        self.gates = {}
+
+    async def scrape(self, url, options=None):
+        self.order.append(url)
+        with timed("fetch"):
+            gate = self.gates.get(url)
+            if gate is not None:
+                await gate.wait()
+        if "fail" in url:
+            raise RuntimeError("scrape failed")
+        return ScrapeResult(url=url, scrapedAt="2024-01-01T00:00:00Z", meta=MetaData(),
+                            sections=[], interactions=Interactions())
+
+@pytest.fixture
+def scraper(monkeypatch):
+    fake = FakeScraper()
+    monkeypatch.setattr(UniversalScraper, "scrape", staticmethod(fake.scrape))
+    return fake
+
+def queue(tmp_path, **kwargs) -> JobQueue:
+    options = dict(workers=1, max_queued=10, db_path=str(tmp_path / "jobs.db"), retention=3600, keepalive=1)
+    options.update(kwargs)
+    return JobQueue(**options)
+
+def request(path: str, priority: int = 0) -> JobRequest:
+    return JobRequest(url=f"https://example.com/{path}", priority=priority)
+
+async def wait_for(jobs: JobQueue, job_id: str, *statuses: str):
+    for _ in range(200):
+        job = await jobs.get(job_id)
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {job.status}")
+
+def test_jobs_run_by_priority_then_submission_order(tmp_path, scraper):
+    jobs = queue(tmp_path)
+    gate = scraper.gates["https://example.com/first"] = asyncio.Event()
+
+    async def run():
+        first = await jobs.submit(request("first"))
+        await wait_for(jobs, first.id, "running")
+        # Queued behind the running job
+        submitted = [await jobs.submit(request(path, priority)) for path, priority in
+                     [("low", 1), ("high", 5), ("mid", 3), ("high-2", 5)]]
+        gate.set()
+        for job in submitted:
+            done = await wait_for(jobs, job.id, "done")
+            assert done.result is not None and done.finishedAt is not None
+        await jobs.stop()
+
+    asyncio.run(run())
+    assert [url.rsplit("/", 1)[1] for url in scraper.order] == ["first", "high", "high-2", "mid", "low"]
+
+def test_failed_job(tmp_path, scraper):
+    jobs = queue(tmp_path)
+
+    async def run():
+        job = await jobs.submit(request("fail"))
+        job = await wait_for(jobs, job.id, "failed")
+        await jobs.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert job.error == "RuntimeError: scrape failed"
+    assert jobs.counters["failed"] == 1
+
+def test_cancel_queued_and_running_jobs(tmp_path, scraper):
+    jobs = queue(tmp_path)
+    scraper.gates["https://example.com/running"] = asyncio.Event()
+
+    async def run():
+        running = await jobs.submit(request("running"))
+        await wait_for(jobs, running.id, "running")
+        queued = await jobs.submit(request("queued"))
+        assert (await jobs.cancel(queued.id)).status == "cancelled"
+        assert (await jobs.cancel(running.id)).status == "cancelled"
+        # Cancelling a finished job changes nothing
+        assert (await jobs.cancel(running.id)).status == "cancelled"
+        assert await jobs.cancel("missing") is None
+        await asyncio.sleep(0.05)
+        await jobs.stop()
+
+    asyncio.run(run())
+    # The cancelled queued job was skipped by the worker
+    assert scraper.order == ["https://example.com/running"]
+    assert jobs.counters["cancelled"] == 2
+
+def test_queue_limit(tmp_path, scraper):
+    jobs = queue(tmp_path, max_queued=2)
+    scraper.gates["https://example.com/running"] = asyncio.Event()
+
+    async def run():
+        running = await jobs.submit(request("running"))
+        await wait_for(jobs, running.id, "running")
+        await jobs.submit(request("a"))
+        await jobs.submit(request("b"))
+        with pytest.raises(QueueFull):
+            await jobs.submit(request("c"))
+        await jobs.stop()
+
+    asyncio.run(run())
+    assert jobs.counters["rejected"] == 1
+
+def test_unfinished_jobs_restored_on_restart(tmp_path, scraper):
+    first = queue(tmp_path)
+    scraper.gates["https://example.com/interrupted"] = asyncio.Event()
+
+    async def before_restart():
+        interrupted = await first.submit(request("interrupted"))
+        await wait_for(first, interrupted.id, "running")
+        waiting = [await first.submit(request(path, priority)) for path, priority in [("low", 0), ("high", 9)]]
+        await first.stop()
+        return [interrupted.id] + [job.id for job in waiting]
+
+    ids = asyncio.run(before_restart())
+    scraper.order.clear()
+    del scraper.gates["https://example.com/interrupted"]
+    second = queue(tmp_path)
+
+    async def after_restart():
+        await second.start()
+        assert second.counters["restored"] == 3
+        jobs = [await wait_for(second, job_id, "done") for job_id in ids]
+        await second.stop()
+        return jobs
+
+    jobs = asyncio.run(after_restart())
+    # The interrupted job starts over, by priority with the rest
+    assert [url.rsplit("/", 1)[1] for url in scraper.order] == ["high", "interrupted", "low"]
+    assert all(job.result is not None for job in jobs)
+
+def test_events_stream_phases_and_status(tmp_path, scraper):
+    jobs = queue(tmp_path)
+    gate = scraper.gates["https://example.com/page"] = asyncio.Event()
+
+    async def run():
+        job = await jobs.submit(request("page"))
+        await wait_for(jobs, job.id, "running")
+        messages = []
+
+        async def listen():
+            async for message in jobs.events(job.id):
+                if message is not None:
+                    messages.append(message)
+
+        listener = asyncio.create_task(listen())
+        await asyncio.sleep(0.01)
+        gate.set()
+        await asyncio.wait_for(listener, 5)
+        # A finished job's stream is its final status
+        replay = [message async for message in jobs.events(job.id)]
+        await jobs.stop()
+        return messages, replay
+
+    messages, replay = asyncio.run(run())
+    # Catch-up (status running, fetch started), then live events up to the final status
+    assert [(m["event"], m["data"].get("status") or m["data"].get("state")) for m in messages] == [
+        ("status", "running"), ("phase", "started"), ("phase", "finished"), ("status", "done"),
+    ]
+    assert [(m["event"], m["data"]["status"]) for m in replay] == [("status", "done")]
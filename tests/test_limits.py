@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from app.config import RETRY_BASE_DELAY, RETRY_MAX_ATTEMPTS, RETRY_MAX_DELAY
+from app.limits import ConcurrencyLimiter, backoff_delay
+
+@pytest.mark.parametrize("attempt", range(1, RETRY_MAX_ATTEMPTS))
+def test_backoff_delay_equal_jitter(attempt):
+    ceiling = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    for _ in range(100):
+        delay = backoff_delay(attempt)
+        assert ceiling / 2 <= delay <= ceiling
+
+def test_backoff_delay_grows_with_attempts():
+    if RETRY_MAX_ATTEMPTS < 3:
+        pytest.skip("needs at least two retries")
+    # Equal jitter: the lowest delay of a retry is the highest of the one before
+    assert min(backoff_delay(2) for _ in range(100)) >= max(backoff_delay(1) for _ in range(100))
+
+def test_backoff_delay_gives_up_after_max_attempts():
+    assert backoff_delay(RETRY_MAX_ATTEMPTS) is None
+    assert backoff_delay(RETRY_MAX_ATTEMPTS + 1) is None
+    assert backoff_delay(RETRY_MAX_ATTEMPTS, retry_after=0) is None
+
+def test_backoff_delay_honors_retry_after():
+    for _ in range(100):
+        delay = backoff_delay(1, retry_after=2.0)
+        assert 2.0 <= delay <= 2.0 + RETRY_BASE_DELAY
+
+def test_backoff_delay_zero_retry_after():
+    assert 0 <= backoff_delay(1, retry_after=0.0) <= RETRY_BASE_DELAY
+
+def test_backoff_delay_does_not_wait_out_long_retry_after():
+    assert backoff_delay(1, retry_after=RETRY_MAX_DELAY + 1) is None
+    assert backoff_delay(1, retry_after=RETRY_MAX_DELAY) is not None
+
+async def _contend(limiter: ConcurrencyLimiter, url: str, tasks: int = 3) -> int:
+    peak = 0
+
+    async def fetch():
+        nonlocal peak
+        async with limiter.slot(url):
+            peak = max(peak, limiter.stats()["active"])
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(fetch() for _ in range(tasks)))
+    return peak
+
+def test_concurrency_limiter_caps_per_host_and_global():
+    per_host = ConcurrencyLimiter("test", global_limit=2, per_host_limit=1)
+    assert asyncio.run(_contend(per_host, "https://example.com/a")) == 1
+    limiter = ConcurrencyLimiter("test", global_limit=2, per_host_limit=5)
+    assert asyncio.run(_contend(limiter, "https://example.com/a")) == 2
+    assert limiter.stats()["hosts"] == 0
+
+def test_concurrency_limiter_survives_a_new_event_loop():
+    # Module-level limiters outlive asyncio.run(): semaphores a previous loop waited on
+    # must not be reused by the next one
+    limiter = ConcurrencyLimiter("test", global_limit=1, per_host_limit=5)
+    assert limiter.stats()["active"] == 0
+    for _ in range(2):
+        assert asyncio.run(_contend(limiter, "https://example.com/a")) == 1
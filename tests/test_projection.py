@@ -0,0 +1,58 @@
+import json
+from app.models import (
+    Interactions, MetaData, ScrapeOptions, ScrapeResult, Section, SectionContent, SectionNode,
+)
+from app.responses import projection
+
+def test_full_profile_excludes_nothing():
+    assert projection(ScrapeOptions()) is None
+    assert projection(ScrapeOptions(include=["rawHtml", "headings", "text", "links", "images", "lists", "tables"])) is None
+
+def test_text_profile():
+    spec = projection(ScrapeOptions(profile="text"))
+    section = {
+        "rawHtml": True,
+        "truncated": True,
+        "content": {"links": True, "images": True, "lists": True, "tables": True},
+    }
+    assert spec == {"sections": {"__all__": section}, "sectionTree": {"__all__": section}}
+
+def test_links_profile_keeps_raw_html_out():
+    section = projection(ScrapeOptions(profile="links"))["sections"]["__all__"]
+    assert section["rawHtml"] is True and section["truncated"] is True
+    assert section["content"] == {"headings": True, "text": True, "images": True, "lists": True, "tables": True}
+
+def test_exclude_without_raw_html_keeps_truncated():
+    section = projection(ScrapeOptions(exclude=["tables", "images"]))["sections"]["__all__"]
+    assert section == {"content": {"images": True, "tables": True}}
+
+def test_include_minus_exclude():
+    section = projection(ScrapeOptions(include=["rawHtml", "text", "links"], exclude=["links"]))["sections"]["__all__"]
+    assert "rawHtml" not in section
+    assert section["content"] == {"headings": True, "links": True, "images": True, "lists": True, "tables": True}
+
+def test_only_raw_html_dropped():
+    section = projection(ScrapeOptions(exclude=["rawHtml"]))["sections"]["__all__"]
+    assert section == {"rawHtml": True, "truncated": True}
+
+def result(tree: bool) -> ScrapeResult:
+    content = SectionContent(headings=["H"], text="Body", links=[{"text": "a", "href": "https://a.example/"}])
+    common = dict(id="section-0", type="section", label="H", sourceUrl="https://example.com/",
+                  content=content, rawHtml="<section>H</section>", truncated=False, fingerprint="f")
+    return ScrapeResult(
+        url="https://example.com/", scrapedAt="2024-01-01T00:00:00Z", meta=MetaData(title="T"),
+        sections=[] if tree else [Section(**common)],
+        sectionTree=[SectionNode(**common)] if tree else None,
+        interactions=Interactions(),
+    )
+
+def test_spec_applies_to_both_layouts():
+    spec = projection(ScrapeOptions(profile="text"))
+    for tree in (False, True):
+        model = result(tree)
+        data = json.loads(model.__pydantic_serializer__.to_json(model, exclude=spec))
+        section = (data["sectionTree"] if tree else data["sections"])[0]
+        assert set(section["content"]) == {"headings", "text"}
+        assert "rawHtml" not in section and "truncated" not in section
+        # Everything outside the sections is untouched
+        assert data["meta"]["title"] == "T" and section["fingerprint"] == "f"
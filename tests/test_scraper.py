@@ -0,0 +1,75 @@
+import asyncio
+import time
+import pytest
+from app.cache import CacheEntry, result_cache
+from app.models import Interactions, MetaData, ScrapeOptions, ScrapeResult, Section, SectionContent
+from app.scraper import PlaywrightScraper, StaticScraper, UniversalScraper
+from app.strategy import DYNAMIC, strategy_table
+
+URL = "https://example.com/app"
+
+def section() -> Section:
+    return Section(id="main-0", type="content", label="Main", sourceUrl=URL,
+                   content=SectionContent(text="Rendered text"), rawHtml="<main>Rendered text</main>", truncated=False)
+
+def entry(source: str, etag: str = '"v1"') -> CacheEntry:
+    result = ScrapeResult(url=URL, scrapedAt="2024-01-01T00:00:00Z", meta=MetaData(),
+                          sections=[section()], interactions=Interactions())
+    return CacheEntry(result.model_dump_json().encode(), time.time(), etag=etag, source=source)
+
+class Calls:
+    def __init__(self, cached: CacheEntry):
+        self.cached = cached
+        self.static = []
+        self.dynamic = 0
+        self.revalidated = 0
+
+@pytest.fixture
+def calls(monkeypatch):
+    # Diff mode asks the site even for a fresh entry; the test sets which entry that is
+    state = Calls(entry("static"))
+
+    async def lookup(url):
+        return state.cached, True
+
+    async def static_scrape(self, url, etag=None, last_modified=None, **kwargs):
+        state.static.append(etag)
+        self.not_modified = etag is not None
+        return None, None, [], []
+
+    async def dynamic_scrape(url, options=None):
+        state.dynamic += 1
+        return "<main>Rendered text</main>", MetaData(), [section()], Interactions(), [], None
+
+    async def mark_revalidated(url, cached):
+        state.revalidated += 1
+
+    async def store(*args):
+        pass
+
+    monkeypatch.setattr(result_cache, "enabled", True)
+    monkeypatch.setattr(result_cache, "lookup", lookup)
+    monkeypatch.setattr(result_cache, "mark_revalidated", mark_revalidated)
+    monkeypatch.setattr(result_cache, "store", store)
+    monkeypatch.setattr(StaticScraper, "scrape", static_scrape)
+    monkeypatch.setattr(PlaywrightScraper, "scrape", staticmethod(dynamic_scrape))
+    monkeypatch.setattr(strategy_table, "choose", lambda url: DYNAMIC)
+    monkeypatch.setattr(strategy_table, "record_dynamic", lambda url, ok: None)
+    return state
+
+def test_cached_static_result_is_revalidated_statically(calls):
+    result, outcome, _ = asyncio.run(UniversalScraper._run(URL, ScrapeOptions(diff=True)))
+    assert outcome == "cache"
+    assert calls.static == ['"v1"']
+    assert calls.revalidated == 1
+    assert calls.dynamic == 0
+
+def test_cached_dynamic_result_follows_the_strategy_table(calls):
+    # The HTML shell's validators say nothing about the rendered sections
+    calls.cached = entry("dynamic")
+    result, outcome, _ = asyncio.run(UniversalScraper._run(URL, ScrapeOptions(diff=True)))
+    assert outcome == "fallback"
+    assert calls.static == []
+    assert calls.dynamic == 1
+    assert calls.revalidated == 0
+    assert result.sections[0].content.text == "Rendered text"
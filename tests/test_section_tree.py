@@ -0,0 +1,59 @@
+from pathlib import Path
+import pytest
+from app.extraction import EXTRACTION_BACKENDS, ScraperUtils
+
+URL = "https://example.com/docs/page"
+CORPUS_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "corpus"
+
+NESTED = """<!DOCTYPE html><html><head><title>Nested</title></head><body>
+<main>
+  <h1>Guide</h1>
+  <p>Intro with <a href="/start">a link</a>.</p>
+  <section id="install"><h2>Install</h2>
+    <p>Before the steps.</p>
+    <ul><li>one</li><li>two</li></ul>
+    <article><h3>On Linux</h3><p>Use the <a href="https://pkg.example/">package</a>.</p>
+      <img src="/linux.png" alt="Linux"></article>
+    <p>Between <a href="#a">a</a> and b.</p>
+    <article><h3>On macOS</h3><table><tr><th>Step</th></tr><tr><td>brew</td></tr></table></article>
+    <p>After the steps.</p>
+  </section>
+  <section><h2>Empty child ahead</h2><section></section><p>Tail text.</p></section>
+  <p>Closing words.</p>
+</main>
+<footer><p>Footer</p></footer>
+</body></html>"""
+
+def pages():
+    yield "nested", NESTED
+    for name in ("small_static.html", "spa_nested.html"):
+        yield name, (CORPUS_DIR / name).read_text(encoding="utf-8")
+
+@pytest.mark.parametrize("backend", sorted(EXTRACTION_BACKENDS))
+@pytest.mark.parametrize("name, html", list(pages()), ids=lambda value: value if len(value) < 40 else "")
+def test_flatten_tree_round_trip(backend, name, html):
+    extract = EXTRACTION_BACKENDS[backend].extract
+    _, flat, _ = extract(html, URL, "html.parser", "flat")
+    _, tree, _ = extract(html, URL, "html.parser", "tree")
+    assert [node.id for node in tree] == [section.id for section in flat]
+    rebuilt = ScraperUtils.flatten_sections(tree)
+    assert [s.model_dump() for s in rebuilt] == [s.model_dump() for s in flat]
+
+def test_tree_nodes_hold_only_their_own_content():
+    _, flat, _ = EXTRACTION_BACKENDS["bs4"].extract(NESTED, URL, "html.parser", "flat")
+    _, tree, _ = EXTRACTION_BACKENDS["bs4"].extract(NESTED, URL, "html.parser", "tree")
+    nodes = {node.id: node for node in tree}
+    parents = [node for node in tree if node.children]
+    assert parents
+    for parent in parents:
+        for ref in parent.children:
+            child = nodes[ref.id]
+            assert child.parentId == parent.id
+            for link in child.content.links:
+                assert link not in parent.content.links
+        # The parent's own text plus its children's makes up its flat text
+        flat_text = next(s for s in flat if s.id == parent.id).content.text
+        assert len(parent.content.text) < len(flat_text)
+
+def test_flatten_empty():
+    assert ScraperUtils.flatten_sections([]) == []
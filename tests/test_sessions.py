@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+import pytest
+from app.sessions import SessionStore, has_consent
+
+URL = "https://www.example.com/page"
+
+def store(tmp_path, **kwargs) -> SessionStore:
+    options = dict(path=str(tmp_path / "sessions.db"), ttl=3600, max_entries=100, max_bytes=10000)
+    options.update(kwargs)
+    return SessionStore(**options)
+
+def state(*cookies, origins=()):
+    return {"cookies": list(cookies), "origins": list(origins)}
+
+def cookie(name: str, domain: str = ".example.com", expires: float = -1):
+    return {"name": name, "value": "1", "domain": domain, "path": "/", "expires": expires}
+
+def test_round_trip_per_host(tmp_path):
+    sessions = store(tmp_path)
+
+    async def run():
+        assert await sessions.get(URL) is None
+        await sessions.put(URL, state(cookie("sid")), "agent/1")
+        session = await sessions.get("https://WWW.example.com/other")
+        assert await sessions.get("https://example.com/") is None
+        return session
+
+    session = asyncio.run(run())
+    assert session.user_agent == "agent/1"
+    assert [c["name"] for c in session.state["cookies"]] == ["sid"]
+    assert sessions.counters["hits"] == 1 and sessions.counters["misses"] == 2
+    sessions.close()
+
+def test_survives_restart(tmp_path):
+    first = store(tmp_path)
+    asyncio.run(first.put(URL, state(cookie("sid")), "agent/1"))
+    first.close()
+    second = store(tmp_path)
+    assert asyncio.run(second.get(URL)) is not None
+    second.close()
+
+def test_expired_session_is_dropped(tmp_path):
+    sessions = store(tmp_path, ttl=0.05)
+
+    async def run():
+        await sessions.put(URL, state(cookie("sid")), "agent/1")
+        await asyncio.sleep(0.1)
+        assert await sessions.get(URL) is None
+        # Deleted, not just skipped
+        sessions.ttl = 3600
+        assert await sessions.get(URL) is None
+
+    asyncio.run(run())
+    assert sessions.counters["expired"] == 1
+    sessions.close()
+
+def test_expired_cookies_are_dropped_on_restore(tmp_path):
+    sessions = store(tmp_path)
+
+    async def run():
+        await sessions.put(URL, state(cookie("session"), cookie("old", expires=time.time() - 10),
+                                      cookie("valid", expires=time.time() + 3600)), "agent/1")
+        return await sessions.get(URL)
+
+    session = asyncio.run(run())
+    assert [c["name"] for c in session.state["cookies"]] == ["session", "valid"]
+    sessions.close()
+
+def test_least_recently_saved_evicted_past_the_cap(tmp_path):
+    sessions = store(tmp_path, max_entries=2)
+
+    async def run():
+        for host in ("a", "b", "c"):
+            await sessions.put(f"https://{host}.example/", state(cookie("sid", f"{host}.example")), "agent/1")
+            await asyncio.sleep(0.01)
+        return [await sessions.get(f"https://{host}.example/") is not None for host in ("a", "b", "c")]
+
+    assert asyncio.run(run()) == [False, True, True]
+    assert sessions.counters["evictions"] == 1
+    sessions.close()
+
+def test_oversized_state_is_not_stored(tmp_path):
+    sessions = store(tmp_path, max_bytes=200)
+    big = state(*(cookie(f"c{i}") for i in range(10)))
+    assert len(json.dumps(big)) > 200
+
+    async def run():
+        await sessions.put(URL, big, "agent/1")
+        return await sessions.get(URL)
+
+    assert asyncio.run(run()) is None
+    assert sessions.counters["tooLarge"] == 1
+    sessions.close()
+
+@pytest.mark.parametrize("name", [
+    "CookieConsent", "OptanonAlertBoxClosed", "didomi_token", "cmplz_marketing", "borlabs-cookie",
+    "_iub_cs-123", "axeptio_cookies", "cookielawinfo-checkbox", "cookies_accepted", "gdpr", "SOCS",
+])
+def test_consent_cookies(name):
+    assert has_consent(state(cookie(name)), "www.example.com")
+
+@pytest.mark.parametrize("name", ["sid", "OptanonConsent", "_ga", "mysocs"])
+def test_not_consent_cookies(name):
+    # OptanonConsent is set before the visitor chose anything
+    assert not has_consent(state(cookie(name)), "www.example.com")
+
+def test_consent_cookie_must_match_the_host():
+    assert has_consent(state(cookie("CookieConsent", "example.com")), "www.example.com")
+    assert has_consent(state(cookie("CookieConsent", "www.example.com")), "www.example.com")
+    assert not has_consent(state(cookie("CookieConsent", ".other.com")), "www.example.com")
+    assert not has_consent(state(cookie("CookieConsent", "ample.com")), "www.example.com")
+    assert not has_consent(state(cookie("CookieConsent", "shop.example.com")), "www.example.com")
+
+def test_consent_in_local_storage():
+    storage = {"origin": "https://www.example.com", "localStorage": [{"name": "uc_settings", "value": "{}"}]}
+    assert has_consent(state(origins=[storage]), "www.example.com")
+    assert not has_consent(state(origins=[storage]), "example.com")
+    other = {"origin": "https://www.example.com", "localStorage": [{"name": "theme", "value": "dark"}]}
+    assert not has_consent(state(origins=[other]), "www.example.com")
+
+def test_restored_session_knows_about_consent(tmp_path):
+    sessions = store(tmp_path)
+
+    async def run():
+        await sessions.put(URL, state(cookie("CookieConsent")), "agent/1")
+        await sessions.put("https://plain.example/", state(cookie("sid", "plain.example")), "agent/1")
+        return await sessions.get(URL), await sessions.get("https://plain.example/")
+
+    consented, plain = asyncio.run(run())
+    assert consented.consented and not plain.consented
+    sessions.close()
@@ -0,0 +1,160 @@
+import asyncio
+import pytest
+from app.metrics import reporting, timed
+from app.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(runs) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"inFlight": 0, "leaders": 1, "coalesced": 4}
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0)
+        return len(runs)
+
+    async def run():
+        await asyncio.gather(flight.do("a", work), flight.do("b", work))
+        # The first run finished: a new call starts a new run
+        await flight.do("a", work)
+
+    asyncio.run(run())
+    assert len(runs) == 3
+    assert flight.stats()["coalesced"] == 0
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.stats()["inFlight"] == 0
+
+def test_one_waiter_leaving_keeps_the_run_going():
+    flight = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "done"
+    assert finished == [1]
+
+def test_last_waiter_leaving_cancels_the_run():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return "late"
+
+    async def fresh():
+        return "fresh"
+
+    async def run():
+        callers = [asyncio.create_task(flight.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert flight.stats()["inFlight"] == 0
+        # The next caller starts afresh instead of joining the cancelled run
+        return await flight.do("key", fresh)
+
+    assert asyncio.run(run()) == "fresh"
+    assert cancelled == [1]
+
+def test_progress_goes_to_every_waiter():
+    flight = SingleFlight()
+    seen = {"first": [], "second": []}
+
+    async def work(started, release):
+        started.set()
+        await release.wait()
+        with timed("fetch"):
+            pass
+        return "done"
+
+    async def caller(name, fn):
+        with reporting(lambda phase, state, detail, seconds: seen[name].append((phase, state))):
+            return await flight.do("key", fn)
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+        fn = lambda: work(started, release)
+        first = asyncio.create_task(caller("first", fn))
+        await started.wait()
+        # Joins after the run started: still gets the phases from then on
+        second = asyncio.create_task(caller("second", fn))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(run()) == ["done", "done"]
+    assert seen["first"] == seen["second"] == [("fetch", "started"), ("fetch", "finished")]
+
+def test_progress_stops_for_a_waiter_that_left():
+    flight = SingleFlight()
+    seen = {"first": [], "second": []}
+
+    async def work(release):
+        await release.wait()
+        with timed("fetch"):
+            pass
+        return "done"
+
+    async def caller(name, fn):
+        with reporting(lambda phase, state, detail, seconds: seen[name].append(phase)):
+            return await flight.do("key", fn)
+
+    async def run():
+        release = asyncio.Event()
+        fn = lambda: work(release)
+        first = asyncio.create_task(caller("first", fn))
+        second = asyncio.create_task(caller("second", fn))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        release.set()
+        return await second
+
+    assert asyncio.run(run()) == "done"
+    assert seen == {"first": [], "second": ["fetch", "fetch"]}
@@ -0,0 +1,84 @@
+from app.models import Section, SectionContent
+from app.snapshots import diff_sections
+
+def section(id: str, fingerprint: str) -> Section:
+    return Section(
+        id=id, type="section", label=id, sourceUrl="https://example.com/",
+        content=SectionContent(), rawHtml="", truncated=False, fingerprint=fingerprint,
+    )
+
+def ids(sections):
+    return [s.id for s in sections]
+
+def test_first_scrape_adds_everything():
+    current = [section("section-0", "a"), section("section-1", "b")]
+    unmatched, diff = diff_sections([], current)
+    assert ids(unmatched) == ["section-0", "section-1"]
+    assert diff.added == ["section-0", "section-1"]
+    assert diff.changed == [] and diff.removed == [] and diff.unchanged == 0
+    assert diff.since is None
+
+def test_unchanged_sections_are_left_out():
+    previous = [section("section-0", "a"), section("section-1", "b")]
+    current = [section("section-0", "a"), section("section-1", "b")]
+    unmatched, diff = diff_sections(previous, current, "2024-01-01T00:00:00Z")
+    assert unmatched == []
+    assert (diff.added, diff.changed, diff.removed, diff.unchanged) == ([], [], [], 2)
+    assert diff.since == "2024-01-01T00:00:00Z"
+
+def test_inserted_section_shifts_ids_without_changing_the_rest():
+    previous = [section("section-0", "a"), section("section-1", "b"), section("section-2", "c")]
+    current = [section("section-0", "a"), section("section-1", "new"), section("section-2", "b"), section("section-3", "c")]
+    unmatched, diff = diff_sections(previous, current)
+    # b and c moved to new ids but kept their fingerprints, so only the new one is sent
+    assert ids(unmatched) == ["section-1"]
+    # The old section-1 (b) is matched under its new id: an addition, not a change
+    assert (diff.added, diff.changed, diff.removed, diff.unchanged) == (["section-1"], [], [], 3)
+
+def test_section_changed_in_place():
+    previous = [section("section-0", "a"), section("section-1", "b")]
+    current = [section("section-0", "a"), section("section-1", "b2")]
+    unmatched, diff = diff_sections(previous, current)
+    assert ids(unmatched) == ["section-1"]
+    assert (diff.added, diff.changed, diff.removed, diff.unchanged) == ([], ["section-1"], [], 1)
+
+def test_removed_section():
+    previous = [section("section-0", "a"), section("section-1", "b"), section("section-2", "c")]
+    current = [section("section-0", "a"), section("section-1", "c")]
+    unmatched, diff = diff_sections(previous, current)
+    assert unmatched == []
+    # c matched under its new id; removed ids are previous ones (b was section-1)
+    assert diff.removed == ["section-1"]
+    assert (diff.added, diff.changed, diff.unchanged) == ([], [], 2)
+
+def test_appended_section_is_added():
+    previous = [section("section-0", "a")]
+    current = [section("section-0", "a"), section("section-1", "b")]
+    unmatched, diff = diff_sections(previous, current)
+    assert ids(unmatched) == ["section-1"]
+    assert (diff.added, diff.changed, diff.removed) == (["section-1"], [], [])
+
+def test_duplicate_fingerprints_match_one_to_one():
+    # Two identical sections (e.g. repeated cards); one of them goes away
+    previous = [section("section-0", "x"), section("section-1", "x"), section("section-2", "y")]
+    current = [section("section-0", "x"), section("section-1", "y")]
+    unmatched, diff = diff_sections(previous, current)
+    assert unmatched == []
+    assert diff.unchanged == 2
+    # Each previous x is matched at most once: the second one is what went away
+    assert diff.removed == ["section-1"]
+
+def test_duplicate_fingerprint_prefers_the_same_id():
+    previous = [section("section-0", "x"), section("section-1", "x")]
+    current = [section("section-0", "z"), section("section-1", "x")]
+    unmatched, diff = diff_sections(previous, current)
+    # section-1 matches the x that kept its id, so section-0 is a change, not an addition
+    assert ids(unmatched) == ["section-0"]
+    assert (diff.added, diff.changed, diff.removed, diff.unchanged) == ([], ["section-0"], [], 1)
+
+def test_duplicate_fingerprint_added():
+    previous = [section("section-0", "x")]
+    current = [section("section-0", "x"), section("section-1", "x")]
+    unmatched, diff = diff_sections(previous, current)
+    assert ids(unmatched) == ["section-1"]
+    assert (diff.added, diff.changed, diff.removed, diff.unchanged) == (["section-1"], [], [], 1)
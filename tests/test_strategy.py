@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+import pytest
+from app.strategy import DYNAMIC, RACE, STATIC, StrategyTable
+
+def table(tmp_path, **kwargs) -> StrategyTable:
+    options = dict(enabled=True, path=str(tmp_path / "strategies.json"), min_samples=3,
+                   dynamic_threshold=0.2, static_threshold=0.6, half_life=3600,
+                   max_weight=20, reprobe_interval=3600, max_domains=100)
+    options.update(kwargs)
+    return StrategyTable(**options)
+
+def record(strategies: StrategyTable, url: str, outcomes):
+    # record_* schedule a save on the running loop
+    async def run():
+        for success in outcomes:
+            strategies.record_static(url, success)
+        if strategies._saving is not None:
+            await strategies._saving
+
+    asyncio.run(run())
+
+def test_unknown_domain_is_static(tmp_path):
+    strategies = table(tmp_path)
+    assert strategies.choose("https://new.example/") == STATIC
+
+def test_too_few_samples_stay_static(tmp_path):
+    strategies = table(tmp_path)
+    record(strategies, "https://js.example/", [False, False])
+    assert strategies.choose("https://js.example/") == STATIC
+
+@pytest.mark.parametrize("outcomes, decision", [
+    ([False] * 5, DYNAMIC),
+    ([True, False, False, True, False], RACE),
+    ([True] * 4 + [False], STATIC),
+])
+def test_decision_follows_static_success_rate(tmp_path, outcomes, decision):
+    strategies = table(tmp_path)
+    record(strategies, "https://site.example/a", outcomes)
+    # Per host, not per URL
+    assert strategies.choose("https://SITE.example/b") == decision
+
+def test_dynamic_domain_is_reprobed(tmp_path):
+    strategies = table(tmp_path, reprobe_interval=0.05)
+    record(strategies, "https://js.example/", [False] * 5)
+    # Recording a static outcome counts as a probe
+    assert strategies.choose("https://js.example/") == DYNAMIC
+    time.sleep(0.06)
+    assert strategies.choose("https://js.example/") == STATIC
+    assert strategies.choose("https://js.example/") == DYNAMIC
+    assert strategies.decisions["reprobe"] == 1
+
+def test_old_outcomes_decay(tmp_path):
+    strategies = table(tmp_path, half_life=0.05)
+    record(strategies, "https://site.example/", [False] * 5)
+    time.sleep(0.2)
+    # About a tenth of the weight left: no longer enough samples to skip static
+    assert strategies.choose("https://site.example/") == STATIC
+
+def test_disabled_table_always_static(tmp_path):
+    strategies = table(tmp_path, enabled=False)
+    record(strategies, "https://js.example/", [False] * 5)
+    assert strategies.choose("https://js.example/") == STATIC
+    assert strategies.stats()["domains"] == 0
+
+def test_saved_and_loaded(tmp_path):
+    strategies = table(tmp_path)
+    record(strategies, "https://js.example/", [False] * 5)
+    strategies.save()
+    data = json.loads((tmp_path / "strategies.json").read_text())
+    assert list(data["domains"]) == ["js.example"]
+    assert table(tmp_path).choose("https://js.example/") == DYNAMIC
+
+def test_reset(tmp_path):
+    strategies = table(tmp_path)
+    record(strategies, "https://js.example/", [False] * 5)
+    assert asyncio.run(strategies.reset("JS.example"))
+    assert not asyncio.run(strategies.reset("js.example"))
+    assert strategies.choose("https://js.example/") == STATIC
+    assert table(tmp_path).stats()["domains"] == 0
+
+def test_prune_drops_decayed_records(tmp_path):
+    strategies = table(tmp_path, half_life=3600)
+    record(strategies, "https://old.example/", [True])
+    record(strategies, "https://new.example/", [True])
+    old = strategies._records()["old.example"]
+    old.static.updated_at -= 3600 * 10  # 2^-10 of one attempt left
+    strategies._dirty = True
+    strategies.save()
+    assert sorted(d["domain"] for d in strategies.snapshot()) == ["new.example"]
+    assert strategies.stats()["pruned"] == 1
+
+def test_prune_caps_domains_least_recently_updated_first(tmp_path):
+    strategies = table(tmp_path, max_domains=3)
+    for i in range(5):
+        record(strategies, f"https://d{i}.example/", [True])
+        strategies._records()[f"d{i}.example"].static.updated_at = time.time() - 100 + i
+    strategies._dirty = True
+    strategies.save()
+    assert [d["domain"] for d in strategies.snapshot()] == ["d2.example", "d3.example", "d4.example"]
+    assert sorted(json.loads((tmp_path / "strategies.json").read_text())["domains"]) == [
+        "d2.example", "d3.example", "d4.example"
+    ]
+
+def test_older_write_does_not_replace_newer_file(tmp_path):
+    strategies = table(tmp_path)
+    record(strategies, "https://a.example/", [True])
+    strategies._dirty = True
+    older = strategies._serialize()
+    record(strategies, "https://b.example/", [True])
+    strategies._dirty = True
+    strategies.save()
+    assert strategies._write(*older)
+    assert sorted(json.loads((tmp_path / "strategies.json").read_text())["domains"]) == ["a.example", "b.example"]